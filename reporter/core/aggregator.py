@@ -1,6 +1,6 @@
 import logging
 from collections import defaultdict
-from typing import List, Tuple
+from typing import Any, Hashable, List, Optional, Tuple
 
 from numpy.random import Generator
 
@@ -10,8 +10,22 @@ from reporter.core.registry import Registry
 
 log = logging.getLogger("root")
 
+# The aggregation keys of the components of a message's template
+Signature = Tuple[Hashable, ...]
+
 
 class Aggregator(NLGPipelineComponent):
+    """
+    Combines adjacent messages whose templates share a prefix, e.g. "In 1900, X was found" and "In 1900, Y was found"
+    into "In 1900, X was found and Y was found".
+
+    By default, at most two messages are combined into one. With `n_ary`, each run of adjacent messages sharing a
+    prefix with the first message of the run is combined into a single message, which is built only once.
+    """
+
+    def __init__(self, n_ary: bool = False) -> None:
+        self.n_ary = n_ary
+
     def run(
         self, registry: Registry, random: Generator, language: str, document_plan: DocumentPlanNode
     ) -> Tuple[DocumentPlanNode]:
@@ -39,49 +53,108 @@ class Aggregator(NLGPipelineComponent):
     ) -> DocumentPlanNode:
         log.debug("Visiting {}".format(document_plan_node))
 
-        num_children = len(document_plan_node.children)
-        new_children = []  # type: List[Message]
+        # Each group is its first message, the signature of that message, and the messages combined into it along with
+        # the lengths of the prefixes they share with it. Signatures are computed once per message.
+        groups: List[Tuple[Message, Optional[Signature], List[Tuple[Message, int]]]] = []
 
-        for idx in range(0, num_children):
-            if idx > 0:
-                previous_child = new_children[-1]
-            else:
-                previous_child = None
-            current_child = self._aggregate(registry, language, document_plan_node.children[idx])
+        for child in document_plan_node.children:
+            current_child = self._aggregate(registry, language, child)
+            current_signature = self._signature(current_child)
 
             # TODO: current_child should be a Message but seems to be a DocumentPlanNode instead ¯\_(ツ)_/¯
 
-            log.debug("previous_child={}, current_child={}".format(previous_child, current_child))
+            prefix_length = self._group_prefix_length(groups[-1], current_child, current_signature) if groups else 0
 
-            if self._same_prefix(previous_child, current_child) and not (
-                previous_child.prevent_aggregation or current_child.prevent_aggregation
-            ):
+            if prefix_length > 0:
                 log.debug("Combining")
-                new_children[-1] = self._combine(registry, language, new_children[-1], current_child)
-                log.debug("Combined, New Children: {}".format(new_children))
-
+                groups[-1][2].append((current_child, prefix_length))
             else:
-                new_children.append(current_child)
-                log.debug("Did not combine. New Children: {}".format(new_children))
+                log.debug("Did not combine")
+                groups.append((current_child, current_signature, []))
+
+        new_children = [
+            self._combine(registry, language, head, members) if members else head for (head, _, members) in groups
+        ]
+        if log.isEnabledFor(logging.DEBUG):
+            log.debug("New Children: {}".format(new_children))
 
         document_plan_node.children.clear()
         document_plan_node.children.extend(new_children)
         return document_plan_node
 
-    def _get_combinable_prefix(self, first: Message, second: Message):
-        try:
-            getattr(first.template, "components")
-            getattr(second.template, "components")
-        except AttributeError:
-            return []
-
-        shared_prefix = []
-
-        for m1_component, m2_component in zip(first.template.components, second.template.components):
-            if self._are_same(m1_component, m2_component):
-                shared_prefix.append(m1_component)
-            else:
+    def _group_prefix_length(
+        self,
+        group: Tuple[Message, Optional[Signature], List[Tuple[Message, int]]],
+        child: DocumentPlanNode,
+        signature: Optional[Signature],
+    ) -> int:
+        """
+        The length of the prefix `child` shares with the first message of `group`, or 0 if it can't join the group.
+        """
+        head, head_signature, members = group
+        log.debug("previous_child={}, current_child={}".format(head, child))
+
+        # Only templated messages are aggregated. Other nodes, e.g. paragraphs, have no prevent_aggregation either.
+        if head_signature is None or signature is None:
+            return 0
+        # A combined message is never aggregated further, unless groups of any size are allowed
+        if members and not self.n_ary:
+            return 0
+        if head.prevent_aggregation or child.prevent_aggregation:
+            return 0
+        return self._combinable_prefix_length(head, child, head_signature, signature)
+
+    def _signature(self, message: DocumentPlanNode) -> Optional[Signature]:
+        """
+        The components of the message's template as hashable keys, s.t. two components can be aggregated over iff
+        their keys are equal. Computed once per message, as evaluating the components' values can be expensive.
+        """
+        template = getattr(message, "template", None)
+        components = getattr(template, "components", None)
+        if components is None:
+            return None
+        return tuple(self._component_key(component) for component in components)
+
+    @staticmethod
+    def _component_key(component: TemplateComponent) -> Hashable:
+        if not isinstance(component, Slot):
+            return "literal", _hashable(component.value)
+
+        # Aggregating numbers is a mess, and can easily lead to sentences like "The search found 114385 articles in
+        # French and from the newspaper L oeuvre", which implies that there is a set of 114385 articles s.t. every
+        # article in the set is both in french and published in L'ouvre. Unfortunately, it's possible to end up in
+        # this situation even if the underlying data actually says that there were two sets of size 114385 s.t.
+        # in one all are in french and in the other all were published in L'ouvre. That is, we do now in fact know
+        # whether the sets contain the same documents or not.
+        # Slots without a fact, and result_value slots, get a key that is equal to no other key.
+        if component.fact is None or component.slot_type == "result_value":
+            return object()
+
+        fact = component.fact
+        if component.slot_type == "time":
+            fact_key = ("time", fact.timestamp_type, fact.timestamp_from, fact.timestamp_to)
+        else:
+            fact_key = ("field", _hashable(getattr(fact, component.slot_type)))
+        return "slot", _hashable(component.value), fact_key, component.attributes.get("case", "")
+
+    def _combinable_prefix_length(
+        self,
+        first: Message,
+        second: Message,
+        first_signature: Optional[Signature],
+        second_signature: Optional[Signature],
+    ) -> int:
+        if first_signature is None or second_signature is None:
+            return 0
+
+        prefix_length = 0
+        for first_key, second_key in zip(first_signature, second_signature):
+            if first_key != second_key:
                 break
+            prefix_length += 1
+
+        first_components = first.template.components
+        second_components = second.template.components
 
         # This is a special case: "The search found 114385 articles in French." followed by
         # "The search found 114385 articles from the newspaper L oeuvre." should aggregate as
@@ -90,92 +163,57 @@ class Aggregator(NLGPipelineComponent):
         # following the prefix, in both templates, is a result_value slot.
         # We might be able to relax this to "any slot", but that requires a bunch more checking.
         # TODO: Check above.
-        m1_following = first.template.components[len(shared_prefix)]
-        m2_following = second.template.components[len(shared_prefix)]
-        print(f"NEXT COMPONENTS: {m1_following} and {m2_following}")
-        if isinstance(m1_following, Slot) and isinstance(m2_following, Slot):
-            if m1_following.slot_type == "result_value" and m2_following.slot_type == "result_value":
-                return shared_prefix
-
-        # The standard case: the prefix must terminate in a slot. Due to self._are_same above, the prefix can't ever
-        # contain a result_value slot, so no need to special case that.
-        while shared_prefix and type(shared_prefix[-1]) != Slot:
-            shared_prefix = shared_prefix[:-1]
-        return shared_prefix
-
-    def _same_prefix(self, first: Message, second: Message) -> bool:
-        if first is None or second is None:
-            return False
-        return len(self._get_combinable_prefix(first, second)) > 0
-
-    def _combine(self, registry: Registry, language: str, first: Message, second: Message) -> Message:
-        log.debug(
-            "Combining {} and {}".format(
-                [c.value for c in first.template.components], [c.value for c in second.template.components]
-            )
-        )
-
-        shared_prefix = self._get_combinable_prefix(first, second)
-        log.debug(f"Shared prefix is {[e.value for e in shared_prefix]}")
-
-        combined = [c for c in first.template.components]
+        if prefix_length < len(first_components) and prefix_length < len(second_components):
+            m1_following = first_components[prefix_length]
+            m2_following = second_components[prefix_length]
+            if isinstance(m1_following, Slot) and isinstance(m2_following, Slot):
+                if m1_following.slot_type == "result_value" and m2_following.slot_type == "result_value":
+                    return prefix_length
+
+        # The standard case: the prefix must terminate in a slot. Due to the keys of result_value slots never being
+        # equal, the prefix can't ever contain a result_value slot, so no need to special case that.
+        while prefix_length > 0 and type(first_components[prefix_length - 1]) is not Slot:
+            prefix_length -= 1
+        return prefix_length
+
+    def _combine(self, registry: Registry, language: str, first: Message, rest: List[Tuple[Message, int]]) -> Message:
+        """
+        Combines `first` with each of the messages in `rest`, leaving out the prefixes (of the given lengths) they
+        share with `first`.
+        """
+        if log.isEnabledFor(logging.DEBUG):
+            for (second, prefix_length) in rest:
+                log.debug(
+                    "Combining {} and {}, shared prefix is {}".format(
+                        [c.value for c in first.template.components],
+                        [c.value for c in second.template.components],
+                        [c.value for c in second.template.components[:prefix_length]],
+                    )
+                )
 
         conjunctions = registry.get("CONJUNCTIONS").get(language, None)
         if not conjunctions:
             conjunctions = (defaultdict(lambda x: "NO-CONJUNCTION-DICT"),)
-        combined.append(Literal(conjunctions.get("default_combiner", "MISSING-DEFAULT-CONJUCTION")))
-        combined.extend(second.template.components[len(shared_prefix) :])
-        log.debug("Combined thing is {}".format([c.value for c in combined]))
-        new_message = Message(
-            facts=first.facts + [fact for fact in second.facts if fact not in first.facts],
-            importance_coefficient=first.importance_coefficient,
-        )
+        conjunction = conjunctions.get("default_combiner", "MISSING-DEFAULT-CONJUCTION")
+
+        combined = [c for c in first.template.components]
+        facts = list(first.facts)
+        for (second, prefix_length) in rest:
+            combined.append(Literal(conjunction))
+            combined.extend(second.template.components[prefix_length:])
+            facts.extend([fact for fact in second.facts if fact not in facts])
+        if log.isEnabledFor(logging.DEBUG):
+            log.debug("Combined thing is {}".format([c.value for c in combined]))
+
+        new_message = Message(facts=facts, importance_coefficient=first.importance_coefficient)
         new_message.template = Template(combined)
         new_message.prevent_aggregation = True
         return new_message
 
-    def _are_same(self, c1: TemplateComponent, c2: TemplateComponent) -> bool:
-        if c1.value != c2.value:
-            # Are completely different, are not same
-            return False
-
-        if isinstance(c1, Slot) and isinstance(c2, Slot):
-            if c1.fact is None or c2.fact is None:
-                return False
-
-            if (c1.slot_type == "time") != (c2.slot_type == "time"):
-                return False
-            elif c1.slot_type == "time" and c2.slot_type == "time":
-                if not (
-                    (c1.fact.timestamp_type == c2.fact.timestamp_type)
-                    and (c1.fact.timestamp_from == c2.fact.timestamp_from)
-                    and (c1.fact.timestamp_to == c2.fact.timestamp_to)
-                ):
-                    return False
-            else:
-                if getattr(c1.fact, c1.slot_type) != getattr(c2.fact, c2.slot_type):
-                    return False
-
-            # Aggregating numbers is a mess, and can easily lead to sentences like "The search found 114385 articles in
-            # French and from the newspaper L oeuvre", which implies that there is a set of 114385 articles s.t. every
-            # article in the set is both in french and published in L'ouvre. Unfortunately, it's possible to end up in
-            # this situation even if the underlying data actually says that there were two sets of size 114385 s.t.
-            # in one all are in french and in the other all were published in L'ouvre. That is, we do now in fact know
-            # whether the sets contain the same documents or not.
-            if c1.slot_type == "result_value":
-                return False
-
-        # They are apparently same, check cases
-        c1_case = "no-case"
-        c2_case = "no-case"
-        try:
-            c1_case = c1.attributes.get("case", "")
-        except AttributeError:
-            pass
-        try:
-            c2_case = c2.attributes.get("case", "")
-        except AttributeError:
-            pass
-
-        # False if different cases or one had attributes and other didn't
-        return c1_case == c2_case
+
+def _hashable(value: Any) -> Hashable:
+    if isinstance(value, (list, tuple)):
+        return tuple(_hashable(item) for item in value)
+    if isinstance(value, dict):
+        return tuple((key, _hashable(item)) for (key, item) in value.items())
+    return value
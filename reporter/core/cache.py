@@ -0,0 +1,57 @@
+import logging
+from collections import OrderedDict
+from threading import Lock
+from typing import Any, Hashable, Optional
+
+log = logging.getLogger("root")
+
+
+class LRUCache(object):
+    """
+    A bounded, thread-safe mapping that evicts the least recently used entry once `maxsize` entries are stored.
+
+    Unlike functools.lru_cache, the cache is an explicit object, s.t. it can be placed in the Registry and shared
+    between the pipeline components that are (re)created for every request.
+    """
+
+    def __init__(self, maxsize: int = 1024) -> None:
+        if maxsize <= 0:
+            raise ValueError("maxsize must be positive, got {}".format(maxsize))
+        self.maxsize = maxsize
+        self._data: "OrderedDict[Hashable, Any]" = OrderedDict()
+        self._lock = Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: Hashable, default: Optional[Any] = None) -> Any:
+        with self._lock:
+            try:
+                value = self._data[key]
+            except KeyError:
+                self.misses += 1
+                return default
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key: Hashable, value: Any) -> None:
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._data
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def __str__(self) -> str:
+        return "LRUCache(size={}/{}, hits={}, misses={})".format(len(self), self.maxsize, self.hits, self.misses)
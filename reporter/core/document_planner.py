@@ -1,7 +1,8 @@
 import logging
 from abc import abstractmethod
-from typing import List, Tuple
+from typing import Iterable, List, Optional, Tuple
 
+import numpy as np
 from numpy.random import Generator
 
 from reporter.core.models import DocumentPlanNode, Message, Relation
@@ -15,6 +16,35 @@ class NoInterestingMessagesException(Exception):
     pass
 
 
+class MessagePool(object):
+    """
+    The scored messages a document planner works with, addressed by their index in the list of scored messages. Keeps
+    track of which of the messages are still available for inclusion in the document plan with a boolean mask.
+    """
+
+    def __init__(self, messages: List[Message]) -> None:
+        self.messages = messages
+        self.scores = np.fromiter((message.score for message in messages), dtype=float, count=len(messages))
+        self.available = np.ones(len(messages), dtype=bool)
+        self._indices = {id(message): idx for (idx, message) in enumerate(messages)}
+
+    def __len__(self) -> int:
+        return len(self.messages)
+
+    def index_of(self, message: Message) -> int:
+        return self._indices[id(message)]
+
+    def remove(self, messages: Iterable[Message]) -> None:
+        for message in messages:
+            self.available[self.index_of(message)] = False
+
+    def available_indices(self) -> np.ndarray:
+        return np.flatnonzero(self.available)
+
+    def available_messages(self) -> List[Message]:
+        return [self.messages[idx] for idx in self.available_indices()]
+
+
 class DocumentPlanner(NLGPipelineComponent):
     @abstractmethod
     def run(
@@ -22,6 +52,12 @@ class DocumentPlanner(NLGPipelineComponent):
     ) -> Tuple[DocumentPlanNode, List[Message]]:
         pass
 
+    def message_pool(self, scored_messages: List[Message]) -> MessagePool:
+        """
+        Subclasses can override this to precompute whatever they need to know about the messages.
+        """
+        return MessagePool(scored_messages)
+
 
 class HeadlineDocumentPlanner(DocumentPlanner):
     def run(
@@ -36,7 +72,7 @@ class HeadlineDocumentPlanner(DocumentPlanner):
         # Root contains a sequence of children
         document_plan = DocumentPlanNode(children=[], relation=Relation.SEQUENCE)
 
-        headline_message, _ = self.select_next_nucleus(scored_messages, [])
+        headline_message, _ = self.select_next_nucleus(self.message_pool(scored_messages), [])
         all_messages = scored_messages
 
         document_plan.children.append(DocumentPlanNode(children=[headline_message], relation=Relation.SEQUENCE))
@@ -45,8 +81,8 @@ class HeadlineDocumentPlanner(DocumentPlanner):
 
     @abstractmethod
     def select_next_nucleus(
-        self, available_message: List[Message], selected_nuclei: List[Message]
-    ) -> Tuple[Message, float]:
+        self, available_messages: MessagePool, selected_nuclei: List[Message]
+    ) -> Tuple[Optional[Message], float]:
         raise NotImplementedError
 
 
@@ -62,7 +98,7 @@ class BodyDocumentPlanner(DocumentPlanner):
         # Root contains a sequence of children
         document_plan = DocumentPlanNode(children=[], relation=Relation.SEQUENCE)
 
-        available_messages = scored_messages[:]  # Make a copy s.t. we can modify in place
+        available_messages = self.message_pool(scored_messages)
         selected_nuclei: List[Message] = []
 
         while True:
@@ -80,20 +116,21 @@ class BodyDocumentPlanner(DocumentPlanner):
             selected_nuclei.append(nucleus)
 
             # Messages are only allowed in the DP once
-            available_messages = [m for m in available_messages if m != nucleus]
+            if nucleus is not None:
+                available_messages.remove([nucleus])
 
             # Get a suitable amount of satellites
             satellites: List[Message] = self.select_satellites_for_nucleus(nucleus, available_messages)
 
             # Messages are only allowed in the DP once
-            available_messages = [m for m in available_messages if m not in satellites]
+            available_messages.remove(satellites)
 
             document_plan.children.append(DocumentPlanNode([nucleus] + satellites, Relation.SEQUENCE))
 
     @abstractmethod
     def select_next_nucleus(
-        self, available_message: List[Message], selected_nuclei: List[Message]
-    ) -> Tuple[Message, float]:
+        self, available_messages: MessagePool, selected_nuclei: List[Message]
+    ) -> Tuple[Optional[Message], float]:
         raise NotImplementedError
 
     @abstractmethod
@@ -101,5 +138,5 @@ class BodyDocumentPlanner(DocumentPlanner):
         raise NotImplementedError
 
     @abstractmethod
-    def select_satellites_for_nucleus(self, nucleus: Message, available_messages: List[Message]) -> List[Message]:
+    def select_satellites_for_nucleus(self, nucleus: Message, available_messages: MessagePool) -> List[Message]:
         raise NotImplementedError
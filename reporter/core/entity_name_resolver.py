@@ -73,33 +73,7 @@ class EntityNameResolver(NLGPipelineComponent):
         entity to_value functions to return the chosen form of that NE's name.
         """
         if isinstance(this, Slot):
-            if not self.is_entity(this.value):
-                log.debug("Visited leaf non-NE leaf node {}".format(this.value))
-                return encountered, previous_entities
-
-            log.debug("Visiting NE leaf {}".format(this.value))
-            entity_type, entity = self.parse_entity(this.value)
-
-            if previous_entities[entity_type] == entity:
-                log.debug("Same as previous entity")
-                this.attributes["name_type"] = "pronoun"
-
-            elif entity in encountered:
-                log.debug("Different entity than previous, but has been previously encountered")
-                this.attributes["name_type"] = "short"
-
-            else:
-                log.debug("First time encountering this entity")
-                this.attributes["name_type"] = "full"
-                encountered.add(entity)
-                log.debug("Added entity to encountered, all encountered: {}".format(encountered))
-
-            self.resolve_surface_form(registry, random, language, this, entity, entity_type)
-            log.debug("Resolved entity name")
-
-            this.attributes["entity_type"] = entity_type
-            previous_entities[entity_type] = entity
-
+            self.resolve_slot(registry, random, language, this, previous_entities, encountered)
             return encountered, previous_entities
         elif isinstance(this, DocumentPlanNode):
             log.debug("Visiting non-leaf '{}'".format(this))
@@ -110,6 +84,45 @@ class EntityNameResolver(NLGPipelineComponent):
             return encountered, previous_entities
         return encountered, previous_entities
 
+    def resolve_slot(
+        self,
+        registry: Registry,
+        random: Generator,
+        language: str,
+        slot: Slot,
+        previous_entities: DefaultDict[str, None],
+        encountered: Set[str],
+    ) -> None:
+        """
+        Resolves the name of the entity in `slot`, if any, and updates `previous_entities` and `encountered`.
+        """
+        if not self.is_entity(slot.value):
+            log.debug("Visited leaf non-NE leaf node {}".format(slot.value))
+            return
+
+        log.debug("Visiting NE leaf {}".format(slot.value))
+        entity_type, entity = self.parse_entity(slot.value)
+
+        if previous_entities[entity_type] == entity:
+            log.debug("Same as previous entity")
+            slot.attributes["name_type"] = "pronoun"
+
+        elif entity in encountered:
+            log.debug("Different entity than previous, but has been previously encountered")
+            slot.attributes["name_type"] = "short"
+
+        else:
+            log.debug("First time encountering this entity")
+            slot.attributes["name_type"] = "full"
+            encountered.add(entity)
+            log.debug("Added entity to encountered, all encountered: {}".format(encountered))
+
+        self.resolve_surface_form(registry, random, language, slot, entity, entity_type)
+        log.debug("Resolved entity name")
+
+        slot.attributes["entity_type"] = entity_type
+        previous_entities[entity_type] = entity
+
     @abstractmethod
     def is_entity(self, maybe_entity: str) -> bool:
         raise NotImplementedError("Not implemented")
@@ -6,6 +6,8 @@ from collections import namedtuple
 from enum import Enum
 from typing import Any, Callable, Dict, List, Optional, Tuple, Union
 
+from reporter.core.tags import TimeTag
+
 log = logging.getLogger("root")
 
 
@@ -379,6 +381,8 @@ class DefaultTemplate(Template):
 class TemplateComponent(object):
     """An abstract TemplateComponent. Should not be used directly."""
 
+    __slots__ = ("_parent",)
+
     def __init__(self) -> None:
         self._parent = None
 
@@ -409,8 +413,14 @@ class Slot(TemplateComponent):
     """
     A TemplateComponent that can be filled by a Fact that fulfills a set of
     requirements.
+
+    Until the slot is realized, its value is computed from its fact by its SlotSource. Assigning a SlotSource (or any
+    other callable) to the value replaces the source, whereas assigning anything else realizes the slot with that value.
+    A realized slot stores its value directly.
     """
 
+    __slots__ = ("attributes", "_to_value", "fact", "_value", "_realized")
+
     # Todo: Are the values in "attributes" of a known type?
     def __init__(
         self, to_value: "SlotSource", attributes: Optional[Dict[str, Any]] = None, fact: Optional[Fact] = None
@@ -424,6 +434,8 @@ class Slot(TemplateComponent):
         self.attributes = attributes or {}
         self._to_value = to_value
         self.fact = fact
+        self._value = None
+        self._realized = False
 
     @property
     def slot_type(self) -> str:
@@ -431,18 +443,38 @@ class Slot(TemplateComponent):
 
     @property
     def value(self) -> Union[str, int, float]:
-        return self._to_value(self.fact)
+        if not self._realized:
+            return self._to_value(self.fact)
+        return self._value
 
     @value.setter
-    def value(self, f: Callable) -> None:
-        self._to_value = f
+    def value(self, value: Union[Callable, str, int, float]) -> None:
+        if callable(value):
+            self._to_value = value
+            self._value = None
+            self._realized = False
+        else:
+            self._value = value
+            self._realized = True
 
     def copy(self, include_fact=False) -> "Slot":
         # TODO: Is it intended that Fact is not copied over?
         if not include_fact:
-            return Slot(self._to_value, self.attributes.copy())
+            copy = Slot(self._to_value, self.attributes.copy())
         else:
-            return Slot(self._to_value, self.attributes.copy(), self.fact)
+            copy = Slot(self._to_value, self.attributes.copy(), self.fact)
+        copy._value = self._value
+        copy._realized = self._realized
+        return copy
+
+    def with_value(self, value: Union[str, int, float], attributes: Optional[Dict[str, Any]] = None) -> "Slot":
+        """
+        Returns a new Slot with the same source and fact as this one, realized as `value`.
+        """
+        slot = Slot(self._to_value, attributes, self.fact)
+        slot._value = value
+        slot._realized = True
+        return slot
 
     def __str__(self) -> str:
         try:
@@ -453,6 +485,8 @@ class Slot(TemplateComponent):
 
 
 class LiteralSlot(Slot):
+    __slots__ = ()
+
     def __init__(self, value: str, attributes: Optional[Dict[str, str]] = None) -> None:
         super().__init__(LiteralSource(value), attributes)
 
@@ -460,6 +494,8 @@ class LiteralSlot(Slot):
 class Literal(TemplateComponent):
     """A string literal."""
 
+    __slots__ = ("_string",)
+
     def __init__(self, string: str) -> None:
         super().__init__()
         self._string = string
@@ -523,10 +559,8 @@ class TimeSource(SlotSource):
     def __init__(self) -> None:
         super().__init__("time")
 
-    def __call__(self, fact: Fact) -> str:
-        return "[TIME:{}:{}:{}]".format(
-            getattr(fact, "timestamp_type"), getattr(fact, "timestamp_from"), getattr(fact, "timestamp_to")
-        )
+    def __call__(self, fact: Fact) -> TimeTag:
+        return TimeTag(getattr(fact, "timestamp_type"), getattr(fact, "timestamp_from"), getattr(fact, "timestamp_to"))
 
     def __str__(self):
         return "fact.time"
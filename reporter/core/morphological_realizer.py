@@ -1,15 +1,109 @@
 import logging
+import os
+import sqlite3
 from abc import ABC, abstractmethod
-from typing import Dict, Tuple
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from threading import Lock
+from typing import Dict, Iterator, List, Mapping, Optional, Tuple, Type
 
 from numpy.random import Generator
 
+from reporter.core.cache import LRUCache
 from reporter.core.models import DocumentPlanNode, Message, Slot
 from reporter.core.pipeline import NLGPipelineComponent
 from reporter.core.registry import Registry
 
 log = logging.getLogger("root")
 
+MORPHOLOGY_CACHE_SIZE = 8192
+
+# (language, surface form, case)
+MorphologyKey = Tuple[str, str, str]
+
+
+class MorphologyCache(object):
+    """
+    Inflected word forms keyed by (language, surface form, case).
+
+    Lookups first go to a read-only table of precomputed inflections, if one is given, then to an in-process LRUCache
+    and then, if a path is given, to an on-disk SQLite store. New entries are added to the latter two, and only the new
+    entries are written to the store. The store is opened in WAL mode, s.t. several processes can share it. Like the
+    LRUCache, the cache is meant to be placed in the Registry and shared between requests.
+    """
+
+    def __init__(
+        self,
+        maxsize: int = MORPHOLOGY_CACHE_SIZE,
+        path: Optional[str] = None,
+        table: Optional[Mapping[MorphologyKey, str]] = None,
+    ) -> None:
+        self.path = path
+        self.table: Mapping[MorphologyKey, str] = table if table is not None else {}
+        self._lru = LRUCache(maxsize)
+        self._lock = Lock()
+        self._connection: Optional[sqlite3.Connection] = self._open(path) if path else None
+
+    @staticmethod
+    def _open(path: str) -> Optional[sqlite3.Connection]:
+        try:
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+            connection = sqlite3.connect(path, check_same_thread=False, timeout=10)
+            with connection:
+                connection.execute("PRAGMA journal_mode=WAL")
+                connection.execute(
+                    "CREATE TABLE IF NOT EXISTS inflections ("
+                    'language TEXT NOT NULL, word TEXT NOT NULL, "case" TEXT NOT NULL, form TEXT NOT NULL, '
+                    'PRIMARY KEY (language, word, "case")'
+                    ") WITHOUT ROWID"
+                )
+            stored = connection.execute("SELECT COUNT(*) FROM inflections").fetchone()[0]
+        except Exception as ex:
+            log.exception("Unable to open morphology cache at {}, not storing inflections: {}".format(path, ex))
+            return None
+        log.info("Opened morphology cache at {} with {} inflected forms".format(path, stored))
+        return connection
+
+    def get(self, key: MorphologyKey) -> Optional[str]:
+        value = self.table.get(key)
+        if value is not None:
+            return value
+        value = self._lru.get(key)
+        if value is None and self._connection is not None:
+            with self._lock:
+                row = self._connection.execute(
+                    'SELECT form FROM inflections WHERE language = ? AND word = ? AND "case" = ?', key
+                ).fetchone()
+            if row is not None:
+                value = row[0]
+                self._lru.put(key, value)
+        return value
+
+    def update(self, entries: Dict[MorphologyKey, str]) -> None:
+        for key, value in entries.items():
+            self._lru.put(key, value)
+        if self._connection is None or not entries:
+            return
+        try:
+            with self._lock, self._connection:
+                self._connection.executemany(
+                    "INSERT OR REPLACE INTO inflections VALUES (?, ?, ?, ?)",
+                    [(*key, value) for (key, value) in entries.items()],
+                )
+        except Exception as ex:
+            log.exception("Unable to save inflections to morphology cache at {}: {}".format(self.path, ex))
+
+    def __len__(self) -> int:
+        if self._connection is None:
+            return len(self._lru)
+        with self._lock:
+            return self._connection.execute("SELECT COUNT(*) FROM inflections").fetchone()[0]
+
+    def __str__(self) -> str:
+        return "MorphologyCache(table={}, path={}, stored={}, {})".format(
+            len(self.table), self.path, len(self) if self._connection is not None else 0, self._lru
+        )
+
 
 class LanguageSpecificMorphologicalRealizer(ABC):
     def __init__(self, language):
@@ -20,6 +114,133 @@ class LanguageSpecificMorphologicalRealizer(ABC):
         pass
 
 
+class CachedMorphologicalRealizer(LanguageSpecificMorphologicalRealizer):
+    """
+    A LanguageSpecificMorphologicalRealizer that inflects each distinct (surface form, case) pair only once, storing
+    the results in a MorphologyCache. Subclasses implement the case normalization and the actual inflection.
+    """
+
+    # (word, normalized case) pairs inflected by warm_up
+    warm_up_words: Tuple[Tuple[str, str], ...] = ()
+
+    def __init__(
+        self, language: str, cache: Optional[MorphologyCache] = None, worker: Optional["MorphologyWorker"] = None
+    ) -> None:
+        super().__init__(language)
+        self.cache = cache if cache is not None else MorphologyCache()
+        self.worker = worker
+
+    @abstractmethod
+    def normalize_case(self, case: str) -> str:
+        pass
+
+    @abstractmethod
+    def inflect(self, word: str, case: str) -> str:
+        """
+        Inflects `word` to the normalized `case`, without consulting the cache.
+        """
+
+    def inflect_batch(self, words_and_cases: List[Tuple[str, str]]) -> List[str]:
+        return [self.inflect(word, case) for (word, case) in words_and_cases]
+
+    def warm_up(self) -> None:
+        """
+        Loads whatever the realizer loads lazily, e.g. FST models, by inflecting `warm_up_words` without the cache. If
+        the realizer uses a worker, the models are loaded in the worker.
+        """
+        if self.warm_up_words:
+            self._inflect_missing(list(self.warm_up_words))
+
+    def realize(self, slot: Slot) -> str:
+        if slot.attributes.get("case") is None:
+            return slot.value
+        return self.realize_batch([slot])[0]
+
+    def realize_batch(self, slots: List[Slot]) -> List[str]:
+        """
+        Realizes all of `slots`, inflecting the forms missing from the cache in a single batch.
+        """
+        keys = [self._key(slot) for slot in slots]
+
+        forms: Dict[MorphologyKey, Optional[str]] = {}
+        for key in keys:
+            if key is not None and key not in forms:
+                forms[key] = self.cache.get(key)
+
+        missing = [key for (key, form) in forms.items() if form is None]
+        if missing:
+            misses = dict(zip(missing, self._inflect_missing([(word, case) for (_, word, case) in missing])))
+            log.debug("Inflected {} forms missing from the morphology cache".format(len(misses)))
+            self.cache.update(misses)
+            forms.update(misses)
+
+        return [slot.value if key is None else forms[key] for (slot, key) in zip(slots, keys)]
+
+    def _inflect_missing(self, words_and_cases: List[Tuple[str, str]]) -> List[str]:
+        if self.worker is not None:
+            try:
+                return self.worker.inflect_batch(type(self), words_and_cases)
+            except BrokenProcessPool as ex:
+                log.exception("Morphology worker died, inflecting in process instead: {}".format(ex))
+        return self.inflect_batch(words_and_cases)
+
+    def _key(self, slot: Slot) -> Optional[MorphologyKey]:
+        case: Optional[str] = slot.attributes.get("case")
+        if case is None:
+            return None
+        normalized_case = self.normalize_case(case)
+        log.debug("Normalized case {} to {}".format(case, normalized_case))
+        return self.language, str(slot.value), normalized_case
+
+
+# The realizers of the worker process, one per type, created on first use and kept (with their FST models) between
+# batches. Never used in the main process.
+_worker_realizers: Dict[Type[CachedMorphologicalRealizer], CachedMorphologicalRealizer] = {}
+
+
+def _inflect_batch_in_worker(
+    realizer_type: Type[CachedMorphologicalRealizer], words_and_cases: List[Tuple[str, str]]
+) -> List[str]:
+    realizer = _worker_realizers.get(realizer_type)
+    if realizer is None:
+        realizer = _worker_realizers[realizer_type] = realizer_type()
+    return realizer.inflect_batch(words_and_cases)
+
+
+class MorphologyWorker(object):
+    """
+    A single worker process that inflects batches of words for CachedMorphologicalRealizers, s.t. the FST models are
+    loaded and held outside of the process serving the requests. The realizer types used with the worker must be
+    constructible without arguments.
+
+    If the worker process dies, the batch it was given fails with a BrokenProcessPool, and a new worker process is
+    started for the following batches.
+    """
+
+    def __init__(self) -> None:
+        self._executor = ProcessPoolExecutor(max_workers=1)
+        self._lock = Lock()
+
+    def inflect_batch(
+        self, realizer_type: Type[CachedMorphologicalRealizer], words_and_cases: List[Tuple[str, str]]
+    ) -> List[str]:
+        executor = self._executor
+        try:
+            return executor.submit(_inflect_batch_in_worker, realizer_type, words_and_cases).result()
+        except BrokenProcessPool:
+            # Several threads may see the same pool break, but only the first one replaces it
+            with self._lock:
+                if self._executor is executor:
+                    log.warning("Morphology worker died, starting a new one")
+                    self._executor = ProcessPoolExecutor(max_workers=1)
+            executor.shutdown(wait=False)
+            raise
+
+    def shutdown(self) -> None:
+        with self._lock:
+            self._executor.shutdown()
+
+
 class MorphologicalRealizer(NLGPipelineComponent):
     def __init__(self, language_realizers: Dict[str, LanguageSpecificMorphologicalRealizer]) -> None:
         self.language_realizers = language_realizers
@@ -40,21 +261,27 @@ class MorphologicalRealizer(NLGPipelineComponent):
             log.warning("No morphological realizer for language {}".format(language))
             return (document_plan,)
 
-        self._recurse(language, document_plan)
+        realizer = self.language_realizers[language]
+        slots = list(self._slots(document_plan))
+        if isinstance(realizer, CachedMorphologicalRealizer):
+            values = realizer.realize_batch(slots)
+        else:
+            values = [realizer.realize(slot) for slot in slots]
+        for slot, value in zip(slots, values):
+            slot.value = value
 
         if log.isEnabledFor(logging.DEBUG):
             document_plan.print_tree()
 
         return (document_plan,)
 
-    def _recurse(self, language: str, this: DocumentPlanNode) -> None:
+    def _slots(self, this: DocumentPlanNode) -> Iterator[Slot]:
         log.debug("Visiting '{}'".format(this))
         if not isinstance(this, Message):
             for child in this.children:
-                self._recurse(language, child)
+                yield from self._slots(child)
             return
 
         for template_component in this.template.components:
             if isinstance(template_component, Slot):
-                realized_value = self.language_realizers[language].realize(template_component)
-                template_component.value = lambda x, realized_value=realized_value: realized_value
+                yield template_component
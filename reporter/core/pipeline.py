@@ -40,11 +40,21 @@ class NLGPipeline(object):
     def components(self) -> Tuple[NLGPipelineComponent]:
         return self._components
 
-    def run(self, initial_inputs: Any, language: str, prng_seed: Optional[int] = None) -> Union[List[Any], Tuple[Any]]:
+    def run(
+        self,
+        initial_inputs: Any,
+        language: str,
+        prng_seed: Optional[int] = None,
+        prng: Optional[random.Generator] = None,
+    ) -> Union[List[Any], Tuple[Any]]:
+        """
+        Runs the components in order, each with the output of the previous one. If `prng` is given, it is used as is
+        instead of a new one seeded with `prng_seed`, e.g. to continue from where the pipeline that produced
+        `initial_inputs` left off.
+        """
         log.info("Starting NLG pipeline")
-        log.debug("PRNG seed is {}".format(prng_seed))
-        prng = random.default_rng(prng_seed)  # type: random.Generator
-        log.info("First random is {}".format(prng.integers(0, 1000000)))
+        if prng is None:
+            prng = self.new_prng(prng_seed)
         args = initial_inputs
         for component in self.components:
             log.info("Running component {}".format(component))
@@ -56,3 +66,10 @@ class NLGPipeline(object):
             args = output
         log.info("NLG Pipeline completed")
         return output
+
+    @staticmethod
+    def new_prng(prng_seed: Optional[int] = None) -> random.Generator:
+        log.debug("PRNG seed is {}".format(prng_seed))
+        prng = random.default_rng(prng_seed)  # type: random.Generator
+        log.info("First random is {}".format(prng.integers(0, 1000000)))
+        return prng
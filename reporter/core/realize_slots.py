@@ -1,23 +1,46 @@
 import logging
 import re
 from abc import ABC, abstractmethod
-from typing import Callable, Iterable, List, Optional, Tuple, Union
+from functools import lru_cache
+from itertools import groupby
+from types import MappingProxyType
+from typing import Any, Callable, Dict, Iterable, List, Mapping, Optional, Tuple, Union
 
 import babel.numbers
 from numpy.random import Generator
 
+from reporter.core.cache import LRUCache
 from reporter.core.models import DocumentPlanNode, Literal, Message, Slot, TemplateComponent
 from reporter.core.pipeline import NLGPipelineComponent
-from reporter.core.registry import Registry
+from reporter.core.registry import Registry, UnknownComponentException
+from reporter.core.tags import is_link, parse_tag
 
 log = logging.getLogger("root")
 
+# Maximum number of times the slots produced by realizing a single template slot are themselves realized
+MAX_REALIZATION_DEPTH = 32
+
+# Number of slot values, and of token sequences, each RegexRealizer remembers across requests
+REALIZATION_CACHE_SIZE = 256
+
+# Stored in the match cache of a RegexRealizer for slot values the regex does not match
+_NO_MATCH = object()
+
 
 class SlotRealizer(NLGPipelineComponent):
-    def __init__(self) -> None:
+    """
+    Realizes the slots of each Message with the SlotRealizerComponents supporting the language. Without `links`, the
+    links produced by the components, e.g. "[LINK:ARTICLE:<article id>]", are left out of the realizations. Slots that
+    are already realized as empty are not visited.
+    """
+
+    def __init__(self, links: bool = True) -> None:
+        self.links = links
         self._random = None
         self._registry = None
-        self.slot_realizers = None
+        self.realizer_index = None
+        self.number_realizer = NumberRealizer()
+        self._unrealized_slots: List[Slot] = []
 
     def run(
         self, registry: Registry, random: Generator, language: str, document_plan: DocumentPlanNode
@@ -28,47 +51,101 @@ class SlotRealizer(NLGPipelineComponent):
         log.info("Realizing slots")
         self._registry = registry
         self._random = random
-        self.slot_realizers: List[SlotRealizerComponent] = self._registry.get("slot-realizers")[:]
-        self.slot_realizers.append(NumberRealizer())
-        self.slot_realizers = [
-            realizer
-            for realizer in self.slot_realizers
-            if language.split("-")[0] in realizer.supported_languages() or "ANY" in realizer.supported_languages()
-        ]
-        while self._recurse(document_plan, language.split("-")[0]):
-            pass  # Repeat until no more changes
+        self.realizer_index = self._realizer_index(language.split("-")[0])
+        self._unrealized_slots = []
+        self._recurse(document_plan, language.split("-")[0])
+
+        # Whatever none of the other realizers could realize might still be a number. Since the NumberRealizer is the
+        # last resort and only modifies the slots in place, all of the numbers can be formatted in one go at the end.
+        self.number_realizer.realize_batch(self._unrealized_slots, language)
         return (document_plan,)
 
-    def _recurse(self, this: DocumentPlanNode, language: str) -> bool:
+    @staticmethod
+    def build_indices(
+        slot_realizers: Iterable["SlotRealizerComponent"], languages: Iterable[str]
+    ) -> Mapping[str, "SlotRealizerIndex"]:
+        """
+        Builds a SlotRealizerIndex of the components supporting each of `languages`. The indices can be registered in
+        the Registry as "slot-realizer-indices", s.t. they are shared by all requests instead of being rebuilt.
+        """
+        slot_realizers = list(slot_realizers)
+        return MappingProxyType(
+            {language: SlotRealizerIndex(_supporting(slot_realizers, language)) for language in languages}
+        )
+
+    def _realizer_index(self, language: str) -> "SlotRealizerIndex":
+        try:
+            indices: Mapping[str, SlotRealizerIndex] = self._registry.get("slot-realizer-indices")
+        except UnknownComponentException:
+            indices = {}
+        index = indices.get(language)
+        if index is None:
+            index = SlotRealizerIndex(_supporting(self._registry.get("slot-realizers"), language))
+        return index
+
+    def _recurse(self, this: DocumentPlanNode, language: str) -> None:
         if not isinstance(this, Message):
             log.debug("Visiting '{}'".format(this))
-            return any(self._recurse(child, language) for child in this.children)
+            for child in this.children:
+                self._recurse(child, language)
         else:
             log.debug("Visiting {}".format(this))
-            any_modified = False
-            # Use indexes to iterate through the children since the template slots may be edited, added or replaced
-            # during iteration. Ugly, but will do for now.
-            idx = 0
-            while idx < len(this.children):
-                child = this.children[idx]
-                log.debug("Visiting child {}".format(child))
-                if not isinstance(child, Slot):
-                    idx += 1
+            self._realize_message(this, language)
+
+    def _realize_message(self, message: Message, language: str) -> None:
+        """
+        Realizes the slots of a single message with a worklist. Each step realizes, in order, the slots produced by the
+        previous step, so a slot is only revisited if a realizer replaced it with new components. A slot that would be
+        realized into a slot with the same value as one of its ancestors is left as is, as would a realization chain
+        longer than MAX_REALIZATION_DEPTH steps.
+        """
+        # Maps the ids of the slots still to be realized to the values of the slots they were realized from
+        worklist: Dict[int, Tuple[Any, ...]] = {
+            id(child): () for child in message.children if isinstance(child, Slot) and child.value != ""
+        }
+        depth = 0
+        while worklist:
+            if depth >= MAX_REALIZATION_DEPTH:
+                log.error(
+                    "Slots of {} still unrealized after {} steps, giving up on {}".format(
+                        message, depth, [str(child) for child in message.children if id(child) in worklist]
+                    )
+                )
+                return
+            depth += 1
+
+            next_worklist: Dict[int, Tuple[Any, ...]] = {}
+            components: List[TemplateComponent] = []
+            for child in message.children:
+                if id(child) not in worklist:
+                    components.append(child)
                     continue
+                log.debug("Visiting child {}".format(child))
+                lineage = worklist[id(child)] + (child.value,)
                 modified_components = self._realize_slot(language, child)
-                if modified_components != [child]:
-                    any_modified = True
-                this.children[idx : idx + 1] = modified_components
-                idx += len(modified_components)
-            return any_modified
+                if len(modified_components) == 1 and modified_components[0] is child:
+                    components.append(child)
+                    self._unrealized_slots.append(child)
+                    continue
+                if not self.links:
+                    modified_components = [c for c in modified_components if not is_link(c.value)]
+                components.extend(modified_components)
+                for component in modified_components:
+                    if not isinstance(component, Slot):
+                        continue
+                    if component.value in lineage:
+                        log.error("Realizing {} would never terminate, leaving it as is".format(component))
+                        continue
+                    next_worklist[id(component)] = lineage
+            message.children[:] = components
+            worklist = next_worklist
 
     def _realize_slot(self, language: str, slot: Slot) -> List[TemplateComponent]:
-        for slot_realizer in self.slot_realizers:
-            assert isinstance(slot_realizer, SlotRealizerComponent)
-            if language in slot_realizer.supported_languages() or "ANY" in slot_realizer.supported_languages():
-                success, components = slot_realizer.realize(slot, self._random, language)
-                if success:
-                    return components
+        # The index only contains components that support the language
+        for slot_realizer in self.realizer_index.candidates(slot.value):
+            success, components = slot_realizer.realize(slot, self._random, language)
+            if success:
+                return components
         log.debug("Unable to realize slot {} in language {} with any realizer".format(slot, language))
         return [slot]
 
@@ -82,35 +159,272 @@ class SlotRealizerComponent(ABC):
     def realize(self, slot: Slot, random: Generator, language: str) -> Tuple[bool, List[TemplateComponent]]:
         pass
 
+    def required_literals(self) -> Tuple[str, str]:
+        """
+        Returns a (prefix, infix) pair of strings s.t. this component can only realize slots whose value is a string
+        starting with `prefix` and containing `infix`. The default of ("", "") means that the component might be able
+        to realize any slot, including slots with non-string values.
+        """
+        return "", ""
+
+
+def _supporting(slot_realizers: Iterable[SlotRealizerComponent], language: str) -> List[SlotRealizerComponent]:
+    return [
+        realizer
+        for realizer in slot_realizers
+        if language in realizer.supported_languages() or "ANY" in realizer.supported_languages()
+    ]
+
+
+class SlotRealizerIndex(object):
+    """
+    Indexes SlotRealizerComponents by their required_literals(), s.t. the components that can not possibly realize a
+    slot are never tried. The prefixes are stored in a trie, which allows finding all components whose prefix matches
+    a slot value with a single walk over the start of the value.
+
+    The candidates for a slot are returned in the same order as the components were originally given in.
+    """
+
+    def __init__(self, slot_realizers: Iterable[SlotRealizerComponent]) -> None:
+        self._generic: List[Tuple[int, str, SlotRealizerComponent]] = []
+        self._trie: Dict[str, Any] = {}
+        for order, slot_realizer in enumerate(slot_realizers):
+            prefix, infix = slot_realizer.required_literals()
+            if not prefix and not infix:
+                self._generic.append((order, infix, slot_realizer))
+                continue
+            node = self._trie
+            for char in prefix:
+                node = node.setdefault(char, {})
+            node.setdefault(None, []).append((order, infix, slot_realizer))
+
+    def candidates(self, value: Any) -> List[SlotRealizerComponent]:
+        if not isinstance(value, str):
+            return [slot_realizer for (_, _, slot_realizer) in self._generic]
+
+        matches = list(self._generic)
+        node = self._trie
+        matches.extend(node.get(None, ()))
+        for char in value:
+            node = node.get(char)
+            if node is None:
+                break
+            matches.extend(node.get(None, ()))
+
+        if len(matches) > len(self._generic):
+            matches.sort(key=lambda match: match[0])
+        return [slot_realizer for (_, infix, slot_realizer) in matches if infix in value]
+
+
+class NumberFormatter(object):
+    """
+    Formats numbers exactly like babel.numbers.format_decimal does with the default decimal format of a locale. The
+    locale and its number pattern are parsed only once, when the formatter is created.
+    """
+
+    def __init__(self, language: str) -> None:
+        self.locale = babel.Locale.parse(language)
+        self.pattern = babel.numbers.parse_pattern(self.locale.decimal_formats[None])
+
+    def format(self, value: float) -> Optional[str]:
+        """
+        Formats `value` as an integer if it has no fractional part. Otherwise, the value is rounded to two decimals
+        more than are needed for it not to round to zero, before the pattern of the locale is applied. Returns None if
+        the value would round to zero even with four decimals.
+        """
+        if int(value) == value:
+            return self._format_decimal(int(value))
 
-class NumberRealizer(SlotRealizerComponent):
-    def supported_languages(self) -> List[str]:
-        return ["ANY"]
+        for rounding in range(5):
+            if round(value, rounding) != 0:
+                return self._format_decimal(round(value, rounding + 2))
+        return None
 
-    def realize(self, slot: Slot, random: Generator, language: str) -> Tuple[bool, List[TemplateComponent]]:
-        value = slot.value
-        language = language.split("-")[0]
+    def _format_decimal(self, value: Union[int, float]) -> str:
+        return babel.numbers.format_decimal(value, format=self.pattern, locale=self.locale)
+
+
+@lru_cache(maxsize=None)
+def number_formatter(language: str) -> NumberFormatter:
+    return NumberFormatter(language)
 
-        try:
-            value = float(value)
-        except ValueError:
-            return False, []
 
-        if slot.attributes.get("abs"):
-            value = abs(value)
+# float() also accepts leading whitespace, a sign, a leading decimal point as well as "inf", "infinity" and "nan"
+_NUMBER_START_CHARACTERS = frozenset("+-.iInN")
 
-        if isinstance(value, (int, float)):
-            if int(value) == value:
-                slot.value = lambda x: babel.numbers.format_decimal(int(value), locale=language)
-                return True, [slot]
 
-            for rounding in range(5):
-                if round(value, rounding) != 0:
-                    slot.value = lambda x: babel.numbers.format_decimal(round(value, rounding + 2), locale=language)
-                    return True, [slot]
+def _parse_number(value: Any) -> Optional[float]:
+    """
+    Returns `value` as a float if float() accepts it, None otherwise. Strings that can not possibly be numbers are
+    rejected without calling float() and handling the exception.
+    """
+    if isinstance(value, str):
+        stripped = value.lstrip()
+        if not stripped or not (stripped[0].isdecimal() or stripped[0] in _NUMBER_START_CHARACTERS):
+            return None
+    try:
+        return float(value)
+    except ValueError:
+        return None
 
+
+class NumberRealizer(SlotRealizerComponent):
+    def supported_languages(self) -> List[str]:
+        return ["ANY"]
+
+    def realize(self, slot: Slot, random: Generator, language: str) -> Tuple[bool, List[TemplateComponent]]:
+        if not self.realize_batch([slot], language):
+            return False, []
         return True, [slot]
 
+    def realize_batch(self, slots: Iterable[Slot], language: str) -> int:
+        """
+        Formats the values of all the slots that contain numbers, leaving the rest untouched. Each distinct value is
+        only formatted once. Returns the number of slots that contained a number.
+        """
+        formatter = number_formatter(language.split("-")[0])
+        formatted: Dict[float, Optional[str]] = {}
+        realized = 0
+        for slot in slots:
+            value = _parse_number(slot.value)
+            if value is None:
+                continue
+            realized += 1
+
+            if slot.attributes.get("abs"):
+                value = abs(value)
+
+            if value not in formatted:
+                formatted[value] = formatter.format(value)
+            if formatted[value] is not None:
+                slot.value = formatted[value]
+        return realized
+
+
+# Characters that have a special meaning in a regex, outside of character classes
+_REGEX_SPECIAL_CHARACTERS = frozenset(".^$*+?{}[]\\|()")
+
+# Characters that make the preceding item of a regex optional or repeated
+_REGEX_QUANTIFIERS = frozenset("*+?{")
+
+# Inline flags, some of which (e.g. "i") change how literals match
+_REGEX_INLINE_FLAGS = frozenset("aiLmsux")
+
+
+def _top_level_items(regex: str) -> Optional[List[Optional[str]]]:
+    """
+    Splits `regex` into its top-level items: the literal characters it must match, and None for everything else, e.g.
+    groups, character classes, escaped character classes, anchors and quantified items. Returns None if the regex
+    has inline flags or a top-level alternation, in which case none of the items are necessarily matched as such.
+    Errs on the side of None, e.g. escaped letters and digits are never considered literal.
+    """
+    items: List[Optional[str]] = []
+    idx = 0
+    while idx < len(regex):
+        char = regex[idx]
+        if char == "|":
+            return None
+        if char == "(":
+            if regex[idx + 1 : idx + 2] == "?" and regex[idx + 2 : idx + 3] in _REGEX_INLINE_FLAGS:
+                return None
+            end = _group_end(regex, idx)
+            item = None
+        elif char == "[":
+            end = _character_class_end(regex, idx)
+            item = None
+        elif char == "\\":
+            escaped = regex[idx + 1 : idx + 2]
+            end = idx + 2
+            item = escaped if escaped and not escaped.isalnum() else None
+        else:
+            end = idx + 1
+            item = None if char in _REGEX_SPECIAL_CHARACTERS else char
+
+        if regex[end : end + 1] in _REGEX_QUANTIFIERS:
+            item = None
+            end = _quantifier_end(regex, end)
+        items.append(item)
+        idx = end
+    return items
+
+
+def _quantifier_end(regex: str, start: int) -> int:
+    """
+    The index right after the quantifier starting at `start`, including its bounds and a lazy or possessive modifier.
+    """
+    idx = start + 1
+    if regex[start] == "{":
+        closing = regex.find("}", start)
+        if closing >= 0:
+            idx = closing + 1
+    if regex[idx : idx + 1] in ("?", "+"):
+        idx += 1
+    return idx
+
+
+def _group_end(regex: str, start: int) -> int:
+    """
+    The index right after the parenthesis closing the group opened at `start`.
+    """
+    depth = 0
+    idx = start
+    while idx < len(regex):
+        char = regex[idx]
+        if char == "\\":
+            idx += 2
+            continue
+        if char == "[":
+            idx = _character_class_end(regex, idx)
+            continue
+        if char == "(":
+            depth += 1
+        elif char == ")":
+            depth -= 1
+            if depth == 0:
+                return idx + 1
+        idx += 1
+    return idx
+
+
+def _character_class_end(regex: str, start: int) -> int:
+    """
+    The index right after the bracket closing the character class opened at `start`.
+    """
+    idx = start + 1
+    # A "]" right after the opening bracket, or after a negating "^", is a member of the class
+    if regex[idx : idx + 1] == "^":
+        idx += 1
+    if regex[idx : idx + 1] == "]":
+        idx += 1
+    while idx < len(regex):
+        char = regex[idx]
+        if char == "\\":
+            idx += 2
+            continue
+        if char == "]":
+            return idx + 1
+        idx += 1
+    return idx
+
+
+def _required_literals(regex: str) -> Tuple[str, str]:
+    """
+    Finds literal strings that any string fully matching `regex` must start with and contain, respectively. The prefix
+    is the run of literal characters at the very start of the pattern. If the pattern does not start with a literal,
+    the longest run of literal characters elsewhere on the top level of the pattern is used as the infix.
+    """
+    items = _top_level_items(regex)
+    if not items:
+        return "", ""
+
+    runs = [(is_literal, "".join(run) if is_literal else "") for is_literal, run in groupby(items, key=bool)]
+    literal_runs = [text for (is_literal, text) in runs if is_literal]
+    if not literal_runs:
+        return "", ""
+    if runs[0][0]:
+        return runs[0][1], ""
+    return "", max(literal_runs, key=len)
+
 
 class RegexRealizer(SlotRealizerComponent):
     def __init__(
@@ -127,27 +441,27 @@ class RegexRealizer(SlotRealizerComponent):
         self.registry = registry
         self.languages = languages if isinstance(languages, list) else [languages]
         self.regex = regex
+        self.pattern = re.compile(regex)
         self.extracted_groups = extracted_groups if isinstance(extracted_groups, Iterable) else [extracted_groups]
         self.templates = [template] if isinstance(template, str) else template
         self.group_requirements = group_requirements
         self.slot_requirements = slot_requirements
         self.attach_attributes_to = attach_attributes_to if attach_attributes_to is not None else []
+        # The realizers live in the Registry for the lifetime of the service, so these are shared between requests
+        self._matches = LRUCache(REALIZATION_CACHE_SIZE)
+        self._tokens = LRUCache(REALIZATION_CACHE_SIZE)
 
     def supported_languages(self) -> List[str]:
         return self.languages
 
-    def realize(self, slot: Slot, random: Generator, language: str) -> Tuple[bool, List[TemplateComponent]]:
-        # We can only parse the slot contents with a regex if the slot contents are a string
-        if not isinstance(slot.value, str):
-            return False, []
-
-        match = re.fullmatch(self.regex, slot.value)
+    def required_literals(self) -> Tuple[str, str]:
+        return _required_literals(self.regex)
 
-        if not match:
+    def realize(self, slot: Slot, random: Generator, language: str) -> Tuple[bool, List[TemplateComponent]]:
+        groups = self.match(slot.value)
+        if groups is None:
             return False, []
 
-        groups = [match.group(i) for i in self.extracted_groups]
-
         # Check that the requirements placed on the groups are fulfilled
         if self.group_requirements is not None and not self.group_requirements(*groups):
             return False, []
@@ -156,30 +470,52 @@ class RegexRealizer(SlotRealizerComponent):
         if self.slot_requirements is not None and not self.slot_requirements(slot):
             return False, []
 
-        template = random.choice(self.templates)
-        log.info("Template: {}".format(template))
-
-        string_realization = template.format(*groups)
-        log.info("String realization: {}".format(string_realization))
-
         components = []
-        for idx, realization_token in enumerate(self.split_to_tokens(string_realization)):
-            new_slot = slot.copy(include_fact=True)
-
-            # By default, copy copies the attributes too. In case attach_attributes_to was set,
-            # we need to explicitly reset the attributes for all those slots NOT explicitly mentioned
-            if idx not in self.attach_attributes_to:
-                new_slot.attributes = {}
-
-            # An ugly hack that ensures the lambda correctly binds to the value of realization_token at this
-            # time. Without this, all the lambdas bind to the final value of the realization_token variable, ie.
-            # the final value at the end of the loop.  See https://stackoverflow.com/a/10452819
-            new_slot.value = lambda f, realization_token=realization_token: realization_token
-            components.append(new_slot)
+        for idx, realization_token in enumerate(self.realization_tokens(random, language, groups)):
+            # The attributes are only kept on the slots explicitly mentioned in attach_attributes_to, if it was set
+            attributes = slot.attributes.copy() if idx in self.attach_attributes_to else {}
+            components.append(slot.with_value(realization_token, attributes))
         log.info("Components: {}".format([str(c) for c in components]))
 
         return True, components
 
+    def match(self, value: Any) -> Optional[Tuple[str, ...]]:
+        """
+        Returns the extracted groups if `value` is a string fully matching the regex, None otherwise.
+        """
+        # We can only parse the slot contents with a regex if the slot contents are a string
+        if not isinstance(value, str):
+            return None
+
+        groups = self._matches.get(value)
+        if groups is None:
+            match = self.pattern.fullmatch(value)
+            groups = tuple(match.group(i) for i in self.extracted_groups) if match else _NO_MATCH
+            self._matches.put(value, groups)
+        return groups if groups is not _NO_MATCH else None
+
+    def realization_tokens(self, random: Generator, language: str, arguments: Tuple[str, ...]) -> Tuple[str, ...]:
+        """
+        Randomly chooses one of the templates and returns the tokens of its realization with `arguments`.
+
+        Only the index of the template is chosen randomly, the tokens are cached by the index, s.t. the random choices
+        are exactly the same regardless of whether the tokens are already cached.
+        """
+        template_idx = int(random.choice(len(self.templates)))
+        key = (language, arguments, template_idx)
+        tokens = self._tokens.get(key)
+        if tokens is None:
+            template = self.templates[template_idx]
+            log.info("Template: {}".format(template))
+
+            string_realization = template.format(*arguments)
+            log.info("String realization: {}".format(string_realization))
+
+            # Tags are parsed only once, here, instead of by each component that later consumes them
+            tokens = tuple(parse_tag(token) or token for token in self.split_to_tokens(string_realization))
+            self._tokens.put(key, tokens)
+        return tokens
+
     def split_to_tokens(self, string: str) -> List[str]:
         tokens = string.split()
         combined_tokens = []
@@ -225,17 +561,10 @@ class ListRegexRealizer(RegexRealizer):
         self.combiner = combiner
 
     def realize(self, slot: Slot, random: Generator, language: str) -> Tuple[bool, List[TemplateComponent]]:
-        # We can only parse the slot contents with a regex if the slot contents are a string
-        if not isinstance(slot.value, str):
+        groups = self.match(slot.value)
+        if groups is None:
             return False, []
 
-        match = re.fullmatch(self.regex, slot.value)
-
-        if not match:
-            return False, []
-
-        groups = [match.group(i) for i in self.extracted_groups]
-
         # Check that the requirements placed on the groups are fulfilled
         if self.group_requirements is not None and not self.group_requirements(*groups):
             return False, []
@@ -249,25 +578,10 @@ class ListRegexRealizer(RegexRealizer):
         for idx, element in enumerate(entities):
             remaining = len(entities) - idx - 1
 
-            template = random.choice(self.templates)
-            log.info("Template: {}".format(template))
-
-            string_realization = template.format(element)
-            log.info("String realization: {}".format(string_realization))
-
-            for idx, realization_token in enumerate(self.split_to_tokens(string_realization)):
-                new_slot = slot.copy(include_fact=True)
-
-                # By default, copy copies the attributes too. In case attach_attributes_to was set,
-                # we need to explicitly reset the attributes for all those slots NOT explicitly mentioned
-                if idx not in self.attach_attributes_to:
-                    new_slot.attributes = {}
-
-                # An ugly hack that ensures the lambda correctly binds to the value of realization_token at this
-                # time. Without this, all the lambdas bind to the final value of the realization_token variable, ie.
-                # the final value at the end of the loop.  See https://stackoverflow.com/a/10452819
-                new_slot.value = lambda f, realization_token=realization_token: realization_token
-                components.append(new_slot)
+            for idx, realization_token in enumerate(self.realization_tokens(random, language, (element,))):
+                # The attributes are only kept on the slots explicitly mentioned in attach_attributes_to, if it was set
+                attributes = slot.attributes.copy() if idx in self.attach_attributes_to else {}
+                components.append(slot.with_value(realization_token, attributes))
 
                 if remaining > 1:
                     components.append(Literal(","))
@@ -1,15 +1,33 @@
 import logging
 import re
-from typing import Tuple
+from typing import Dict, Hashable, List, Match, Tuple
 
 from numpy import random
 
 from reporter.core.models import DocumentPlanNode, Message
 from reporter.core.pipeline import NLGPipelineComponent
 from reporter.core.registry import Registry
+from reporter.core.tags import is_link
 
 log = logging.getLogger("root")
 
+# Matches, in a single pass, everything that needs normalizing in a sentence: runs of spaces, whitespace after an
+# opening parenthesis and whitespace before closing parentheses, commas, periods and colons. A run of spaces counts as a
+# single whitespace character, as it would after first collapsing it to a single space.
+_NORMALIZER = re.compile(r"(?P<open>\()(?: +|\s)|(?: +|\s)(?P<close>[),.:])| {2,}")
+
+
+def _normalize_match(match: Match) -> str:
+    return match.group("open") or match.group("close") or " "
+
+
+def normalize_sentence(sentence: str) -> str:
+    """
+    Collapses runs of spaces into single spaces and removes the (single) whitespace after "(" and before ")", ",", "."
+    and ":".
+    """
+    return _NORMALIZER.sub(_normalize_match, sentence)
+
 
 class SurfaceRealizer(NLGPipelineComponent):
     """
@@ -18,8 +36,13 @@ class SurfaceRealizer(NLGPipelineComponent):
     Assumes that the DocumentPlan corresponds to a structure wherein the root has
     some number of paragraphs as children and each paragraph in turn has some number
     of sentences as children.
+
+    Without `links`, the links in the DocumentPlan are left out of the text.
     """
 
+    def __init__(self, links: bool = True) -> None:
+        self.links = links
+
     @property
     def paragraph_start(self):
         raise NotImplementedError
@@ -48,40 +71,42 @@ class SurfaceRealizer(NLGPipelineComponent):
         """
         log.info("Realizing to text")
         sequences = [c for c in document_plan.children]
-        paragraphs, scores = zip(*[self.realize(s) for s in sequences])
-        output = ""
+        return self.combine([self.realize(s) for s in sequences])
+
+    def combine(self, realized_paragraphs: List[Tuple[str, float]]) -> Tuple[str, float]:
+        """Combines the output of `realize` for each paragraph into the output of the whole document."""
+        paragraphs, scores = zip(*realized_paragraphs)
+        output: List[str] = []
         for p in paragraphs:
-            output += self.paragraph_start + p + self.paragraph_end
-        return output, max(scores)
+            output.extend((self.paragraph_start, p, self.paragraph_end))
+        return "".join(output), max(scores)
 
     def realize(self, sequence: DocumentPlanNode) -> Tuple[str, float]:
         """Realizes a single paragraph."""
-        output = ""
+        output: List[str] = []
         for message in sequence.children:
             if not isinstance(message, Message):
                 continue
-            template = message.template
-            component_values = [str(component.value) for component in template.components]
-
-            sent = " ".join([component_value for component_value in component_values if component_value != ""]).rstrip()
-            # Temp fix: remove extra spaces occurring with braces and sometimes before commas.
-            while "  " in sent:
-                sent = sent.replace("  ", " ")
-            sent = re.sub(r"\(\s", r"(", sent)
-            sent = re.sub(r"\s\)", r")", sent)
-            sent = re.sub(r"\s,", r",", sent)
-            sent = re.sub(r"\s\.", r".", sent)
-            sent = re.sub(r"\s:", r":", sent)
-
+            sent = self.realize_sentence(message)
             if not sent:
                 if self.fail_on_empty:
                     raise Exception("Empty sentence in surface realization")
                 else:
                     continue
-            sent = sent[0].upper() + sent[1:]
-            output += self.sentence_start + sent + self.sentence_end
+            output.extend((self.sentence_start, sent, self.sentence_end))
         max_score = max(message.score for message in sequence.children if isinstance(message, Message))
-        return output, max_score
+        return "".join(output), max_score
+
+    def realize_sentence(self, message: Message) -> str:
+        """Realizes a single message as a capitalized sentence, without the sentence start and end markup."""
+        components = message.template.components
+        if not self.links:
+            components = [component for component in components if not is_link(component.value)]
+        component_values = (str(component.value) for component in components)
+        sent = normalize_sentence(" ".join([value for value in component_values if value != ""]).rstrip())
+        if not sent:
+            return sent
+        return sent[0].upper() + sent[1:]
 
 
 class HeadlineHTMLSurfaceRealizer(SurfaceRealizer):
@@ -114,3 +139,25 @@ class BodyHTMLOrderedListSurfaceRealizer(SurfaceRealizer):
     sentence_end = ".</li>"
     sentence_start = "<li>"
     fail_on_empty = False
+
+
+class MultiSurfaceRealizer(NLGPipelineComponent):
+    """
+    Realizes the same DocumentPlan as surface text with each of several SurfaceRealizers, e.g. in several formats and
+    both with and without links, s.t. the rest of the pipeline only needs to be run once.
+    """
+
+    def __init__(self, surface_realizers: Dict[Hashable, SurfaceRealizer]) -> None:
+        self.surface_realizers = surface_realizers
+
+    def run(
+        self, registry: Registry, random: random.Generator, language: str, document_plan: DocumentPlanNode
+    ) -> Tuple[Dict[Hashable, str], float]:
+        """
+        Run this pipeline component. Returns the texts keyed like the SurfaceRealizers, and the max score.
+        """
+        texts: Dict[Hashable, str] = {}
+        max_score = 0.0
+        for key, surface_realizer in self.surface_realizers.items():
+            texts[key], max_score = surface_realizer.run(registry, random, language, document_plan)
+        return texts, max_score
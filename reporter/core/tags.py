@@ -0,0 +1,88 @@
+import re
+from functools import lru_cache
+from typing import Any, Callable, Optional, Tuple
+
+# The entities recognized by the entity name resolvers: "[ENTITY:<entity_type>:<entity>]"
+ENTITY_REGEX = re.compile(r"\[ENTITY:([^:]+):([^\]]+)\]")
+
+
+class Tag(str):
+    """
+    A structured slot payload, such as a time or a named entity.
+
+    A Tag is a str whose value is the bracketed tag string "[NAME:field:field:...]" used throughout the templates and
+    the slot realizers, so it can be used anywhere such a string is expected. In addition, it carries the name and the
+    fields of the tag, s.t. the components consuming it do not need to parse the string again.
+    """
+
+    def __new__(cls, name: str, *fields: Any) -> "Tag":
+        fields = tuple(str(field) for field in fields)
+        tag = super().__new__(cls, "[{}]".format(":".join((name,) + fields)))
+        tag.name = name
+        tag.fields = fields
+        return tag
+
+    def __reduce__(self) -> Tuple[Callable[[Any], Optional["Tag"]], Tuple[str]]:
+        return parse_tag, (str(self),)
+
+
+class TimeTag(Tag):
+    def __new__(cls, timestamp_type: str, timestamp_from: Any, timestamp_to: Any) -> "TimeTag":
+        return super().__new__(cls, "TIME", timestamp_type, timestamp_from, timestamp_to)
+
+    @property
+    def timestamp_type(self) -> str:
+        return self.fields[0]
+
+    @property
+    def timestamp_from(self) -> str:
+        return self.fields[1]
+
+    @property
+    def timestamp_to(self) -> str:
+        return self.fields[2]
+
+
+class EntityTag(Tag):
+    def __new__(cls, entity_type: str, entity: Any) -> "EntityTag":
+        return super().__new__(cls, "ENTITY", entity_type, entity)
+
+    @property
+    def entity_type(self) -> str:
+        return self.fields[0]
+
+    @property
+    def entity(self) -> str:
+        return self.fields[1]
+
+
+def parse_tag(value: Any) -> Optional[Tag]:
+    """
+    Returns `value` as a Tag, or None if it is not a tag. Tags given as plain strings are parsed, which produces a
+    TimeTag or an EntityTag if the string is a well-formed time or entity, respectively, and a plain Tag otherwise.
+    """
+    if isinstance(value, Tag):
+        return value
+    if not isinstance(value, str) or len(value) < 2 or value[0] != "[" or value[-1] != "]":
+        return None
+    return _parse_tag_string(str(value))
+
+
+def is_link(value: Any) -> bool:
+    """
+    Whether `value` is a link, i.e. "[LINK:<analysis id>]" or "[LINK:ARTICLE:<article id>]".
+    """
+    tag = parse_tag(value)
+    return tag is not None and tag.name == "LINK"
+
+
+@lru_cache(maxsize=4096)
+def _parse_tag_string(value: str) -> Tag:
+    name, *fields = value[1:-1].split(":")
+    if name == "ENTITY":
+        match = ENTITY_REGEX.fullmatch(value)
+        if match:
+            return EntityTag(*match.groups())
+    elif name == "TIME" and len(fields) == 3:
+        return TimeTag(*fields)
+    return Tag(name, *fields)
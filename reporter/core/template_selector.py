@@ -7,6 +7,7 @@ from numpy.random import Generator
 from reporter.core.models import DefaultTemplate, DocumentPlanNode, Message, Template
 from reporter.core.pipeline import NLGPipelineComponent
 from reporter.core.registry import Registry
+from reporter.core.tags import is_link
 
 log = logging.getLogger("root")
 
@@ -19,8 +20,14 @@ class TemplateSelector(NLGPipelineComponent):
     """
     Adds a matching Template to each Message in the DocumentPlan.
 
+    Without `links`, the slots holding links are realized as empty as soon as the templates are filled. The slots are
+    kept, as their facts still tell apart the messages of different analyses when aggregating, but they are never
+    realized any further nor shown.
     """
 
+    def __init__(self, links: bool = True) -> None:
+        self.links = links
+
     def run(
         self,
         registry: Registry,
@@ -67,6 +74,8 @@ class TemplateSelector(NLGPipelineComponent):
                     random.shuffle(templates)
                     template = templates[0]
                     self._add_template_to_message(child, template, all_messages)
+                    if not self.links:
+                        self._remove_links(child.template)
             else:
                 # This child is NOT a message and we should just recurse
                 self._recurse(random, language, child, all_messages, template_checker)
@@ -95,6 +104,12 @@ class TemplateSelector(NLGPipelineComponent):
         message.template = template
         message.facts = used_facts
 
+    @staticmethod
+    def _remove_links(template: Template) -> None:
+        for slot in template.slots:
+            if slot.slot_type == "analysis_id" and is_link(slot.value):
+                slot.value = ""
+
 
 class TemplateMessageChecker(object):
     """
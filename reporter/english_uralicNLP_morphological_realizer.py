@@ -3,38 +3,33 @@ from typing import Dict, Optional
 
 from uralicNLP import uralicApi
 
-from reporter.core.models import Slot
-from reporter.core.morphological_realizer import LanguageSpecificMorphologicalRealizer
+from reporter.core.morphological_realizer import CachedMorphologicalRealizer, MorphologyCache, MorphologyWorker
 
 log = logging.getLogger("root")
 
 
-class EnglishUralicNLPMorphologicalRealizer(LanguageSpecificMorphologicalRealizer):
-    def __init__(self):
-        super().__init__("fi")
+class EnglishUralicNLPMorphologicalRealizer(CachedMorphologicalRealizer):
+    warm_up_words = (("cat", "GEN"),)
 
-        self.case_map: Dict[str, str] = {"genitive": "GEN"}
+    def __init__(self, cache: Optional[MorphologyCache] = None, worker: Optional[MorphologyWorker] = None):
+        super().__init__("en", cache, worker)
 
-    def realize(self, slot: Slot) -> str:
-        case: Optional[str] = slot.attributes.get("case")
-        if case is None:
-            return slot.value
+        self.case_map: Dict[str, str] = {"genitive": "GEN"}
 
-        log.debug("Realizing {} to Finnish")
+    def normalize_case(self, case: str) -> str:
+        return self.case_map.get(case.lower(), case.upper())
 
-        case = self.case_map.get(case.lower(), case.upper())
-        log.debug("Normalized case {} to {}".format(slot.attributes.get("case"), case))
+    def inflect(self, word: str, case: str) -> str:
+        log.debug("Realizing {} to English".format(word))
 
-        possible_analyses = uralicApi.analyze(slot.value, "eng")
+        possible_analyses = uralicApi.analyze(word, "eng")
         log.debug("Identified {} possible analyses".format(len(possible_analyses)))
         if len(possible_analyses) == 0:
-            log.warning(
-                "No valid morphological analysis for {}, unable to realize despite case attribute".format(slot.value)
-            )
-            return slot.value
+            log.warning("No valid morphological analysis for {}, unable to realize despite case attribute".format(word))
+            return word
 
         analysis = possible_analyses[0][0]
-        log.debug("Picked {} as the morphological analysis of {}".format(analysis, slot.value))
+        log.debug("Picked {} as the morphological analysis of {}".format(analysis, word))
 
         analysis = "{}+{}".format(analysis, case)
         log.debug("Modified analysis to {}".format(analysis))
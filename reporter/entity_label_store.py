@@ -0,0 +1,113 @@
+"""
+A persistent store of entity labels, shared between restarts and worker processes.
+
+Labels can be imported in bulk from a dump of the Solr collection, with one JSON document per line, each having an
+"id" and any number of "label_<language>_ssi" fields:
+
+ $ python -m reporter.entity_label_store STORE DUMP [DUMP ...]
+"""
+import argparse
+import json
+import logging
+import os
+import re
+import sqlite3
+from threading import Lock
+from typing import Dict, Iterable, Iterator, List, Tuple
+
+log = logging.getLogger("root")
+
+# Maximum number of entities looked up with a single SQL query, well below SQLite's limit on query parameters
+_LOOKUP_BATCH_SIZE = 500
+
+_LABEL_FIELD = re.compile(r"label_([a-z]+)_ssi")
+
+
+class EntityLabelStore(object):
+    """
+    Labels of entities, keyed by (language, entity id), in an SQLite database. The database is opened in WAL mode, s.t.
+    several processes can read it while one of them is writing.
+    """
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._connection = sqlite3.connect(path, check_same_thread=False, timeout=10)
+        self._lock = Lock()
+        with self._lock, self._connection:
+            self._connection.execute("PRAGMA journal_mode=WAL")
+            self._connection.execute(
+                "CREATE TABLE IF NOT EXISTS labels ("
+                "language TEXT NOT NULL, entity TEXT NOT NULL, label TEXT NOT NULL, PRIMARY KEY (language, entity)"
+                ") WITHOUT ROWID"
+            )
+
+    def get_many(self, entities: List[str], language: str) -> Dict[str, str]:
+        labels: Dict[str, str] = {}
+        with self._lock:
+            for idx in range(0, len(entities), _LOOKUP_BATCH_SIZE):
+                batch = entities[idx : idx + _LOOKUP_BATCH_SIZE]
+                rows = self._connection.execute(
+                    "SELECT entity, label FROM labels WHERE language = ? AND entity IN ({})".format(
+                        ", ".join("?" * len(batch))
+                    ),
+                    [language, *batch],
+                )
+                labels.update(rows)
+        return labels
+
+    def put_many(self, labels: Iterable[Tuple[str, str, str]]) -> int:
+        """
+        Stores the (language, entity, label) triples, replacing any previous labels. Returns the number of triples.
+        """
+        labels = list(labels)
+        if labels:
+            with self._lock, self._connection:
+                self._connection.executemany("INSERT OR REPLACE INTO labels VALUES (?, ?, ?)", labels)
+        return len(labels)
+
+    def import_dump(self, lines: Iterable[str]) -> int:
+        """
+        Imports labels from JSON lines of Solr documents. Returns the number of labels imported.
+        """
+        return self.put_many(_dump_labels(lines))
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._connection.execute("SELECT COUNT(*) FROM labels").fetchone()[0]
+
+    def close(self) -> None:
+        with self._lock:
+            self._connection.close()
+
+
+def _dump_labels(lines: Iterable[str]) -> Iterator[Tuple[str, str, str]]:
+    for line in lines:
+        if not line.strip():
+            continue
+        doc = json.loads(line)
+        for field, label in doc.items():
+            match = _LABEL_FIELD.fullmatch(field)
+            if match and label:
+                yield match.group(1), doc["id"], label
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Import entity labels from Solr dumps into an entity label store")
+    parser.add_argument("store", help="the SQLite database to import the labels to")
+    parser.add_argument("dumps", nargs="+", help="files with one Solr document per line")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+
+    store = EntityLabelStore(args.store)
+    for dump in args.dumps:
+        with open(dump) as f:
+            log.info("Imported {} labels from {}".format(store.import_dump(f), dump))
+    log.info("{} now contains {} labels".format(args.store, len(store)))
+    store.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -3,38 +3,33 @@ from typing import Dict, Optional
 
 from uralicNLP import uralicApi
 
-from reporter.core.models import Slot
-from reporter.core.morphological_realizer import LanguageSpecificMorphologicalRealizer
+from reporter.core.morphological_realizer import CachedMorphologicalRealizer, MorphologyCache, MorphologyWorker
 
 log = logging.getLogger("root")
 
 
-class FinnishUralicNLPMorphologicalRealizer(LanguageSpecificMorphologicalRealizer):
-    def __init__(self):
-        super().__init__("fi")
+class FinnishUralicNLPMorphologicalRealizer(CachedMorphologicalRealizer):
+    warm_up_words = (("kissa", "Gen"),)
 
-        self.case_map: Dict[str, str] = {"ssa": "Ine", "ssä": "Ine", "inessive": "Ine", "genitive": "Gen"}
+    def __init__(self, cache: Optional[MorphologyCache] = None, worker: Optional[MorphologyWorker] = None):
+        super().__init__("fi", cache, worker)
 
-    def realize(self, slot: Slot) -> str:
-        case: Optional[str] = slot.attributes.get("case")
-        if case is None:
-            return slot.value
+        self.case_map: Dict[str, str] = {"ssa": "Ine", "ssä": "Ine", "inessive": "Ine", "genitive": "Gen"}
 
-        log.debug("Realizing {} to Finnish")
+    def normalize_case(self, case: str) -> str:
+        return self.case_map.get(case.lower(), case.capitalize())
 
-        case = self.case_map.get(case.lower(), case.capitalize())
-        log.debug("Normalized case {} to {}".format(slot.attributes.get("case"), case))
+    def inflect(self, word: str, case: str) -> str:
+        log.debug("Realizing {} to Finnish".format(word))
 
-        possible_analyses = uralicApi.analyze(slot.value, "fin")
+        possible_analyses = uralicApi.analyze(word, "fin")
         log.debug("Identified {} possible analyses".format(len(possible_analyses)))
         if len(possible_analyses) == 0:
-            log.warning(
-                "No valid morphological analysis for {}, unable to realize despite case attribute".format(slot.value)
-            )
-            return slot.value
+            log.warning("No valid morphological analysis for {}, unable to realize despite case attribute".format(word))
+            return word
 
         analysis = possible_analyses[0][0]
-        log.debug("Picked {} as the morphological analysis of {}".format(analysis, slot.value))
+        log.debug("Picked {} as the morphological analysis of {}".format(analysis, word))
 
         # We only want to replace the last occurence of "Nom", as otherwise all parts of compound words, rather than
         # only the last, get transformed to genitive. This is simply wrong for, e.g. "tyvipari". Simply doing a global
@@ -0,0 +1,130 @@
+import logging
+from collections import defaultdict
+from typing import DefaultDict, Optional, Set, Tuple, Union
+
+from numpy.random import Generator
+
+from reporter.core.entity_name_resolver import EntityNameResolver
+from reporter.core.models import DocumentPlanNode, Message, Slot
+from reporter.core.morphological_realizer import LanguageSpecificMorphologicalRealizer, MorphologicalRealizer
+from reporter.core.pipeline import NLGPipelineComponent
+from reporter.core.registry import Registry
+from reporter.core.surface_realizer import SurfaceRealizer
+from reporter.newspaper_date_resolver import DateRealizer, DateRealizerComponent
+
+log = logging.getLogger("root")
+
+
+class FusedRealizer(NLGPipelineComponent):
+    """
+    Does the work of an EntityNameResolver, a DateRealizer, a MorphologicalRealizer and a SurfaceRealizer, in that
+    order, in a single in-order traversal of the DocumentPlan. Each slot is first given its entity name, then its date
+    and finally its inflection, and each paragraph is realized as text as soon as all of its slots have been visited.
+
+    The previously mentioned entities and the previous date are tracked exactly as by the separate components. The
+    random choices of the entity names and the dates are made in document order, rather than first all the entity
+    names and then all the dates. The output is thus identical to that of the separate components as long as the
+    entity names are not chosen randomly, which none of the newspaper entity name resolvers do.
+
+    Without a SurfaceRealizer, only the slots are realized and the DocumentPlan is output as is, e.g. for a
+    MultiSurfaceRealizer to realize as text.
+    """
+
+    def __init__(
+        self,
+        entity_name_resolver: EntityNameResolver,
+        date_realizer: DateRealizer,
+        morphological_realizer: MorphologicalRealizer,
+        surface_realizer: Optional[SurfaceRealizer],
+    ) -> None:
+        self.entity_name_resolver = entity_name_resolver
+        self.date_realizer = date_realizer
+        self.morphological_realizer = morphological_realizer
+        self.surface_realizer = surface_realizer
+
+    def run(
+        self, registry: Registry, random: Generator, language: str, document_plan: DocumentPlanNode
+    ) -> Union[Tuple[str, float], Tuple[DocumentPlanNode]]:
+        """
+        Run this pipeline component.
+        """
+        log.info("Realizing entities, dates, morphology and text")
+
+        if language.endswith("-head"):
+            language = language[:-5]
+            log.debug("Language had suffix '-head', removing. Result: {}".format(language))
+
+        morphology = self.morphological_realizer.language_realizers.get(language)
+        if morphology is None:
+            log.warning("No morphological realizer for language {}".format(language))
+
+        visitor = _SlotVisitor(
+            registry, random, language, self.entity_name_resolver, self.date_realizer.components[language], morphology
+        )
+        if self.surface_realizer is None:
+            for paragraph in document_plan.children:
+                visitor.visit(paragraph)
+            return (document_plan,)
+
+        realized_paragraphs = []
+        for paragraph in document_plan.children:
+            visitor.visit(paragraph)
+            realized_paragraphs.append(self.surface_realizer.realize(paragraph))
+        return self.surface_realizer.combine(realized_paragraphs)
+
+
+class _SlotVisitor(object):
+    """
+    The state shared by all the slots of a single document: the entities encountered so far, the previous entity of
+    each type and the previous date.
+    """
+
+    def __init__(
+        self,
+        registry: Registry,
+        random: Generator,
+        language: str,
+        entity_name_resolver: EntityNameResolver,
+        date_realizer: DateRealizerComponent,
+        morphology: Optional[LanguageSpecificMorphologicalRealizer],
+    ) -> None:
+        self.registry = registry
+        self.random = random
+        self.language = language
+        self.entity_name_resolver = entity_name_resolver
+        self.date_realizer = date_realizer
+        self.morphology = morphology
+
+        self.previous_entities: DefaultDict[str, None] = defaultdict(lambda: None)
+        self.encountered: Set[str] = set()
+        self.previous_date: Optional[str] = None
+
+    def visit(self, this: DocumentPlanNode) -> None:
+        if not isinstance(this, Message):
+            for child in this.children:
+                self.visit(child)
+            return
+
+        components = this.children
+        idx = 0
+        while idx < len(components):
+            component = components[idx]
+            if not isinstance(component, Slot):
+                idx += 1
+                continue
+
+            self.entity_name_resolver.resolve_slot(
+                self.registry, self.random, self.language, component, self.previous_entities, self.encountered
+            )
+
+            new_components = self.date_realizer.realize_slot(self.random, component, self.previous_date)
+            if new_components is None:
+                new_components = [component]
+            else:
+                self.previous_date = component.value
+                components[idx : idx + 1] = new_components
+
+            if self.morphology is not None:
+                for slot in new_components:
+                    slot.value = self.morphology.realize(slot)
+            idx += len(new_components)
@@ -0,0 +1,141 @@
+"""
+Builds the precomputed inflection table used by the morphological realizers.
+
+The table contains the case forms of the closed vocabularies the Reporter knows about ahead of time: the language
+names, the words of the slot realizer templates that inflected attributes are attached to, and the names of the
+newspapers seen in the facet results of previously logged payloads. The morphological realizers then only need to call
+the FSTs for open vocabulary values. Rebuild the table whenever the templates or the vocabularies change with
+
+ $ python -m reporter.inflection_table [PAYLOAD_FILE ...]
+"""
+import argparse
+import gzip
+import json
+import logging
+import os
+import pickle
+from collections import defaultdict
+from typing import DefaultDict, Dict, Iterable, List, Set
+
+from reporter.core.models import Slot, Template
+from reporter.core.morphological_realizer import CachedMorphologicalRealizer, MorphologyKey
+from reporter.core.realize_slots import RegexRealizer, SlotRealizerComponent
+from reporter.core.tags import parse_tag
+from reporter.newspaper_named_entity_resolver import MultilingualNewspaperNameResolver
+from reporter.resources import language_name_resource
+
+log = logging.getLogger("root")
+
+INFLECTION_TABLE_PATH = os.path.abspath(os.path.join(os.path.dirname(__file__), "../data/inflections.cache"))
+
+LANGUAGE_NAMES: Dict[str, Dict[str, str]] = {
+    "en": language_name_resource.ENGLISH,
+    "fi": language_name_resource.FINNISH,
+    "de": language_name_resource.GERMAN,
+    "fr": language_name_resource.FRENCH,
+}
+
+
+def load_inflection_table(path: str = INFLECTION_TABLE_PATH) -> Dict[MorphologyKey, str]:
+    if not os.path.exists(path):
+        log.info("No inflection table at {}, all inflections will be computed on demand".format(path))
+        return {}
+    with gzip.open(path, "rb") as f:
+        table = pickle.load(f)
+    log.info("Loaded {} precomputed inflections from {}".format(len(table), path))
+    return table
+
+
+def template_cases(templates: Dict[str, List[Template]]) -> Dict[str, Set[str]]:
+    """
+    The case attributes used in the templates of each language. Headline templates count towards their base language.
+    """
+    cases: DefaultDict[str, Set[str]] = defaultdict(set)
+    for language, language_templates in templates.items():
+        for template in language_templates:
+            for component in template.components:
+                if isinstance(component, Slot) and component.attributes.get("case") is not None:
+                    cases[language.replace("-head", "")].add(component.attributes["case"])
+    return cases
+
+
+def realizer_vocabulary(realizers: Iterable[SlotRealizerComponent], language: str) -> Set[str]:
+    """
+    The fixed words of the templates of `realizers` that a slot's attributes, and thus its case, are attached to.
+    """
+    vocabulary: Set[str] = set()
+    for realizer in realizers:
+        if not isinstance(realizer, RegexRealizer):
+            continue
+        if language not in realizer.supported_languages() and "ANY" not in realizer.supported_languages():
+            continue
+        for template in realizer.templates:
+            tokens = realizer.split_to_tokens(template)
+            for idx in realizer.attach_attributes_to:
+                if idx < len(tokens) and "{" not in tokens[idx] and parse_tag(tokens[idx]) is None:
+                    vocabulary.add(tokens[idx])
+    return vocabulary
+
+
+def payload_newspaper_names(payload_files: Iterable[str]) -> Set[str]:
+    """
+    The (resolved) newspaper names in the ExtractFacets task results of logged payloads.
+    """
+    resolver = MultilingualNewspaperNameResolver()
+    names: Set[str] = set()
+    for payload_file in payload_files:
+        with open(payload_file) as f:
+            payload = json.load(f)
+        for task_result in payload if isinstance(payload, list) else [payload]:
+            if task_result.get("processor") != "ExtractFacets":
+                continue
+            result = task_result.get("task_result", {}).get("result", {})
+            names.update(resolver.resolve(None, name) for name in result.get("NEWSPAPER_NAME", {}))
+    return names
+
+
+def build_inflection_table(
+    realizers: Dict[str, CachedMorphologicalRealizer],
+    vocabularies: Dict[str, Set[str]],
+    cases: Dict[str, Set[str]],
+) -> Dict[MorphologyKey, str]:
+    table: Dict[MorphologyKey, str] = {}
+    for language, realizer in realizers.items():
+        normalized_cases = sorted({realizer.normalize_case(case) for case in cases.get(language, ())})
+        words = sorted(vocabularies.get(language, ()))
+        log.info("Inflecting {} words to {} cases in {}".format(len(words), len(normalized_cases), language))
+        words_and_cases = [(word, case) for word in words for case in normalized_cases]
+        for (word, case), form in zip(words_and_cases, realizer.inflect_batch(words_and_cases)):
+            table[(realizer.language, word, case)] = form
+    return table
+
+
+def main() -> None:
+    # Imported here, as the service itself loads the table built by this module
+    from reporter.newspaper_nlg_service import NewspaperNlgService
+
+    parser = argparse.ArgumentParser(description="Precompute the inflections of the Reporter's closed vocabularies")
+    parser.add_argument("payloads", nargs="*", help="logged payload files to harvest newspaper names from")
+    parser.add_argument("--output", default=INFLECTION_TABLE_PATH)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+
+    service = NewspaperNlgService()
+    realizers = service.morphological_realizer().language_realizers
+    newspaper_names = payload_newspaper_names(args.payloads)
+    vocabularies = {
+        language: set(LANGUAGE_NAMES[language].values())
+        | realizer_vocabulary(service.registry.get("slot-realizers"), language)
+        | newspaper_names
+        for language in realizers
+    }
+    table = build_inflection_table(realizers, vocabularies, template_cases(service.registry.get("templates")))
+
+    with gzip.open(args.output, "wb") as f:
+        pickle.dump(table, f)
+    log.info("Wrote {} inflections to {}".format(len(table), args.output))
+
+
+if __name__ == "__main__":
+    main()
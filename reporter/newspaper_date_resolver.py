@@ -1,28 +1,35 @@
 import logging
-import re
-from typing import Dict, List, Optional, Tuple, Union
+from types import MappingProxyType
+from typing import Dict, List, Mapping, Optional, Tuple, Union
 
 from numpy.random import Generator
 
 from reporter.core.models import DocumentPlanNode, Slot
 from reporter.core.pipeline import NLGPipelineComponent
 from reporter.core.registry import Registry
+from reporter.core.tags import TimeTag, parse_tag
 
 log = logging.getLogger("root")
 
-MONTH_PARSE_REGEX = r"\[TIME:month:(\d+)M(\d+):\d+M\d+\]"
-YEAR_PARSE_REGEX = r"\[TIME:year:(\d+):\d+\]"
-BETWEEN_YEARS_PARSE_REGEX = r"\[TIME:between_years:(\d+):(\d+)\]"
-
 
 class DateRealizer(NLGPipelineComponent):
-    def __init__(self):
-        self.components = {
-            "en": EnglishDateRealizer(),
-            "fi": FinnishDateRealizer(),
-            "de": GermanDateRealizer(),
-            "fr": FrenchDateRealizer(),
-        }
+    def __init__(self, components: Optional[Mapping[str, "DateRealizerComponent"]] = None) -> None:
+        """
+        :param components: the DateRealizerComponent of each language, as built by `build_components`. Built anew if
+            not given.
+        """
+        self.components = components if components is not None else self.build_components()
+
+    @staticmethod
+    def build_components() -> Mapping[str, "DateRealizerComponent"]:
+        return MappingProxyType(
+            {
+                "en": EnglishDateRealizer(),
+                "fi": FinnishDateRealizer(),
+                "de": GermanDateRealizer(),
+                "fr": FrenchDateRealizer(),
+            }
+        )
 
     def run(
         self, registry: Registry, random: Generator, language: str, document_plan: DocumentPlanNode
@@ -74,56 +81,14 @@ class DateRealizerComponent(NLGPipelineComponent):
         while idx < len(this.children):
             child = this.children[idx]
             if isinstance(child, Slot):
-                if not isinstance(child.value, str) or child.value[0] != "[" or child.value[-1] != "]":
-                    log.debug("Visited non-tag leaf node {}".format(child.value))
+                new_components = self.realize_slot(random, child, previous_entity)
+                if new_components is None:
                     idx += 1
                     continue
 
-                segments = child.value[1:-1].split(":")
-                if segments[0] != "TIME":
-                    log.debug("Visited non-TIME leaf node {}".format(child.value))
-                    idx += 1
-                    continue
-
-                timestamp_type = segments[1]
-                if timestamp_type == "month":
-                    new_value = self._realize_month(child, previous_entity)
-                elif timestamp_type == "year":
-                    new_value = self._realize_year(child, previous_entity)
-                elif timestamp_type == "between_years":
-                    new_value = self._realize_between_years(child, previous_entity)
-                else:
-                    log.error("Visited TIME leaf node {} but couldn't realize it!".format(child.value))
-                    idx + 1
-                    continue
-
-                if isinstance(new_value, list):
-                    new_value = random.choice(new_value)
-
-                original_value = child.value
-                new_components = []
-                for component_idx, realization_token in enumerate(new_value.split()):
-                    new_slot = child.copy(include_fact=True)
-
-                    # By default, copy copies the attributes too. In case attach_attributes_to was set,
-                    # we need to explicitly reset the attributes for all those slots NOT explicitly mentioned
-                    if (
-                        self.attach_attributes
-                        and timestamp_type in self.attach_attributes
-                        and component_idx not in self.attach_attributes[timestamp_type]
-                    ):
-                        new_slot.attributes = {}
-
-                    # An ugly hack that ensures the lambda correctly binds to the value of realization_token at this
-                    # time. Without this, all the lambdas bind to the final value of the realization_token variable, ie.
-                    # the final value at the end of the loop.  See https://stackoverflow.com/a/10452819
-                    new_slot.value = lambda f, realization_token=realization_token: realization_token
-                    new_components.append(new_slot)
-
                 this.children[idx : idx + 1] = new_components
                 idx += len(new_components)
-                log.debug("Visited TIME leaf node {} and realized it as {}".format(original_value, new_value))
-                previous_entity = original_value
+                previous_entity = child.value
             elif isinstance(child, DocumentPlanNode):
                 log.debug("Visiting non-leaf '{}'".format(child))
                 previous_entity = self._recurse(registry, random, language, child, previous_entity)
@@ -133,39 +98,80 @@ class DateRealizerComponent(NLGPipelineComponent):
                 idx += 1
         return previous_entity
 
-    def _realize_month(self, this: Slot, previous: Optional[str]) -> Union[str, List[str]]:
+    def realize_slot(self, random: Generator, slot: Slot, previous_entity: Optional[str]) -> Optional[List[Slot]]:
+        """
+        Realizes the date in `slot`, given the previously realized date. Returns the slots that should replace `slot`,
+        or None if `slot` does not contain a date that can be realized. The slot itself is not modified.
+        """
+        tag = parse_tag(slot.value)
+        if tag is None:
+            log.debug("Visited non-tag leaf node {}".format(slot.value))
+            return None
+
+        if not isinstance(tag, TimeTag):
+            log.debug("Visited non-TIME leaf node {}".format(slot.value))
+            return None
+
+        timestamp_type = tag.timestamp_type
+        if timestamp_type == "month":
+            new_value = self._realize_month(tag, previous_entity)
+        elif timestamp_type == "year":
+            new_value = self._realize_year(tag, previous_entity)
+        elif timestamp_type == "between_years":
+            new_value = self._realize_between_years(tag, previous_entity)
+        else:
+            log.error("Visited TIME leaf node {} but couldn't realize it!".format(slot.value))
+            return None
+
+        if isinstance(new_value, list):
+            new_value = random.choice(new_value)
+
+        new_components = []
+        for component_idx, realization_token in enumerate(new_value.split()):
+            # By default, the attributes are copied over. In case attach_attributes_to was set,
+            # we need to explicitly reset the attributes for all those slots NOT explicitly mentioned
+            if (
+                self.attach_attributes
+                and timestamp_type in self.attach_attributes
+                and component_idx not in self.attach_attributes[timestamp_type]
+            ):
+                attributes = {}
+            else:
+                attributes = slot.attributes.copy()
+            new_components.append(slot.with_value(realization_token, attributes))
+
+        log.debug("Visited TIME leaf node {} and realized it as {}".format(slot.value, new_value))
+        return new_components
+
+    def _realize_month(self, this: TimeTag, previous: Optional[str]) -> Union[str, List[str]]:
+        this_year, this_month = this.timestamp_from.split("M")
         if previous is None:
-            this_year, this_month = re.match(MONTH_PARSE_REGEX, this.value).groups()
             return self.vocab["month-year-expression"].format(month=self.vocab["month"][this_month], year=this_year)
 
-        if this.value == previous:
+        if this == previous:
             return self.vocab["month"]["reference_options"]
 
-        this_year, this_month = re.match(MONTH_PARSE_REGEX, this.value).groups()
-
         prev_year = None
-        if re.match(MONTH_PARSE_REGEX, previous):
-            prev_year = re.match(MONTH_PARSE_REGEX, previous).groups()[0]
-        elif re.match(YEAR_PARSE_REGEX, previous):
-            prev_year = re.match(YEAR_PARSE_REGEX, previous).groups()[0]
+        previous = parse_tag(previous)
+        if isinstance(previous, TimeTag) and previous.timestamp_type == "month":
+            prev_year = previous.timestamp_from.split("M")[0]
+        elif isinstance(previous, TimeTag) and previous.timestamp_type == "year":
+            prev_year = previous.timestamp_from
 
         if this_year == prev_year:
             return self.vocab["month-expression"].format(month=self.vocab["month"][this_month])
         else:
             return self.vocab["month-year-expression"].format(month=self.vocab["month"][this_month], year=this_year)
 
-    def _realize_year(self, this: Slot, previous: str) -> Union[str, List[str]]:
-        if previous and this.value == previous:
+    def _realize_year(self, this: TimeTag, previous: Optional[str]) -> Union[str, List[str]]:
+        if previous and this == previous:
             return self.vocab["year"]["reference_options"]
 
-        this_year = re.match(YEAR_PARSE_REGEX, this.value).groups()[0]
-
-        return self.vocab["year-expression"].format(year=this_year)
+        return self.vocab["year-expression"].format(year=this.timestamp_from)
 
-    def _realize_between_years(self, this: Slot, previous: str) -> Union[str, List[str]]:
-        (from_year, to_year) = re.match(BETWEEN_YEARS_PARSE_REGEX, this.value).groups()
-        from_year = self.vocab["year-expression"].format(year=from_year)
-        to_year = self.vocab["year-expression"].format(year=to_year)
+    def _realize_between_years(self, this: TimeTag, previous: Optional[str]) -> Union[str, List[str]]:
+        from_year = self.vocab["year-expression"].format(year=this.timestamp_from)
+        to_year = self.vocab["year-expression"].format(year=this.timestamp_to)
         return self.vocab["between-expression"].format(start=from_year, end=to_year)
 
 
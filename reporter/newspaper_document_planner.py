@@ -1,7 +1,10 @@
 import logging
-from typing import List, Optional, Tuple
+from functools import lru_cache
+from typing import Dict, List, Optional, Set, Tuple
 
-from reporter.core.document_planner import BodyDocumentPlanner, HeadlineDocumentPlanner
+import numpy as np
+
+from reporter.core.document_planner import BodyDocumentPlanner, HeadlineDocumentPlanner, MessagePool
 from reporter.core.models import Message
 
 log = logging.getLogger("root")
@@ -21,27 +24,97 @@ class NewspaperBodyDocumentPlanner(BodyDocumentPlanner):
     def __init__(self) -> None:
         super().__init__(new_paragraph_absolute_threshold=NEW_PARAGRAPH_ABSOLUTE_THRESHOLD)
 
+    def message_pool(self, scored_messages: List[Message]) -> "NewspaperMessagePool":
+        return NewspaperMessagePool(scored_messages)
+
     def select_next_nucleus(
-        self, available_message: List[Message], selected_nuclei: List[Message]
-    ) -> Tuple[Message, float]:
-        return _select_next_nucleus(available_message, selected_nuclei)
+        self, available_messages: "NewspaperMessagePool", selected_nuclei: List[Message]
+    ) -> Tuple[Optional[Message], float]:
+        return _select_next_nucleus(available_messages, selected_nuclei)
 
     def new_paragraph_relative_threshold(self, selected_nuclei: List[Message]) -> float:
         return _new_paragraph_relative_threshold(selected_nuclei)
 
-    def select_satellites_for_nucleus(self, nucleus: Message, available_messages: List[Message]) -> List[Message]:
+    def select_satellites_for_nucleus(
+        self, nucleus: Message, available_messages: "NewspaperMessagePool"
+    ) -> List[Message]:
         return _select_satellites_for_nucleus(nucleus, available_messages)
 
 
 class NewspaperHeadlineDocumentPlanner(HeadlineDocumentPlanner):
+    def message_pool(self, scored_messages: List[Message]) -> "NewspaperMessagePool":
+        return NewspaperMessagePool(scored_messages)
+
     def select_next_nucleus(
-        self, available_message: List[Message], selected_nuclei: List[Message]
-    ) -> Tuple[Message, float]:
-        return _select_next_nucleus(available_message, selected_nuclei)
+        self, available_messages: "NewspaperMessagePool", selected_nuclei: List[Message]
+    ) -> Tuple[Optional[Message], float]:
+        return _select_next_nucleus(available_messages, selected_nuclei)
+
+
+@lru_cache(maxsize=4096)
+def _analysis_fragments(analysis_type: str) -> Tuple[str, ...]:
+    return tuple(analysis_type.split(":"))
+
+
+class NewspaperMessagePool(MessagePool):
+    """
+    A MessagePool that also knows the analysis_type fragments of each message and the analysis family (the first
+    fragment) each message belongs to. The messages are sorted by score only once, when the pool is created, and the
+    sort order is then maintained per analysis family as messages are removed from the pool.
+
+    `positions` are the positions of the messages in the list of available messages the planner used to sort in place
+    when relaxing its criteria for nuclei, and are used to break ties between satellites: the indices of the messages
+    until `sort_by_score` is called, and their ranks by score after that.
+    """
+
+    def __init__(self, messages: List[Message]) -> None:
+        super().__init__(messages)
+        self.fragments = [_analysis_fragments(message.main_fact.analysis_type) for message in messages]
+        families, family_codes = np.unique([fragments[0] for fragments in self.fragments], return_inverse=True)
+        self.families: List[str] = families.tolist()
+        self.family_codes: np.ndarray = family_codes.reshape(-1).astype(np.intp)
+        self._family_code_map: Dict[str, int] = {family: code for (code, family) in enumerate(self.families)}
+
+        # Messages by descending score, ties broken by position, exactly like a stable sort of the message list
+        order = np.argsort(-self.scores, kind="stable")
+        self._rank = np.empty(len(messages), dtype=np.intp)
+        self._rank[order] = np.arange(len(messages))
+        self._family_orders: List[np.ndarray] = [
+            order[self.family_codes[order] == code] for code in range(len(self.families))
+        ]
+        # Position, within each family's order, of the first message that might still be available
+        self._family_heads: List[int] = [0] * len(self.families)
+        self.positions: np.ndarray = np.arange(len(messages))
+
+    def sort_by_score(self) -> None:
+        self.positions = self._rank
+
+    def family_code(self, family: str) -> Optional[int]:
+        return self._family_code_map.get(family)
+
+    def best_available(self, excluded_families: Set[int]) -> Optional[int]:
+        """
+        The index of the highest scoring available message that does not belong to any of the excluded families, or
+        None if there is no such message. Ties are broken by position.
+        """
+        best: Optional[int] = None
+        for code, family_order in enumerate(self._family_orders):
+            if code in excluded_families:
+                continue
+            head = self._family_heads[code]
+            while head < len(family_order) and not self.available[family_order[head]]:
+                head += 1
+            # Messages never become available again, so we can permanently skip the ones we just stepped over
+            self._family_heads[code] = head
+            if head < len(family_order):
+                idx = int(family_order[head])
+                if best is None or self._rank[idx] < self._rank[best]:
+                    best = idx
+        return best
 
 
 def _select_next_nucleus(
-    available_messages: List[Message], selected_nuclei: List[Message]
+    available_messages: NewspaperMessagePool, selected_nuclei: List[Message]
 ) -> Tuple[Optional[Message], float]:
 
     log.debug("Starting a new paragraph")
@@ -50,42 +123,34 @@ def _select_next_nucleus(
         log.debug("MAX_PARAGPAPHS reached, stopping")
         return None, 0
 
-    selected_analyses = [nucleus.main_fact.analysis_type.split(":")[0] for nucleus in selected_nuclei]
+    selected_analyses = [_analysis_fragments(nucleus.main_fact.analysis_type)[0] for nucleus in selected_nuclei]
     log.debug("Already talked about {}".format(selected_analyses))
 
-    available = [
-        message
-        for message in available_messages
-        if message.main_fact.analysis_type.split(":")[0] not in selected_analyses
-    ]
-
-    if available:
-        # There are still analysis results we have not discussed, we'll select from among those only by leaving
-        # `available` as-is.
-        log.debug(
-            "{}/{} messages talk about a different analysis, considering those for nucleus".format(
-                len(available), len(available_messages)
-            )
-        )
-        pass
-    elif not available and len(selected_analyses) > 1:
+    selected_families = {available_messages.family_code(analysis) for analysis in selected_analyses}
+    next_nucleus_idx = available_messages.best_available(selected_families)
+
+    if next_nucleus_idx is not None:
+        # There are still analysis results we have not discussed, we'll select from among those only.
+        log.debug("Some messages talk about a different analysis, considering those for nucleus")
+    elif len(selected_analyses) > 1:
         # There are no unselected analyses, but we have already mentioned more than one. This means that this is an
         # overview-type document and we are done.
         log.debug("At least two analysis types already covered, no more available, stopping early")
         return None, 0
-    elif not available and len(selected_analyses) == 1:
+    elif len(selected_analyses) == 1:
         # To get here, selected_analysis must be 1 (<= 0 makes no sense)
         # We have only ever seen one analysis type. This means that we're building a document of the indepth-type,
         # meaning that we should relax our criteria for thematic difference between the nuclei.
         log.debug("No new analysis types to cover, but only one covered so far. Relaxing criteria.")
-        available = available_messages
+        next_nucleus_idx = available_messages.best_available(set())
+        # The available messages stay in this order for the rest of the document
+        available_messages.sort_by_score()
 
-    if not available:
+    if next_nucleus_idx is None:
         # TODO: This seems to occur at least in some edge cases. Needs to be determined whether it's supposed to or not.
         return None, 0
 
-    available.sort(key=lambda message: message.score, reverse=True)
-    next_nucleus = available[0]
+    next_nucleus = available_messages.messages[next_nucleus_idx]
     log.debug(
         "Most interesting thing is {} (int={}), selecting it as a nucleus".format(next_nucleus, next_nucleus.score)
     )
@@ -106,38 +171,59 @@ def _new_paragraph_relative_threshold(selected_nuclei: List[Message]) -> float:
     return 0.3 * selected_nuclei[0].score
 
 
-def _select_satellites_for_nucleus(nucleus: Message, available_messages: List[Message]) -> List[Message]:
-    log.debug("Selecting satellites for {} from among {} options".format(nucleus, len(available_messages)))
+def _select_satellites_for_nucleus(nucleus: Message, available_messages: NewspaperMessagePool) -> List[Message]:
+    candidates = _SatelliteCandidates(available_messages)
+    log.debug("Selecting satellites for {} from among {} options".format(nucleus, len(candidates)))
     satellites: List[Message] = []
-    available_messages = available_messages[:]  # Copy, s.t. we can modify in place
+
+    nucleus_fragments = _analysis_fragments(nucleus.main_fact.analysis_type)
+    relative_threshold = SATELLITE_RELATIVE_THRESHOLD * nucleus.score
+    positions = available_messages.positions
+
+    def passes_threshold(score: float) -> bool:
+        return score > relative_threshold or score > SATELLITE_ABSOLUTE_THRESHOLD
 
     previous = nucleus
     while True:
+        previous_fragments = _analysis_fragments(previous.main_fact.analysis_type)
+
+        # Modify scores to account for context. A candidate is weighed by the length of the analysis_type prefix it
+        # shares with both the previous message and the nucleus, so only candidates of the same analysis family as
+        # both of them can end up with a non-zero score. Everything else scores exactly zero and only matters through
+        # its position in the list of candidates, which is used to break ties.
+        if previous_fragments[0] == nucleus_fragments[0]:
+            family = previous_fragments[0]
+            scored = [
+                (
+                    candidates.contextual_score(idx, previous, previous_fragments, nucleus_fragments),
+                    -positions[idx],
+                    idx,
+                )
+                for idx in candidates.in_family(family)
+            ]
+        else:
+            family = None
+            scored = []
+        first_zero_scored = candidates.first_outside(family)
 
-        # Modify scores to account for context
-        scored_available = [(message.score, message) for message in available_messages if message.score > 0]
-        scored_available = _weigh_by_analysis_similarity(scored_available, previous)
-        scored_available = _weigh_by_analysis_similarity(scored_available, nucleus)
-        scored_available = _weigh_by_context_similarity(scored_available, previous)
-
-        # Filter out based on thresholds
-        filtered_scored_available = [
-            (score, message)
-            for (score, message) in scored_available
-            if score > SATELLITE_RELATIVE_THRESHOLD * nucleus.score or score > SATELLITE_ABSOLUTE_THRESHOLD
-        ]
-        log.debug("After rescoring for context, {} available satellites remain".format(len(scored_available)))
+        # Filter out based on thresholds. We look for the highest score, ties broken by the position in the list
+        filtered = [candidate for candidate in scored if passes_threshold(candidate[0])]
+        if first_zero_scored is not None and passes_threshold(0.0):
+            filtered.append((0.0, -positions[first_zero_scored], first_zero_scored))
+        log.debug("After rescoring for context, {} available satellites remain".format(len(candidates)))
 
-        if not filtered_scored_available:
+        if not filtered:
             if len(satellites) >= MIN_SATELLITES_PER_NUCLEUS:
                 log.debug("Done with satellites: MIN_SATELLITES_PER_NUCLEUS reached, no satellites pass filter.")
                 return satellites
-            elif scored_available:
+            elif len(candidates):
                 log.debug(
                     "No satellite candidates pass threshold but have not reached MIN_SATELLITES_PER_NUCLEUS. "
                     "Trying without filter."
                 )
-                filtered_scored_available = scored_available
+                filtered = list(scored)
+                if first_zero_scored is not None:
+                    filtered.append((0.0, -positions[first_zero_scored], first_zero_scored))
             else:
                 log.debug("Did not reach MIN_SATELLITES_PER_NUCLEUS, but ran out of candidates. Ending paragraphs.")
                 return satellites
@@ -146,19 +232,15 @@ def _select_satellites_for_nucleus(nucleus: Message, available_messages: List[Me
             log.debug("Stopping due to having reaches MAX_SATELLITE_PER_NUCLEUS")
             return satellites
 
-        filtered_scored_available.sort(key=lambda pair: pair[0], reverse=True)
-
-        score, selected_satellite = filtered_scored_available[0]
+        score, _, idx = max(filtered)
+        selected_satellite = candidates.pop(idx)
         satellites.append(selected_satellite)
         log.debug("Added satellite {} (temp_score={})".format(selected_satellite, score))
 
         previous = selected_satellite
-        available_messages = [message for message in available_messages if message != selected_satellite]
 
 
-def _shared_prefix_length(candidate: Message, context: Message) -> int:
-    candidate_fragments = candidate.main_fact.analysis_type.split(":")
-    context_fragments = context.main_fact.analysis_type.split(":")
+def _shared_prefix_length(candidate_fragments: Tuple[str, ...], context_fragments: Tuple[str, ...]) -> int:
     shared_prefix_length = 0
     for context_fragment, candidate_fragment in zip(context_fragments, candidate_fragments):
         if context_fragment == candidate_fragment:
@@ -168,37 +250,68 @@ def _shared_prefix_length(candidate: Message, context: Message) -> int:
     return shared_prefix_length
 
 
-def _fragment_count(message: Message) -> int:
-    return len(message.main_fact.analysis_type.split(":"))
-
-
-def _weigh_by_analysis_similarity(
-    messages: List[Tuple[float, Message]], previous: Message
-) -> List[Tuple[float, Message]]:
-
-    weighted: List[Tuple[float, Message]] = []
-    prev_fragment_count = _fragment_count(previous)
-    for score, message in messages:
-        weight = (2 * _shared_prefix_length(message, previous)) / (_fragment_count(message) + prev_fragment_count)
-        weighted.append((score * weight, message))
-    return weighted
-
-
-def _weigh_by_context_similarity(
-    messages: List[Tuple[float, Message]], previous: Message
-) -> List[Tuple[float, Message]]:
-    weighted: List[Tuple[float, Message]] = []
-
-    for score, message in messages:
-        if previous.main_fact.corpus == message.main_fact.corpus:
+class _SatelliteCandidates(object):
+    """
+    The positively scored messages that are still available as satellites, indexed by the analysis family of their
+    main fact. Within each family, the candidates are kept in the order of their positions in the MessagePool.
+    """
+
+    def __init__(self, pool: NewspaperMessagePool) -> None:
+        self._pool = pool
+        indices = np.flatnonzero(pool.available & (pool.scores > 0))
+        indices = indices[np.argsort(pool.positions[indices], kind="stable")]
+        codes = pool.family_codes[indices]
+        self._by_family: Dict[str, List[int]] = {
+            pool.families[code]: indices[codes == code].tolist() for code in np.unique(codes).tolist()
+        }
+        self._count = len(indices)
+
+    def __len__(self) -> int:
+        return self._count
+
+    def in_family(self, family: str) -> List[int]:
+        return self._by_family.get(family, [])
+
+    def first_outside(self, family: Optional[str]) -> Optional[int]:
+        """
+        The index of the first remaining candidate not belonging to `family`, or None if there is none.
+        """
+        heads = [indices[0] for (other, indices) in self._by_family.items() if other != family and indices]
+        return min(heads, key=self._pool.positions.__getitem__) if heads else None
+
+    def contextual_score(
+        self,
+        idx: int,
+        previous: Message,
+        previous_fragments: Tuple[str, ...],
+        nucleus_fragments: Tuple[str, ...],
+    ) -> float:
+        message = self._pool.messages[idx]
+        fragments = self._pool.fragments[idx]
+        fact = message.main_fact
+        previous_fact = previous.main_fact
+
+        # Weigh by analysis similarity, first to the previous message and then to the nucleus
+        score = message.score
+        weight = (2 * _shared_prefix_length(fragments, previous_fragments)) / (len(fragments) + len(previous_fragments))
+        score = score * weight
+        weight = (2 * _shared_prefix_length(fragments, nucleus_fragments)) / (len(fragments) + len(nucleus_fragments))
+        score = score * weight
+
+        # Weigh by context similarity to the previous message
+        if previous_fact.corpus == fact.corpus:
             score *= 1.5
-        if previous.main_fact.timestamp_from == message.main_fact.timestamp_from:
+        if previous_fact.timestamp_from == fact.timestamp_from:
             score *= 1.1
-        if previous.main_fact.timestamp_to == message.main_fact.timestamp_to:
+        if previous_fact.timestamp_to == fact.timestamp_to:
             score *= 1.1
 
-        if previous.main_fact.result_key == message.main_fact.result_key:
+        if previous_fact.result_key == fact.result_key:
             score *= 5
 
-        weighted.append((score, message))
-    return weighted
+        return score
+
+    def pop(self, idx: int) -> Message:
+        self._by_family[self._pool.fragments[idx][0]].remove(idx)
+        self._count -= 1
+        return self._pool.messages[idx]
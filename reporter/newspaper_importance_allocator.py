@@ -1,6 +1,7 @@
 import logging
-from typing import List, Tuple
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
 
+import numpy as np
 from numpy.random import Generator
 
 from reporter.core.models import Message
@@ -8,23 +9,134 @@ from reporter.core.pipeline import NLGPipelineComponent, Registry
 
 log = logging.getLogger("root")
 
+# A ScoreFunction maps the current scores of a batch of messages, together with the batch's feature columns, to new
+# scores. Both the input and the output scores are 1-D float arrays with one element per message.
+ScoreFunction = Callable[[np.ndarray, Dict[str, np.ndarray]], np.ndarray]
+
+# A FeatureExtractor computes the value of a numeric feature column for a single message
+FeatureExtractor = Callable[[Message], float]
+
+
+def per_analysis_coefficients(coefficients: Dict[str, float], default: float = 1.0) -> ScoreFunction:
+    """
+    Scales the scores by a coefficient determined by the analysis family of each message, i.e. the part of the
+    analysis_type preceding the first ":" (e.g. "ExtractWords").
+    """
+
+    def score(scores: np.ndarray, features: Dict[str, np.ndarray]) -> np.ndarray:
+        families, inverse = np.unique(features["analysis_family"], return_inverse=True)
+        weights = np.array([coefficients.get(family, default) for family in families], dtype=float)
+        return scores * weights[inverse.reshape(-1)]
+
+    return score
+
+
+def exponential_decay(column: str, rate: float) -> ScoreFunction:
+    """
+    Scales the scores by exp(-rate * x), where x is the value of the feature column `column` for each message. The
+    column must be produced by one of the selector's `feature_extractors`.
+    """
+
+    def score(scores: np.ndarray, features: Dict[str, np.ndarray]) -> np.ndarray:
+        return scores * np.exp(-rate * features[column])
+
+    return score
+
+
+def importance_coefficients() -> ScoreFunction:
+    """
+    Scales the scores by the importance_coefficient of each message.
+    """
+
+    def score(scores: np.ndarray, features: Dict[str, np.ndarray]) -> np.ndarray:
+        return scores * features["importance_coefficient"]
+
+    return score
+
+
+def rank(scores: np.ndarray, top_n: Optional[int] = None) -> np.ndarray:
+    """
+    Returns the indices of `scores` in descending order of score. Ties are broken by the original position, exactly
+    like a stable sort would do. If `top_n` is given, only the indices of the `top_n` highest scores are computed,
+    which only requires a linear time partition of the whole array and a sort of the selected head.
+    """
+    negated = -np.asarray(scores, dtype=float)
+    if top_n is None or top_n >= len(negated):
+        return np.argsort(negated, kind="stable")
+    if top_n <= 0:
+        return np.empty(0, dtype=np.intp)
+
+    # The partition gives an arbitrary subset of any values tied at the boundary, so we only use it to find the
+    # boundary value and then pick up all the values at least as good, in their original order.
+    boundary = negated[np.argpartition(negated, top_n - 1)[:top_n]].max()
+    candidates = np.flatnonzero(negated <= boundary)
+    return candidates[np.argsort(negated[candidates], kind="stable")][:top_n]
+
 
 class NewspaperImportanceSelector(NLGPipelineComponent):
+    def __init__(
+        self,
+        score_functions: Iterable[ScoreFunction] = (),
+        top_n: Optional[int] = None,
+        feature_extractors: Optional[Dict[str, FeatureExtractor]] = None,
+    ) -> None:
+        """
+        :param score_functions: applied in order on top of the outlierness of the messages' main facts
+        :param top_n: if set, only the `top_n` most important messages are passed on. By default all messages are
+            passed on, as the document planner may pick low-scoring messages as satellites or nuclei for analyses that
+            have not yet been discussed, and the template selector uses all messages to fill secondary template rules.
+        :param feature_extractors: additional feature columns for the score functions, keyed by column name, next to
+            the built-in "analysis_family" and "importance_coefficient" columns
+        """
+        self.score_functions: Tuple[ScoreFunction, ...] = tuple(score_functions)
+        self.top_n = top_n
+        self.feature_extractors: Dict[str, FeatureExtractor] = dict(feature_extractors or {})
+
     def run(
         self, registry: Registry, random: Generator, language: str, messages: List[Message]
     ) -> Tuple[List[Message]]:
         """
         Runs this pipeline component.
         """
-        facts = messages
-        scored_messages = self.score_importance(facts)
-        sorted_scored_messages = sorted(scored_messages, key=lambda x: float(x.score), reverse=True)
+        scores = self.score_messages(messages)
+        for message, score in zip(messages, scores.tolist()):
+            message.score = score
+        sorted_scored_messages = [messages[idx] for idx in rank(scores, self.top_n)]
         return (sorted_scored_messages,)
 
+    def score_messages(self, messages: Sequence[Message]) -> np.ndarray:
+        outlierness = np.fromiter(
+            (message.main_fact.outlierness for message in messages), dtype=float, count=len(messages)
+        )
+        features = self.feature_columns(messages) if self.score_functions else {}
+        return self.score_importance_batch(outlierness, features)
+
+    def score_importance_batch(
+        self, outlierness: np.ndarray, features: Optional[Dict[str, np.ndarray]] = None
+    ) -> np.ndarray:
+        scores = np.asarray(outlierness, dtype=float)
+        for score_function in self.score_functions:
+            scores = score_function(scores, features or {})
+        return scores
+
+    def feature_columns(self, messages: Sequence[Message]) -> Dict[str, np.ndarray]:
+        columns = {
+            "analysis_family": np.array(
+                [message.main_fact.analysis_type.split(":")[0] for message in messages], dtype=object
+            ),
+            "importance_coefficient": np.fromiter(
+                (message.importance_coefficient for message in messages), dtype=float, count=len(messages)
+            ),
+        }
+        for column, extractor in self.feature_extractors.items():
+            values = (extractor(message) for message in messages)
+            columns[column] = np.fromiter(values, dtype=float, count=len(messages))
+        return columns
+
     def score_importance(self, messages: List[Message]) -> List[Message]:
-        for msg in messages:
-            msg.score = self.score_importance_single(msg)
+        for message, score in zip(messages, self.score_messages(messages).tolist()):
+            message.score = score
         return messages
 
     def score_importance_single(self, message: Message) -> float:
-        return message.main_fact.outlierness
+        return self.score_messages([message]).item()
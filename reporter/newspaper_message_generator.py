@@ -1,10 +1,12 @@
+import hashlib
 import json
 import logging
 from pathlib import Path
-from typing import Any, Callable, Dict, List, Optional, Tuple
+from typing import Any, Callable, Dict, Hashable, List, Optional, Tuple
 
 from numpy.random import Generator
 
+from reporter.core.cache import LRUCache
 from reporter.core.message_generator import NoMessagesForSelectionException
 from reporter.core.models import Message
 from reporter.core.pipeline import NLGPipelineComponent, Registry
@@ -62,18 +64,44 @@ UNREPORTABLE_PROCESSORS: List[str] = [
     "ExpandQuery",
 ]
 
+# Processors whose messages depend on the language of the report, as the names of their entities are resolved in it.
+# The messages of the other processors are the same in every language.
+LANGUAGE_DEPENDENT_PROCESSORS: List[str] = [
+    "ExtractNames",
+    "TrackNameSentiment",
+]
+
 
 PAYLOAD_ERROR_LOGGING_PATH: Path = Path(__file__).parent / ".." / "errored_payloads"
 PAYLOAD_ALL_LOGGING_PATH: Path = Path(__file__).parent / ".." / "payloads"
 MAX_LOGGED_PAYLOADS = 25
 
+# Number of (uuid, content hash, language) entries kept in the "parsed-message-cache" registry entry
+PARSED_MESSAGE_CACHE_SIZE = 512
+
+
+def content_hash(task_result_json: Any) -> str:
+    """
+    A digest of the (JSON-serializable) task result, independent of the ordering of the keys in the payload.
+    """
+    content = json.dumps(task_result_json, sort_keys=True, ensure_ascii=False).encode("utf-8")
+    return hashlib.sha1(content).hexdigest()
+
 
 class NewspaperMessageGenerator(NLGPipelineComponent):
+    def __init__(self, log_payloads: bool = True) -> None:
+        """
+        :param log_payloads: log the task results to PAYLOAD_ALL_LOGGING_PATH, or PAYLOAD_ERROR_LOGGING_PATH if
+            parsing them fails
+        """
+        self.log_payloads = log_payloads
+
     def run(self, registry: Registry, random: Generator, language: str, data: str) -> Tuple[List[Message]]:
         """
         Run this pipeline component.
         """
         message_parsers: List[Callable[[TaskResult, List[TaskResult]], List[Message]]] = registry.get("message-parsers")
+        message_cache: LRUCache = registry.get("parsed-message-cache")
 
         if not data:
             raise NoMessagesForSelectionException("No data at all!")
@@ -89,26 +117,45 @@ class NewspaperMessageGenerator(NLGPipelineComponent):
             if not task_result.task_result.get("result"):
                 log.error(f"TaskResult {task_result.uuid} has empty result section, skipping.")
                 continue
+
+            cache_key = self.cache_key(task_result, original_json, language)
+            cached_messages: Optional[Tuple[Message, ...]] = message_cache.get(cache_key)
+            if cached_messages is not None:
+                log.info(f"Reusing {len(cached_messages)} cached messages for task result with id {task_result.uuid}")
+                messages.extend(self._copy_message(message) for message in cached_messages)
+                continue
+
+            parsed_messages: List[Message] = []
             generation_succeeded = False
+            parser_crashed = False
             for message_parser in message_parsers:
                 try:
                     new_messages = message_parser(task_result, task_results, language)
                     for message in new_messages:
                         log.debug("Parsed message {}".format(message))
                     generation_succeeded = True
-                    messages.extend(new_messages)
+                    parsed_messages.extend(new_messages)
                 except WrongResourceException:
                     continue
                 except Exception as ex:
                     log.error("Message parser crashed: {}".format(ex), exc_info=True)
-                    self.log_payload(original_json, PAYLOAD_ERROR_LOGGING_PATH, task_result.uuid)
+                    if self.log_payloads:
+                        self.log_payload(original_json, PAYLOAD_ERROR_LOGGING_PATH, task_result.uuid)
+                    parser_crashed = True
 
             if not generation_succeeded:
                 log.error("Failed to parse a Message from {}. Processor={}".format(task_result, task_result.processor))
-                self.log_payload(original_json, PAYLOAD_ERROR_LOGGING_PATH, task_result.uuid)
-            else:
+                if self.log_payloads:
+                    self.log_payload(original_json, PAYLOAD_ERROR_LOGGING_PATH, task_result.uuid)
+            elif self.log_payloads:
                 self.log_payload(original_json, PAYLOAD_ALL_LOGGING_PATH, task_result.uuid)
 
+            # Only cache complete parses, s.t. a crashing parser gets another chance on the next request
+            if generation_succeeded and not parser_crashed:
+                message_cache.put(cache_key, tuple(self._copy_message(message) for message in parsed_messages))
+
+            messages.extend(parsed_messages)
+
         # Filter out messages that share the same underlying fact. Can't be done with set() because of how the
         # __hash__ and __eq__ are (not) defined.
         facts = set()
@@ -124,6 +171,29 @@ class NewspaperMessageGenerator(NLGPipelineComponent):
 
         return (messages,)
 
+    @staticmethod
+    def cache_key(task_result: TaskResult, original_json: Dict[str, Any], language: str) -> Hashable:
+        """
+        Key under which the messages parsed from `original_json` are stored in the parsed message cache. The uuid alone
+        is not enough, as the same task can be re-sent with a different (e.g. updated) result. The messages of language
+        independent processors are shared by all languages.
+        """
+        key_language = language if task_result.processor in LANGUAGE_DEPENDENT_PROCESSORS else None
+        return task_result.uuid, content_hash(original_json), key_language
+
+    @staticmethod
+    def is_language_independent(data: str) -> bool:
+        """
+        Whether the messages generated from `data` are the same in every language.
+        """
+        return all(result.get("processor") not in LANGUAGE_DEPENDENT_PROCESSORS for result in json.loads(data))
+
+    @staticmethod
+    def _copy_message(message: Message) -> Message:
+        # Later pipeline stages modify the Messages (score, template, facts), so the cache must neither hand out nor
+        # retain the instances that flow through the pipeline. Facts are immutable, so a shallow copy suffices.
+        return Message(list(message.facts), message.importance_coefficient, message.score, message.polarity)
+
     @staticmethod
     def log_payload(payload: Dict, path: Path, uuid: str) -> None:
         # Save payload as <uuid>.txt
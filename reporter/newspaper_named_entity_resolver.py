@@ -1,21 +1,32 @@
 import logging
-import re
 from abc import ABC, abstractmethod
-from typing import Any, Dict, List, Tuple
+from types import MappingProxyType
+from typing import Any, Dict, List, Mapping, Optional, Tuple
 
 from numpy.random import Generator
 
 from reporter.core.entity_name_resolver import EntityNameResolver
 from reporter.core.models import Slot
 from reporter.core.registry import Registry
+from reporter.core.tags import EntityTag, parse_tag
 
 log = logging.getLogger("root")
 
+# Entity name resolver components by language, entity type and name type
+EntityNameRealizers = Mapping[str, Mapping[str, Mapping[str, "EntityNameResolverComponent"]]]
+
 
 class NewspaperEntityNameResolver(EntityNameResolver):
-    def __init__(self):
-        self._matcher = re.compile(r"\[ENTITY:([^:]+):([^\]]+)\]")
-        self.realizers: Dict[str, Dict[str, Dict[str, EntityNameResolverComponent]]] = {
+    def __init__(self, realizers: Optional[EntityNameRealizers] = None) -> None:
+        """
+        :param realizers: the components resolving the names of entities by language, entity type and name type, as
+            built by `build_realizers`. Built anew if not given.
+        """
+        self.realizers = realizers if realizers is not None else self.build_realizers()
+
+    @staticmethod
+    def build_realizers() -> EntityNameRealizers:
+        realizers = {
             "en": {
                 "LANGUAGE": {
                     "full": EnglishLanguageNameResolver(),
@@ -85,20 +96,26 @@ class NewspaperEntityNameResolver(EntityNameResolver):
                 },
             },
         }
+        return MappingProxyType(
+            {
+                language: MappingProxyType(
+                    {entity_type: MappingProxyType(by_name) for (entity_type, by_name) in by_type.items()}
+                )
+                for (language, by_type) in realizers.items()
+            }
+        )
 
     def is_entity(self, maybe_entity: Any) -> bool:
         if not isinstance(maybe_entity, str):
             log.debug("Value {} is not an entity".format(maybe_entity))
             return False
-        return self._matcher.fullmatch(maybe_entity) is not None
+        return isinstance(parse_tag(maybe_entity), EntityTag)
 
     def parse_entity(self, entity: str) -> Tuple[str, str]:
-        match = self._matcher.fullmatch(entity)
-        if not match:
+        tag = parse_tag(entity)
+        if not isinstance(tag, EntityTag):
             raise ValueError("Value {} does not match entity regex".format(entity))
-        if not len(match.groups()) == 2:
-            raise Exception("Invalid number of matched groups?!")
-        return match.groups()[0], match.groups()[1]
+        return tag.entity_type, tag.entity
 
     def resolve_surface_form(
         self, registry: Registry, random: Generator, language: str, slot: Slot, entity: str, entity_type: str
@@ -111,7 +128,7 @@ class NewspaperEntityNameResolver(EntityNameResolver):
             return
 
         realization = realizer.resolve(random, entity)
-        slot.value = lambda x: realization
+        slot.value = realization
         log.debug('Realizer entity "{}" of type "{}" as "{}"'.format(entity, entity_type, realization))
 
 
@@ -1,3 +1,4 @@
+import copy
 import datetime
 import gzip
 import itertools
@@ -7,14 +8,22 @@ import os
 import pickle
 import random
 from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import Callable, Dict, Iterable, List, Optional, Tuple, TypeVar, Union
+from threading import Event, Thread
+from typing import Callable, Dict, Iterable, List, Optional, Set, Tuple, TypeVar, Union
 
 from reporter.constants import CONJUNCTIONS, get_error_message
 from reporter.core.aggregator import Aggregator
+from reporter.core.cache import LRUCache
 from reporter.core.document_planner import NoInterestingMessagesException
 from reporter.core.models import Template
-from reporter.core.morphological_realizer import MorphologicalRealizer
+from reporter.core.morphological_realizer import (
+    MORPHOLOGY_CACHE_SIZE,
+    MorphologicalRealizer,
+    MorphologyCache,
+    MorphologyWorker,
+)
 from reporter.core.pipeline import NLGPipeline, NLGPipelineComponent
 from reporter.core.realize_slots import SlotRealizer
 from reporter.core.registry import Registry
@@ -23,12 +32,16 @@ from reporter.core.surface_realizer import (
     BodyHTMLOrderedListSurfaceRealizer,
     BodyHTMLSurfaceRealizer,
     HeadlineHTMLSurfaceRealizer,
+    MultiSurfaceRealizer,
+    SurfaceRealizer,
 )
 from reporter.core.template_reader import read_templates
 from reporter.core.template_selector import TemplateSelector
 from reporter.english_uralicNLP_morphological_realizer import EnglishUralicNLPMorphologicalRealizer
+from reporter.entity_label_store import EntityLabelStore
 from reporter.finnish_uralicNLP_morphological_realizer import FinnishUralicNLPMorphologicalRealizer
-from reporter.link_remover import LinkRemover
+from reporter.fused_realizer import FusedRealizer
+from reporter.inflection_table import load_inflection_table
 from reporter.newspaper_date_resolver import DateRealizer
 from reporter.newspaper_document_planner import (
     NewspaperBodyDocumentPlanner,
@@ -36,7 +49,12 @@ from reporter.newspaper_document_planner import (
     MAX_PARAGRAPHS,
 )
 from reporter.newspaper_importance_allocator import NewspaperImportanceSelector
-from reporter.newspaper_message_generator import NewspaperMessageGenerator, NoMessagesForSelectionException
+from reporter.newspaper_message_generator import (
+    PARSED_MESSAGE_CACHE_SIZE,
+    NewspaperMessageGenerator,
+    NoMessagesForSelectionException,
+    content_hash,
+)
 from reporter.newspaper_named_entity_resolver import NewspaperEntityNameResolver
 from reporter.resources.comparison_resource import ComparisonResource
 from reporter.resources.extract_bigrams_resource import ExtractBigramsResource
@@ -52,26 +70,81 @@ from reporter.resources.tooltip_resource import TooltipResource
 from reporter.resources.topic_model_docset_comparison_resource import TopicModelDocsetComparisonResource
 from reporter.resources.topic_model_document_linking_resource import TopicModelDocumentLinkingResource
 from reporter.resources.track_name_sentiment_resource import TrackNameSentimentResource
+from reporter.solr_entity_label_resolver import SolrEntityLabelResolver
 
 log = logging.getLogger("root")
 
+# (output format, links), the variants a report can be realized as
+Variant = Tuple[str, bool]
+
+# The headlines, bodies and errors of a report
+Result = Tuple[Union[str, List[str]], Union[str, List[str]], List[str]]
+
+# A minimal task result, run through the pipelines of every language and format to warm up the service
+WARM_UP_TASK_RESULT = {
+    "uuid": "warm-up",
+    "processor": "ExtractWords",
+    "parameters": {"unit": "tokens"},
+    "task_status": "finished",
+    "task_result": {
+        "result": {"total": 3, "vocabulary": {"kissa": [2, 0.667, 1.0], "koira": [1, 0.333, 0.5]}},
+        "interestingness": {"kissa": 0.9, "koira": 0.5},
+    },
+    "dataset": "warm-up",
+}
+
+# The whole payloads of the latest requests are logged here
+FULL_PAYLOAD_LOGGING_PATH: Path = Path(__file__).parent / ".." / "full_payloads"
+
 
 class NewspaperNlgService(object):
 
     processor_resources: List[ProcessorResource] = []
 
-    # These are (re)initialized every time run_pipeline is called
-    body_pipeline = None
-    headline_pipeline = None
-
-    def __init__(self, random_seed: int = None) -> None:
+    def __init__(
+        self,
+        random_seed: int = None,
+        fused_realization: bool = False,
+        morphology_cache_path: Optional[str] = None,
+        morphology_worker: bool = False,
+        warm_up: bool = False,
+        entity_label_store_path: Optional[str] = None,
+        n_ary_aggregation: bool = False,
+        parallel_languages: bool = False,
+    ) -> None:
         """
         :param random_seed: seed for random number generation, for repeatability
+        :param fused_realization: realize entity names, dates, morphology and text with a single FusedRealizer instead
+            of four separate pipeline components
+        :param morphology_cache_path: if set, inflected word forms are looked up from and saved to an SQLite database
+            at this path, s.t. they survive restarts and are shared between processes
+        :param morphology_worker: inflect the words missing from the morphology cache in a separate worker process,
+            which holds the FST models
+        :param warm_up: warm the service up in a background thread, see `warm_up`. Until the warm-up has finished,
+            `ready` is not set. Without warm-up, the service is ready as soon as it has been created.
+        :param entity_label_store_path: if set, the labels of entities are stored in, and looked up from, an SQLite
+            database at this path before Solr is queried
+        :param n_ary_aggregation: combine each run of adjacent messages sharing a prefix into a single message,
+            instead of combining at most two messages into one
+        :param parallel_languages: when generating a report in several languages, realize the languages in parallel
+            threads once the document has been planned
         """
+        self.fused_realization = fused_realization
+        self.n_ary_aggregation = n_ary_aggregation
+        self.language_executor = (
+            ThreadPoolExecutor(max_workers=len(self.get_languages()), thread_name_prefix="language")
+            if parallel_languages
+            else None
+        )
+        self.ready = Event()
 
         # New registry and result importer
         self.registry = Registry()
 
+        # Entity labels fetched from Solr, shared between requests and the resources that need them
+        entity_label_store = EntityLabelStore(entity_label_store_path) if entity_label_store_path else None
+        self.registry.register("entity-label-resolver", SolrEntityLabelResolver(store=entity_label_store))
+
         # Per-processor resources
         self.processor_resources = [
             TooltipResource(),
@@ -84,8 +157,8 @@ class NewspaperNlgService(object):
             TopicModelDocumentLinkingResource(),
             QueryTopicModelResource(),
             TopicModelDocsetComparisonResource(),
-            ExtractNamesResource(),
-            TrackNameSentimentResource(),
+            ExtractNamesResource(self.registry.get("entity-label-resolver")),
+            TrackNameSentimentResource(self.registry.get("entity-label-resolver")),
             ComparisonResource(),
         ]
 
@@ -106,12 +179,59 @@ class NewspaperNlgService(object):
         for processor_resource in self.processor_resources:
             self.registry.get("message-parsers").append(processor_resource.parse_messages)
 
+        # Messages parsed from previously seen task results, shared between requests
+        self.registry.register("parsed-message-cache", LRUCache(maxsize=PARSED_MESSAGE_CACHE_SIZE))
+
+        # Inflected word forms, shared between requests
+        self.registry.register(
+            "morphology-cache",
+            MorphologyCache(maxsize=MORPHOLOGY_CACHE_SIZE, path=morphology_cache_path, table=load_inflection_table()),
+        )
+        self.registry.register("morphology-worker", MorphologyWorker() if morphology_worker else None)
+
         # Slot Realizers Components
         self.registry.register("slot-realizers", [])
         for processor_resource in self.processor_resources:
             components = [component(self.registry) for component in processor_resource.slot_realizer_components()]
             self.registry.get("slot-realizers").extend(components)
 
+        # Per-language dispatch tables of the realizers, built once and shared by all requests
+        self.registry.register(
+            "slot-realizer-indices",
+            SlotRealizer.build_indices(self.registry.get("slot-realizers"), self.get_languages()),
+        )
+        self.registry.register("entity-name-realizers", NewspaperEntityNameResolver.build_realizers())
+        self.registry.register("date-realizer-components", DateRealizer.build_components())
+
+        if warm_up:
+            Thread(target=self.warm_up, name="warm-up", daemon=True).start()
+        else:
+            self.ready.set()
+
+    def warm_up(self, formats: Iterable[str] = ("p", "ol", "ul")) -> None:
+        """
+        Loads the lazily loaded models of the morphological realizers and runs a synthetic report through every
+        language and format, s.t. the first real request is not slowed down by either. Sets `ready` once done, even if
+        some part of the warm-up failed.
+        """
+        start_time = datetime.datetime.now().timestamp()
+        log.info("Warming up")
+        try:
+            for language, realizer in self.morphological_realizer().language_realizers.items():
+                try:
+                    realizer.warm_up()
+                except Exception as ex:
+                    log.exception("Failed to warm up the morphological realizer for {}: {}".format(language, ex))
+
+            data = json.dumps([WARM_UP_TASK_RESULT])
+            self.run_pipeline_languages(self.get_languages(), formats, data, links=[False], log_payloads=False)
+        except Exception as ex:
+            log.exception("Warm-up failed: {}".format(ex))
+        finally:
+            self.ready.set()
+        end_time = datetime.datetime.now().timestamp()
+        log.warning("Warm-up complete. Warm-up time in seconds: {}".format(end_time - start_time))
+
     T = TypeVar("T")
 
     def _get_cached_or_compute(
@@ -144,36 +264,71 @@ class NewspaperNlgService(object):
                 templates[language].extend(new_templates)
         return templates
 
-    def _get_components(self, realizer: str, links: bool) -> Iterable[NLGPipelineComponent]:
-        yield NewspaperMessageGenerator()
+    def _get_components(
+        self, headline: bool, variants: List[Variant], log_payloads: bool = True
+    ) -> Iterable[NLGPipelineComponent]:
+        """
+        The components of a pipeline realizing the headline or the body of a report as the text of each of `variants`.
+        The slots are realized with links if any of the variants has links, and the links are then left out of the
+        texts of the variants without links. The pipeline outputs the texts keyed by the variants, and the max score.
+        """
+        yield from self._get_planning_components(headline, log_payloads)
+        yield from self._get_realization_components(variants)
+
+    @staticmethod
+    def _get_planning_components(headline: bool, log_payloads: bool = True) -> Iterable[NLGPipelineComponent]:
+        """
+        The components generating the messages and planning the document. Apart from the generation of the messages of
+        some processors, see `NewspaperMessageGenerator.is_language_independent`, these do not depend on the language.
+        """
+        yield NewspaperMessageGenerator(log_payloads)
         yield NewspaperImportanceSelector()
 
-        if realizer == "headline":
+        if headline:
             yield NewspaperHeadlineDocumentPlanner()
         else:
             yield NewspaperBodyDocumentPlanner()
 
-        yield TemplateSelector()
-        yield Aggregator()
-        yield SlotRealizer()
-        yield NewspaperEntityNameResolver()
-        yield DateRealizer()
+    def _get_realization_components(self, variants: List[Variant]) -> Iterable[NLGPipelineComponent]:
+        links = any(variant_links for (_, variant_links) in variants)
 
-        yield MorphologicalRealizer(
-            {"fi": FinnishUralicNLPMorphologicalRealizer(), "en": EnglishUralicNLPMorphologicalRealizer()}
-        )
+        yield TemplateSelector(links)
+        yield Aggregator(self.n_ary_aggregation)
+        yield SlotRealizer(links)
+
+        entity_name_resolver = NewspaperEntityNameResolver(self.registry.get("entity-name-realizers"))
+        date_realizer = DateRealizer(self.registry.get("date-realizer-components"))
+        morphological_realizer = self.morphological_realizer()
+
+        if self.fused_realization:
+            yield FusedRealizer(entity_name_resolver, date_realizer, morphological_realizer, None)
+        else:
+            yield entity_name_resolver
+            yield date_realizer
+            yield morphological_realizer
 
+        yield MultiSurfaceRealizer({variant: self._surface_realizer(*variant) for variant in dict.fromkeys(variants)})
+
+    @staticmethod
+    def _surface_realizer(realizer: str, links: bool) -> SurfaceRealizer:
         if realizer == "headline":
-            yield HeadlineHTMLSurfaceRealizer()
+            return HeadlineHTMLSurfaceRealizer(links)
         elif realizer == "ol":
-            yield BodyHTMLOrderedListSurfaceRealizer()
+            return BodyHTMLOrderedListSurfaceRealizer(links)
         elif realizer == "ul":
-            yield BodyHTMLListSurfaceRealizer()
+            return BodyHTMLListSurfaceRealizer(links)
         else:
-            yield BodyHTMLSurfaceRealizer()
-
-        if not links:
-            yield LinkRemover()
+            return BodyHTMLSurfaceRealizer(links)
+
+    def morphological_realizer(self) -> MorphologicalRealizer:
+        morphology_cache: MorphologyCache = self.registry.get("morphology-cache")
+        morphology_worker: Optional[MorphologyWorker] = self.registry.get("morphology-worker")
+        return MorphologicalRealizer(
+            {
+                "fi": FinnishUralicNLPMorphologicalRealizer(morphology_cache, morphology_worker),
+                "en": EnglishUralicNLPMorphologicalRealizer(morphology_cache, morphology_worker),
+            }
+        )
 
     @staticmethod
     def log_payload(payload: Dict, path: Path, uuid: str) -> None:
@@ -190,12 +345,51 @@ class NewspaperNlgService(object):
                 p.unlink()
 
     def run_pipeline(
-        self, language: str, output_format: str, data: str, links: bool
-    ) -> Tuple[Union[str, List[str]], Union[str, List[str]], List[str]]:
+        self, language: Union[str, List[str]], output_format: str, data: str, links: bool
+    ) -> Union[Result, Dict[str, Result]]:
+        """
+        Generates the report in `language`. Given a list of languages, generates the report in each of them, sharing
+        what does not depend on the language, and returns the results keyed by language.
+        """
+        if isinstance(language, list):
+            reports = self.run_pipeline_languages(language, [output_format], data, [links])
+            return {report_language: report[output_format, links] for (report_language, report) in reports.items()}
+        return self.run_pipeline_formats(language, [output_format], data, [links])[output_format, links]
+
+    def run_pipeline_formats(
+        self, language: str, output_formats: Iterable[str], data: str, links: Iterable[bool] = (False,)
+    ) -> Dict[Variant, Result]:
+        """
+        Generates the report in each of `output_formats`, both with and without links as given by `links`, running the
+        pipelines only once. Returns the headlines, bodies and errors of each (output format, links) pair, which are
+        exactly what `run_pipeline` would return for the pair.
+        """
+        return self.run_pipeline_languages([language], output_formats, data, links)[language]
+
+    def run_pipeline_languages(
+        self,
+        languages: Iterable[str],
+        output_formats: Iterable[str],
+        data: str,
+        links: Iterable[bool] = (False,),
+        log_payloads: bool = True,
+    ) -> Dict[str, Dict[Variant, Result]]:
+        """
+        Like `run_pipeline_formats`, but in each of `languages`. The messages are generated and the document planned
+        only once for all the languages, unless the messages depend on the language, and only the rest of the pipelines
+        is run once per language. Without `log_payloads`, the payload is not logged, e.g. when warming up.
+        """
         start_time = datetime.datetime.now().timestamp()
         log.warning("Starting multi-part generation")
+        languages = list(dict.fromkeys(languages))
+        output_formats = list(dict.fromkeys(output_formats))
+        variants = [
+            (output_format, variant_links) for variant_links in dict.fromkeys(links) for output_format in output_formats
+        ]
         data = json.loads(data)
-        self.log_payload(data, Path(__file__).parent / ".." / "full_payloads", str(start_time))
+        if log_payloads:
+            self.log_payload(data, FULL_PAYLOAD_LOGGING_PATH, str(start_time))
+        data = self._deduplicate_task_results(data)
         splits: Dict[str, List[str]] = defaultdict(list)
         for result in data:
             key = json.dumps(
@@ -207,11 +401,31 @@ class NewspaperNlgService(object):
             )
             splits[key].append(result)
 
-        outputs: List[Tuple[str, str, float, List[str]]] = []
-        for split in splits.values():
-            json_split = json.dumps(split)
-            outputs.append(self.run_pipeline_single(language, output_format, json_split, links))
+        split_outputs = [
+            self.run_pipeline_single_languages(languages, variants, json.dumps(split), log_payloads)
+            for split in splits.values()
+        ]
+        arranged = {
+            language: {
+                variant: self._arrange_outputs([outputs[language][variant] for outputs in split_outputs])
+                for variant in variants
+            }
+            for language in languages
+        }
 
+        end_time = datetime.datetime.now().timestamp()
+        log.warning("Multi-part generation complete. Generation time in seconds: {}".format(end_time - start_time))
+
+        return arranged
+
+    @staticmethod
+    def _arrange_outputs(
+        outputs: List[Tuple[str, str, float, List[str]]]
+    ) -> Tuple[Union[str, List[str]], Union[str, List[str]], List[str]]:
+        """
+        Orders the (headline, body, score, errors) outputs of the splits of a single report into its headlines, bodies
+        and errors.
+        """
         # Limit outputs to top MAX_PARAGRAPHS outputs
         outputs = sorted(outputs, key=lambda x: x[2], reverse=True)[:MAX_PARAGRAPHS]
 
@@ -238,56 +452,133 @@ class NewspaperNlgService(object):
 
         errors = list(itertools.chain.from_iterable(errors))
 
-        end_time = datetime.datetime.now().timestamp()
-        log.warning("Multi-part generation complete. Generation time in seconds: {}".format(end_time - start_time))
-
         return headlines, bodies, errors
 
+    @staticmethod
+    def _deduplicate_task_results(task_results: List[Dict]) -> List[Dict]:
+        """
+        Drops repeated copies of identical task results, keeping the first occurrence of each. The copies would only
+        produce Messages with identical facts, which the message generator would then discard anyway.
+        """
+        seen: Set[str] = set()
+        unique: List[Dict] = []
+        for task_result in task_results:
+            digest = content_hash(task_result)
+            if digest in seen:
+                log.info("Ignoring repeated copy of task result {}".format(task_result.get("uuid")))
+                continue
+            seen.add(digest)
+            unique.append(task_result)
+        return unique
+
     def run_pipeline_single(
         self, language: str, output_format: str, data: str, links: bool
     ) -> Tuple[str, str, float, List[str]]:
-        log.info("Configuring Body NLG Pipeline")
-        self.body_pipeline = NLGPipeline(self.registry, *self._get_components(output_format, links))
-        self.headline_pipeline = NLGPipeline(self.registry, *self._get_components("headline", links))
+        return self.run_pipeline_single_formats(language, [(output_format, links)], data)[output_format, links]
 
-        errors: List[str] = []
+    def run_pipeline_single_formats(
+        self, language: str, variants: List[Variant], data: str
+    ) -> Dict[Variant, Tuple[str, str, float, List[str]]]:
+        return self.run_pipeline_single_languages([language], variants, data)[language]
 
-        log.info("Running Body NLG pipeline: language={}".format(language))
-        try:
-            body, max_score = self.body_pipeline.run((data,), language, prng_seed=self.registry.get("seed"))
-            log.info("Body pipeline complete")
-        except NoMessagesForSelectionException as ex:
-            log.error("%s", ex)
-            body, max_score = get_error_message(language, "no-messages-for-selection"), 0
-            errors.append("NoMessagesForSelectionException")
-        except NoInterestingMessagesException as ex:
-            log.info("%s", ex)
-            body, max_score = get_error_message(language, "no-interesting-messages-for-selection"), 0
-            errors.append("NoInterestingMessagesException")
-        except Exception as ex:
-            log.exception("%s", ex)
-            body, max_score = get_error_message(language, "general-error"), 0
-            errors.append("{}: {}".format(ex.__class__.__name__, str(ex)))
+    def run_pipeline_single_languages(
+        self, languages: List[str], variants: List[Variant], data: str, log_payloads: bool = True
+    ) -> Dict[str, Dict[Variant, Tuple[str, str, float, List[str]]]]:
+        """
+        Runs the body and the headline pipelines, returning the headline, body, max score and errors of each of the
+        (output format, links) `variants` in each of `languages`.
+        """
+        headline_variants = [("headline", links) for (_, links) in variants]
+
+        log.info("Running Body NLG pipelines: languages={}".format(languages))
+        body_outputs = self._run_pipelines(languages, False, variants, data, log_payloads)
+        log.info("Running headline NLG pipelines")
+        headline_outputs = self._run_pipelines(
+            ["{}-head".format(language) for language in languages], True, headline_variants, data, log_payloads
+        )
 
-        log.info("Running headline NLG pipeline")
+        outputs: Dict[str, Dict[Variant, Tuple[str, str, float, List[str]]]] = {}
+        for language in languages:
+            errors: List[str] = []
+            bodies, max_score = self._texts_or_error_messages(body_outputs[language], language, variants, errors)
+            headlines, _ = self._texts_or_error_messages(
+                headline_outputs["{}-head".format(language)], language, headline_variants, errors
+            )
+            outputs[language] = {
+                (output_format, links): (headlines["headline", links], bodies[output_format, links], max_score, errors)
+                for (output_format, links) in variants
+            }
+        return outputs
+
+    def _run_pipelines(
+        self, languages: List[str], headline: bool, variants: List[Variant], data: str, log_payloads: bool = True
+    ) -> Dict[str, Union[Tuple[Dict[Variant, str], float], Exception]]:
+        """
+        Runs the pipeline realizing the headline or the body as `variants` in each of `languages`, returning either the
+        output of the pipeline or the exception it raised for each language.
+
+        If the messages of `data` do not depend on the language, the messages are generated and the document planned
+        only once, after which the rest of the pipeline is run for each language, in parallel if the service was
+        created with `parallel_languages`, on a copy of the document plan and of the random number generator.
+        """
+        seed = self.registry.get("seed")
+
+        if len(languages) == 1 or not NewspaperMessageGenerator.is_language_independent(data):
+            outputs: Dict[str, Union[Tuple[Dict[Variant, str], float], Exception]] = {}
+            for language in languages:
+                pipeline = NLGPipeline(self.registry, *self._get_components(headline, variants, log_payloads))
+                try:
+                    outputs[language] = pipeline.run((data,), language, prng_seed=seed)
+                except Exception as ex:
+                    outputs[language] = ex
+            return outputs
+
+        planning_pipeline = NLGPipeline(self.registry, *self._get_planning_components(headline, log_payloads))
+        prng = NLGPipeline.new_prng(seed)
         try:
-            headline_lang = "{}-head".format(language)
-            headline = self.headline_pipeline.run((data,), headline_lang, prng_seed=self.registry.get("seed"))[0]
-            log.info("Headline pipeline complete")
-        except NoMessagesForSelectionException as ex:
-            log.error("%s", ex)
-            headline = get_error_message(language, "no-messages-for-selection")
+            document_plan = planning_pipeline.run((data,), languages[0], prng=prng)
+        except Exception as ex:
+            return {language: ex for language in languages}
+
+        def realize(language: str) -> Union[Tuple[Dict[Variant, str], float], Exception]:
+            realization_pipeline = NLGPipeline(self.registry, *self._get_realization_components(variants))
+            try:
+                return realization_pipeline.run(copy.deepcopy(document_plan), language, prng=copy.deepcopy(prng))
+            except Exception as ex:
+                return ex
+
+        if self.language_executor is None:
+            return {language: realize(language) for language in languages}
+        return dict(zip(languages, self.language_executor.map(realize, languages)))
+
+    def _texts_or_error_messages(
+        self,
+        output: Union[Tuple[Dict[Variant, str], float], Exception],
+        language: str,
+        variants: List[Variant],
+        errors: List[str],
+    ) -> Tuple[Dict[Variant, str], float]:
+        """
+        The texts and the max score output by a pipeline or, if the pipeline raised an exception, the error message of
+        each of the variants and a zero score. The error is added to `errors`.
+        """
+        if not isinstance(output, Exception):
+            return output
+        if isinstance(output, NoMessagesForSelectionException):
+            log.error("%s", output)
             errors.append("NoMessagesForSelectionException")
-        except NoInterestingMessagesException as ex:
-            log.info("%s", ex)
-            headline = get_error_message(language, "no-interesting-messages-for-selection")
+            return self._error_texts(variants, language, "no-messages-for-selection"), 0
+        if isinstance(output, NoInterestingMessagesException):
+            log.info("%s", output)
             errors.append("NoInterestingMessagesException")
-        except Exception as ex:
-            log.exception("%s", ex)
-            headline = get_error_message(language, "general-error")
-            errors.append("{}: {}".format(ex.__class__.__name__, str(ex)))
+            return self._error_texts(variants, language, "no-interesting-messages-for-selection"), 0
+        log.error("%s", output, exc_info=output)
+        errors.append("{}: {}".format(output.__class__.__name__, str(output)))
+        return self._error_texts(variants, language, "general-error"), 0
 
-        return headline, body, max_score, errors
+    @staticmethod
+    def _error_texts(variants: List[Variant], language: str, error: str) -> Dict[Variant, str]:
+        return {variant: get_error_message(language, error) for variant in variants}
 
     def _set_seed(self, seed_val: Optional[int] = None) -> None:
         log.info("Selecting seed for NLG pipeline")
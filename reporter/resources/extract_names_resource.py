@@ -1,14 +1,11 @@
-from functools import lru_cache
 import logging
-from typing import List, Type, Dict, Optional
-from time import sleep
-
-import requests
+from typing import List, Type, Dict
 
 from reporter.core.models import Fact, Message
 from reporter.core.realize_slots import RegexRealizer, SlotRealizerComponent, ListRegexRealizer
 from reporter.newspaper_message_generator import TaskResult, WrongResourceException
 from reporter.resources.processor_resource import ProcessorResource
+from reporter.solr_entity_label_resolver import SolrEntityLabelResolver
 
 log = logging.getLogger("root")
 
@@ -29,26 +26,12 @@ fr: le nom le plus important du corpus était {result_value}
 
 
 class ExtractNamesResource(ProcessorResource):
+    def __init__(self, entity_label_resolver: SolrEntityLabelResolver) -> None:
+        self.entity_label_resolver = entity_label_resolver
+
     def templates_string(self) -> str:
         return TEMPLATE
 
-    @lru_cache(maxsize=256)
-    def _resolve_name_from_solr(self, entity: str, language: str) -> Optional[str]:
-        if not entity.startswith("entity_"):
-            return None
-        try:
-            sleep(1)
-            solr_query = f"http://newseye.cs.helsinki.fi:9985/solr/newseye_collection/select?fl=label_{language}_ssi&fq=id:{entity}&q=*:*"  # noqa: E501
-            log.error(f"SOLR QUERY: {solr_query}")
-            reply = requests.get(solr_query).json()
-            log.error(f"SOLR RESPONSE: {reply}")
-            name = reply["response"]["docs"][0][f"label_{language}_ssi"]
-            log.error(f"SOLR NAME: {name}")
-            return name
-        except Exception as ex:
-            log.error(f"SOLR ERROR: {ex}")
-            return None
-
     def parse_messages(self, task_result: TaskResult, context: List[TaskResult], language: str) -> List[Message]:
 
         language = language.split("-")[0]
@@ -58,6 +41,12 @@ class ExtractNamesResource(ProcessorResource):
 
         corpus, corpus_type = self.build_corpus_fields(task_result)
 
+        # The unnamed entities of the whole request are resolved at once, the later task results then hit the cache
+        self.entity_label_resolver.add_labels(self._entity_names(task_result))
+        solr_names = self.entity_label_resolver.resolve_many(
+            self._unnamed_entities([task_result, *context], "ExtractNames"), language
+        )
+
         for entity in task_result.task_result["result"]:
             entity_name_map: Dict[str, str] = task_result.task_result["result"][entity].get("names", {})
 
@@ -69,7 +58,7 @@ class ExtractNamesResource(ProcessorResource):
             ]
 
             if not entity_name_map:
-                entity_names.insert(0, self._resolve_name_from_solr(entity, language))
+                entity_names.insert(0, solr_names.get(entity))
 
             task_result.task_result["result"][entity]["entity"] = next(name for name in entity_names if name)
 
@@ -3,6 +3,7 @@ from typing import List, Type
 
 from reporter.core.models import Fact, Message
 from reporter.core.realize_slots import SlotRealizerComponent, RegexRealizer
+from reporter.core.tags import EntityTag
 from reporter.newspaper_message_generator import TaskResult, WrongResourceException
 from reporter.resources.processor_resource import ProcessorResource
 
@@ -80,7 +81,7 @@ class GenerateTimeSeriesResource(ProcessorResource):
                                     time,  # timestamp_to
                                     "year",  # timestamp_type
                                     "GenerateTimeSeries:" + value_type,  # analysis_type
-                                    "[ENTITY:{}:{}]".format(facet_name, facet_value),  # result_key
+                                    EntityTag(facet_name, facet_value),  # result_key
                                     value,  # result_value
                                     interestingness,  # outlierness
                                     "[LINK:{}]".format(task_result.uuid),  # uuid
@@ -114,7 +115,7 @@ class GenerateTimeSeriesResource(ProcessorResource):
                                     to_year,  # timestamp_to
                                     "between_years",  # timestamp_type
                                     "GenerateTimeSeries:{}:{}".format(value_type, complex_key),  # analysis_type
-                                    "[ENTITY:{}:{}]".format(facet_name, facet_value),  # result_key
+                                    EntityTag(facet_name, facet_value),  # result_key
                                     value,  # result_value
                                     interestingness,  # outlierness
                                     "[LINK:{}]".format(task_result.uuid),  # uuid
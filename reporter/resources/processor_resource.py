@@ -22,6 +22,28 @@ class ProcessorResource(ABC):
     def slot_realizer_components(self) -> List[Type[SlotRealizerComponent]]:
         pass
 
+    @staticmethod
+    def _unnamed_entities(task_results: List[TaskResult], processor: str) -> List[str]:
+        """
+        The entities, in the results of all the task results of `processor`, that came without a map of names. Task
+        results without any results, e.g. those of failed or unfinished tasks, are skipped.
+        """
+        return [
+            entity
+            for task_result in task_results
+            if task_result.processor == processor
+            for (entity, result) in ((task_result.task_result or {}).get("result") or {}).items()
+            if not result.get("names")
+        ]
+
+    @staticmethod
+    def _entity_names(task_result: TaskResult) -> Dict[str, Dict[str, str]]:
+        """
+        The maps of names, by language, of the entities in the results of `task_result` that came with one.
+        """
+        results = task_result.task_result["result"]
+        return {entity: result["names"] for (entity, result) in results.items() if result.get("names")}
+
     def _parse_dataset(self, dataset) -> Tuple[List[str], List[str]]:
         print(dataset, type(dataset))
         corpus_type = ["dataset"]
@@ -1,14 +1,12 @@
 import logging
-from functools import lru_cache
-from time import sleep
-from typing import List, Type, Dict, Tuple, Optional
-
-import requests
+from typing import List, Type, Dict, Tuple
 
 from reporter.core.models import Fact, Message
 from reporter.core.realize_slots import SlotRealizerComponent
+from reporter.core.tags import EntityTag
 from reporter.newspaper_message_generator import TaskResult, WrongResourceException
 from reporter.resources.processor_resource import ProcessorResource
+from reporter.solr_entity_label_resolver import SolrEntityLabelResolver
 
 log = logging.getLogger("root")
 
@@ -41,26 +39,12 @@ fr: {result_key} a été discutée pendant {result_value} années distinctes {ti
 
 
 class TrackNameSentimentResource(ProcessorResource):
+    def __init__(self, entity_label_resolver: SolrEntityLabelResolver) -> None:
+        self.entity_label_resolver = entity_label_resolver
+
     def templates_string(self) -> str:
         return TEMPLATE
 
-    @lru_cache(maxsize=256)
-    def _resolve_name_from_solr(self, entity: str, language: str) -> Optional[str]:
-        if not entity.startswith("entity_"):
-            return None
-        try:
-            sleep(1)
-            solr_query = f"http://newseye.cs.helsinki.fi:9985/solr/newseye_collection/select?fl=label_{language}_ssi&fq=id:{entity}&q=*:*"  # noqa: E501
-            log.error(f"SOLR QUERY: {solr_query}")
-            reply = requests.get(solr_query).json()
-            log.error(f"SOLR RESPONSE: {reply}")
-            name = reply["response"]["docs"][0][f"label_{language}_ssi"]
-            log.error(f"SOLR NAME: {name}")
-            return name
-        except Exception as ex:
-            log.error(f"SOLR ERROR: {ex}")
-            return None
-
     def parse_messages(self, task_result: TaskResult, context: List[TaskResult], language: str) -> List[Message]:
 
         language = language.split("-")[0]
@@ -70,6 +54,12 @@ class TrackNameSentimentResource(ProcessorResource):
 
         corpus, corpus_type = self.build_corpus_fields(task_result)
 
+        # The unnamed entities of the whole request are resolved at once, the later task results then hit the cache
+        self.entity_label_resolver.add_labels(self._entity_names(task_result))
+        solr_names = self.entity_label_resolver.resolve_many(
+            self._unnamed_entities([task_result, *context], "TrackNameSentiment"), language
+        )
+
         entries: Dict[str, Dict[int, Tuple[float, float]]] = {}
         for entity in task_result.task_result["result"]:
             entity_name_map: Dict[str, str] = task_result.task_result["result"][entity].get("names")
@@ -83,7 +73,7 @@ class TrackNameSentimentResource(ProcessorResource):
             ]
 
             if not entity_name_map:
-                entity_name_priority_list.insert(0, self._resolve_name_from_solr(entity, language))
+                entity_name_priority_list.insert(0, solr_names.get(entity))
 
             name = next(name for name in entity_name_priority_list if name)
 
@@ -125,7 +115,7 @@ class TrackNameSentimentResource(ProcessorResource):
                         max_year,
                         "between_years",
                         "TrackNameSentiment:Mean",
-                        "[ENTITY:NAME:{}]".format(entry),
+                        EntityTag("NAME", entry),
                         mean_sentiment,
                         max_interestingness,
                         "[LINK:{}]".format(task_result.uuid),  # uuid
@@ -143,7 +133,7 @@ class TrackNameSentimentResource(ProcessorResource):
                             max_year,
                             "between_years",
                             "TrackNameSentiment:CountYears",
-                            "[ENTITY:NAME:{}]".format(entry),
+                            EntityTag("NAME", entry),
                             year_count,
                             max_interestingness,
                             "[LINK:{}]".format(task_result.uuid),  # uuid
@@ -159,7 +149,7 @@ class TrackNameSentimentResource(ProcessorResource):
                             min_sentiment_year,
                             "year",
                             "TrackNameSentiment:Min",
-                            "[ENTITY:NAME:{}]".format(entry),
+                            EntityTag("NAME", entry),
                             min_sentiment,
                             max_interestingness,
                             "[LINK:{}]".format(task_result.uuid),  # uuid
@@ -175,7 +165,7 @@ class TrackNameSentimentResource(ProcessorResource):
                             max_sentiment_year,
                             "year",
                             "TrackNameSentiment:Max",
-                            "[ENTITY:NAME:{}]".format(entry),
+                            EntityTag("NAME", entry),
                             max_sentiment,
                             max_interestingness,
                             "[LINK:{}]".format(task_result.uuid),  # uuid
@@ -0,0 +1,141 @@
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterable, List, Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from reporter.core.cache import LRUCache
+from reporter.entity_label_store import EntityLabelStore
+
+log = logging.getLogger("root")
+
+SOLR_SELECT_URL = "http://newseye.cs.helsinki.fi:9985/solr/newseye_collection/select"
+
+# Maximum number of entity ids fetched with a single query
+SOLR_BATCH_SIZE = 50
+
+# Maximum number of queries in flight at once, which is also the size of the connection pool
+SOLR_MAX_CONCURRENT_QUERIES = 4
+
+# Seconds to wait for Solr to respond to a single query
+SOLR_TIMEOUT = 5.0
+
+# Number of (language, entity id) entries kept, including the ids Solr has no label for
+ENTITY_LABEL_CACHE_SIZE = 4096
+
+_NO_LABEL = object()
+
+
+class SolrEntityLabelResolver(object):
+    """
+    Resolves entity ids (e.g. "entity_123") to their labels in the NewsEye Solr collection.
+
+    All the ids to be resolved are fetched in bulk, with queries of the form `fq=id:(...)`. The queries are sent over
+    a pool of persistent connections, at most `max_concurrent_queries` at a time, and each is given `timeout` seconds
+    to respond. Both labels and ids without a label are cached. Ids whose queries fail are not, s.t. they are retried
+    the next time they are asked for.
+
+    If an EntityLabelStore is given, ids missing from the in-process cache are first looked up from the store, and
+    the labels fetched from Solr or added with `add_labels` are saved to it.
+    """
+
+    def __init__(
+        self,
+        url: str = SOLR_SELECT_URL,
+        batch_size: int = SOLR_BATCH_SIZE,
+        max_concurrent_queries: int = SOLR_MAX_CONCURRENT_QUERIES,
+        timeout: float = SOLR_TIMEOUT,
+        cache_size: int = ENTITY_LABEL_CACHE_SIZE,
+        store: Optional[EntityLabelStore] = None,
+    ) -> None:
+        self.url = url
+        self.store = store
+        self.batch_size = batch_size
+        self.timeout = timeout
+        self._session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=max_concurrent_queries)
+        self._session.mount("http://", adapter)
+        self._session.mount("https://", adapter)
+        self._executor = ThreadPoolExecutor(max_workers=max_concurrent_queries, thread_name_prefix="solr")
+        self._labels = LRUCache(cache_size)
+
+    @staticmethod
+    def is_resolvable(entity: str) -> bool:
+        return entity.startswith("entity_")
+
+    def resolve(self, entity: str, language: str) -> Optional[str]:
+        return self.resolve_many([entity], language).get(entity)
+
+    def resolve_many(self, entities: Iterable[str], language: str) -> Dict[str, str]:
+        """
+        Returns the labels of `entities` in `language`, fetching all the ones not yet cached at once. Entities without
+        a label, and entities that are not Solr entity ids to begin with, are left out of the result.
+        """
+        labels: Dict[str, str] = {}
+        missing: List[str] = []
+        for entity in dict.fromkeys(entities):
+            if not self.is_resolvable(entity):
+                continue
+            label = self._labels.get((language, entity))
+            if label is None:
+                missing.append(entity)
+            elif label is not _NO_LABEL:
+                labels[entity] = label
+
+        if missing and self.store is not None:
+            stored = self.store.get_many(missing, language)
+            for entity, label in stored.items():
+                self._labels.put((language, entity), label)
+            labels.update(stored)
+            missing = [entity for entity in missing if entity not in stored]
+
+        if missing:
+            batches = [missing[idx : idx + self.batch_size] for idx in range(0, len(missing), self.batch_size)]
+            log.info("Fetching labels of {} entities from Solr in {} queries".format(len(missing), len(batches)))
+            for batch, fetched in zip(batches, self._executor.map(lambda b: self._fetch(b, language), batches)):
+                if fetched is None:
+                    continue
+                for entity in batch:
+                    label = fetched.get(entity)
+                    self._labels.put((language, entity), label if label is not None else _NO_LABEL)
+                    if label is not None:
+                        labels[entity] = label
+                if self.store is not None:
+                    self.store.put_many((language, entity, label) for (entity, label) in fetched.items())
+        return labels
+
+    def add_labels(self, names: Dict[str, Dict[str, str]]) -> None:
+        """
+        Adds labels that are already known, e.g. from the names maps of task results, given as a map from entity ids
+        to maps from languages to labels.
+        """
+        triples = [
+            (language, entity, label)
+            for (entity, labels) in names.items()
+            if self.is_resolvable(entity)
+            for (language, label) in labels.items()
+            if label
+        ]
+        for language, entity, label in triples:
+            self._labels.put((language, entity), label)
+        if self.store is not None and triples:
+            self.store.put_many(triples)
+
+    def _fetch(self, entities: List[str], language: str) -> Optional[Dict[str, str]]:
+        field = "label_{}_ssi".format(language)
+        params = {
+            "q": "*:*",
+            "fq": "id:({})".format(" OR ".join('"{}"'.format(entity.replace('"', r"\"")) for entity in entities)),
+            "fl": "id,{}".format(field),
+            "rows": len(entities),
+            "wt": "json",
+        }
+        try:
+            response = self._session.get(self.url, params=params, timeout=self.timeout)
+            response.raise_for_status()
+            docs = response.json()["response"]["docs"]
+        except Exception as ex:
+            log.error("Failed to fetch the labels of {} entities from Solr: {}".format(len(entities), ex))
+            return None
+        return {doc["id"]: doc[field] for doc in docs if doc.get(field)}
@@ -1,7 +1,7 @@
 import json
 import logging.handlers
 import os
-from typing import Callable, Dict, List, Optional, Tuple
+from typing import Any, Callable, Dict, List, Optional, Tuple
 
 import bottle
 from bottle import TEMPLATE_PATH, Bottle, request, response, run
@@ -35,7 +35,7 @@ log.addHandler(rotating_file_handler)
 # Bottle
 bottle.BaseRequest.MEMFILE_MAX = 512 * 1024 * 1024  # Allow up to 512MB requests
 app = Bottle()
-service = NewspaperNlgService(random_seed=4551546)
+service = NewspaperNlgService(random_seed=4551546, warm_up=True)
 TEMPLATE_PATH.insert(0, os.path.dirname(os.path.realpath(__file__)) + "/../views/")
 static_root = os.path.dirname(os.path.realpath(__file__)) + "/../static/"
 
@@ -80,6 +80,41 @@ def api_generate_json() -> Optional[Dict[str, str]]:
     return output
 
 
+@app.route("/api/report/json/formats", method="POST")
+@allow_cors
+def api_generate_json_formats() -> Optional[Dict[str, Any]]:
+    """ like /api/report/json, but renders the report in several formats, with and/or without links, from one run """
+    body = json.loads(request.body.read())
+    language = body["language"]
+    formats = body["formats"]
+    links = body.get("links", False)
+    links = links if isinstance(links, list) else [links]
+    data = json.dumps(body["data"])
+
+    if (
+        language not in service.get_languages()
+        or not isinstance(formats, list)
+        or not formats
+        or any(format not in FORMATS for format in formats)
+        or not links
+        or any(not isinstance(variant_links, bool) for variant_links in links)
+    ):
+        response.status = 400
+        return
+
+    variants = service.run_pipeline_formats(language, formats, data, links)
+    output: Dict[str, Any] = {"language": language}
+    # The errors of all the variants, each only once, in the order they were first seen
+    errors: Dict[str, None] = {}
+    for (format, variant_links), (header, body, variant_errors) in variants.items():
+        reports = output.setdefault("reports_with_links" if variant_links else "reports", {})
+        reports[format] = {"head": header, "body": body}
+        errors.update(dict.fromkeys(variant_errors))
+    if errors:
+        output["errors"] = list(errors)
+    return output
+
+
 @app.route("/api/report", method="POST")
 @allow_cors
 def api_generate() -> Optional[Dict[str, str]]:
@@ -111,6 +146,16 @@ def get_formats() -> Dict[str, List[str]]:
     return {"formats": FORMATS}
 
 
+@app.route("/api/ready")
+@allow_cors
+def get_ready() -> Dict[str, bool]:
+    """ responds with 503 until the service has warmed up, s.t. load balancers can hold off on sending requests """
+    ready = service.ready.is_set()
+    if not ready:
+        response.status = 503
+    return {"ready": ready}
+
+
 def main() -> None:
     log.warning("Starting server at 8080")
     run(app, server="meinheld", host="0.0.0.0", port=8080)
@@ -0,0 +1,129 @@
+from unittest import TestCase, main
+
+import numpy as np
+
+from reporter.core.aggregator import Aggregator
+from reporter.core.models import DocumentPlanNode, Fact, FactFieldSource, Literal, Message, Slot, Template
+from reporter.core.registry import Registry
+
+
+def fact(corpus: str, result_key: str, result_value: int) -> Fact:
+    return Fact(corpus, "query", None, None, "all_time", "count", result_key, result_value, 1, "1")
+
+
+def message(fact: Fact, *components) -> Message:
+    msg = Message(fact)
+    msg.template = Template(list(components))
+    for component in msg.template.components:
+        if isinstance(component, Slot):
+            component.fact = fact
+    return msg
+
+
+class TestAggregator(TestCase):
+    def setUp(self):
+        self.registry = Registry()
+        self.registry.register("CONJUNCTIONS", {"en": {"default_combiner": "and"}})
+        self.aggregator = Aggregator()
+
+    def aggregate(self, *messages):
+        document_plan = DocumentPlanNode(list(messages))
+        (document_plan,) = self.aggregator.run(self.registry, np.random.default_rng(0), "en", document_plan)
+        return [[c.value for c in child.template.components] for child in document_plan.children]
+
+    def aggregate_paragraphs(self, *paragraphs):
+        document_plan = DocumentPlanNode([DocumentPlanNode(list(messages)) for messages in paragraphs])
+        (document_plan,) = self.aggregator.run(self.registry, np.random.default_rng(0), "en", document_plan)
+        return [
+            [[c.value for c in child.template.components] for child in paragraph.children]
+            for paragraph in document_plan.children
+        ]
+
+    def paragraphs(self):
+        return [
+            [
+                message(fact("corpus", key, 10), Slot(FactFieldSource("corpus")), Slot(FactFieldSource("result_key")))
+                for key in keys
+            ]
+            for keys in (("fr", "de", "fi"), ("sv",), ("en", "ru"))
+        ]
+
+    def test_shared_prefix_ending_in_slot_is_combined(self):
+        f1 = fact("corpus", "fr", 10)
+        f2 = fact("corpus", "de", 20)
+        m1 = message(
+            f1, Literal("In"), Slot(FactFieldSource("corpus")), Literal("found"), Slot(FactFieldSource("result_key"))
+        )
+        m2 = message(
+            f2, Literal("In"), Slot(FactFieldSource("corpus")), Literal("found"), Slot(FactFieldSource("result_key"))
+        )
+        self.assertEqual(self.aggregate(m1, m2), [["In", "corpus", "found", "fr", "and", "found", "de"]])
+
+    def test_result_values_are_never_shared(self):
+        f1 = fact("corpus", "fr", 10)
+        f2 = fact("corpus", "de", 10)
+        m1 = message(f1, Slot(FactFieldSource("result_value")), Literal("in"), Slot(FactFieldSource("result_key")))
+        m2 = message(f2, Slot(FactFieldSource("result_value")), Literal("in"), Slot(FactFieldSource("result_key")))
+        self.assertEqual(self.aggregate(m1, m2), [[10, "in", "fr"], [10, "in", "de"]])
+
+    def test_prefix_followed_by_result_values_is_combined(self):
+        f1 = fact("corpus", "fr", 10)
+        f2 = fact("corpus", "de", 20)
+        m1 = message(f1, Literal("found"), Slot(FactFieldSource("result_value")), Slot(FactFieldSource("result_key")))
+        m2 = message(f2, Literal("found"), Slot(FactFieldSource("result_value")), Slot(FactFieldSource("result_key")))
+        self.assertEqual(self.aggregate(m1, m2), [["found", 10, "fr", "and", 20, "de"]])
+
+    def test_different_cases_are_not_combined(self):
+        f1 = fact("corpus", "fr", 10)
+        f2 = fact("corpus", "de", 20)
+        m1 = message(f1, Slot(FactFieldSource("corpus"), {"case": "gen"}), Slot(FactFieldSource("result_key")))
+        m2 = message(f2, Slot(FactFieldSource("corpus"), {"case": "ela"}), Slot(FactFieldSource("result_key")))
+        self.assertEqual(len(self.aggregate(m1, m2)), 2)
+
+    def test_identical_templates_are_combined(self):
+        f1 = fact("corpus", "fr", 10)
+        m1 = message(f1, Literal("In"), Slot(FactFieldSource("corpus")))
+        m2 = message(f1, Literal("In"), Slot(FactFieldSource("corpus")))
+        self.assertEqual(self.aggregate(m1, m2), [["In", "corpus", "and"]])
+
+    def test_at_most_two_messages_are_combined(self):
+        messages = [
+            message(fact("corpus", key, 10), Slot(FactFieldSource("corpus")), Slot(FactFieldSource("result_key")))
+            for key in ("fr", "de", "fi")
+        ]
+        self.assertEqual(self.aggregate(*messages), [["corpus", "fr", "and", "de"], ["corpus", "fi"]])
+
+    def test_paragraphs_are_aggregated_separately(self):
+        self.assertEqual(
+            self.aggregate_paragraphs(*self.paragraphs()),
+            [[["corpus", "fr", "and", "de"], ["corpus", "fi"]], [["corpus", "sv"]], [["corpus", "en", "and", "ru"]]],
+        )
+
+    def test_n_ary_combines_whole_runs(self):
+        self.aggregator = Aggregator(n_ary=True)
+        messages = [
+            message(fact("corpus", key, 10), Slot(FactFieldSource("corpus")), Slot(FactFieldSource("result_key")))
+            for key in ("fr", "de", "fi")
+        ]
+        messages.append(message(fact("other", "sv", 10), Slot(FactFieldSource("corpus")), Literal("x")))
+        self.assertEqual(self.aggregate(*messages), [["corpus", "fr", "and", "de", "and", "fi"], ["other", "x"]])
+
+    def test_n_ary_paragraphs_are_aggregated_separately(self):
+        self.aggregator = Aggregator(n_ary=True)
+        self.assertEqual(
+            self.aggregate_paragraphs(*self.paragraphs()),
+            [[["corpus", "fr", "and", "de", "and", "fi"]], [["corpus", "sv"]], [["corpus", "en", "and", "ru"]]],
+        )
+
+    def test_n_ary_respects_prevent_aggregation(self):
+        self.aggregator = Aggregator(n_ary=True)
+        messages = [
+            message(fact("corpus", key, 10), Slot(FactFieldSource("corpus")), Slot(FactFieldSource("result_key")))
+            for key in ("fr", "de", "fi")
+        ]
+        messages[1].prevent_aggregation = True
+        self.assertEqual(self.aggregate(*messages), [["corpus", "fr"], ["corpus", "de"], ["corpus", "fi"]])
+
+
+if __name__ == "__main__":
+    main()
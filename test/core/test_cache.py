@@ -0,0 +1,47 @@
+from unittest import TestCase, main
+
+from reporter.core.cache import LRUCache
+
+
+class TestLRUCache(TestCase):
+    def setUp(self):
+        self.cache = LRUCache(maxsize=2)
+
+    def test_missing_key_returns_default(self):
+        self.assertIsNone(self.cache.get("a"))
+        self.assertEqual(self.cache.get("a", 1), 1)
+
+    def test_put_then_get(self):
+        self.cache.put("a", 1)
+        self.assertEqual(self.cache.get("a"), 1)
+        self.assertIn("a", self.cache)
+
+    def test_least_recently_used_is_evicted(self):
+        self.cache.put("a", 1)
+        self.cache.put("b", 2)
+        self.cache.get("a")
+        self.cache.put("c", 3)
+        self.assertIn("a", self.cache)
+        self.assertNotIn("b", self.cache)
+        self.assertIn("c", self.cache)
+        self.assertEqual(len(self.cache), 2)
+
+    def test_hits_and_misses_are_counted(self):
+        self.cache.put("a", 1)
+        self.cache.get("a")
+        self.cache.get("b")
+        self.assertEqual(self.cache.hits, 1)
+        self.assertEqual(self.cache.misses, 1)
+
+    def test_clear(self):
+        self.cache.put("a", 1)
+        self.cache.clear()
+        self.assertEqual(len(self.cache), 0)
+
+    def test_non_positive_maxsize_is_rejected(self):
+        with self.assertRaises(ValueError):
+            LRUCache(maxsize=0)
+
+
+if __name__ == "__main__":
+    main()
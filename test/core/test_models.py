@@ -1,3 +1,5 @@
+import copy
+import pickle
 from unittest import TestCase, main
 
 from reporter.core.models import (
@@ -296,6 +298,46 @@ class TestSlot(TestCase):
         self.assertNotEqual(slot.attributes, copy.attributes)
 
 
+class TestRealizedSlot(TestCase):
+    def setUp(self):
+        self.fact = Fact(*Fact._fields)
+
+    def test_slot_value_setter_realizes_slot(self):
+        slot = Slot(FactFieldSource("corpus"), {}, self.fact)
+        slot.value = "realized"
+
+        self.assertEqual(slot.value, "realized")
+        self.assertEqual(slot.slot_type, "corpus")
+        self.assertEqual(slot.copy().value, "realized")
+
+    def test_slot_with_value(self):
+        slot = Slot(FactFieldSource("corpus"), {"case": "genitive"}, self.fact)
+        realized = slot.with_value("realized")
+
+        self.assertEqual(realized.value, "realized")
+        self.assertEqual(realized.slot_type, "corpus")
+        self.assertEqual(realized.attributes, {})
+        self.assertIs(realized.fact, self.fact)
+        self.assertEqual(slot.value, "corpus")
+
+    def test_unrealized_slot_survives_pickle_and_deepcopy(self):
+        # Pickled as part of the cached templates, which have no facts yet
+        slot = Slot(LiteralSource("literal"))
+        self.assertEqual(pickle.loads(pickle.dumps(slot)).value, "literal")
+
+        slot = Slot(FactFieldSource("corpus"), {}, self.fact)
+        self.assertEqual(copy.deepcopy(slot).value, "corpus")
+
+    def test_realized_slot_survives_pickle_and_deepcopy(self):
+        slot = Slot(LiteralSource("literal"))
+        slot.value = "realized"
+        self.assertEqual(pickle.loads(pickle.dumps(slot)).value, "realized")
+
+        slot = Slot(FactFieldSource("corpus"), {}, self.fact)
+        slot.value = "realized"
+        self.assertEqual(copy.deepcopy(slot).value, "realized")
+
+
 class TestLiteralSlot(TestCase):
     def setUp(self):
         self.attributes = dict()
@@ -0,0 +1,111 @@
+import os
+import signal
+import tempfile
+from unittest import TestCase, main
+
+from reporter.core.models import LiteralSlot
+from reporter.core.morphological_realizer import CachedMorphologicalRealizer, MorphologyCache, MorphologyWorker
+
+
+class CountingMorphologicalRealizer(CachedMorphologicalRealizer):
+    def __init__(self, cache=None, worker=None):
+        super().__init__("xx", cache, worker)
+        self.inflected = []
+
+    def normalize_case(self, case):
+        return case.upper()
+
+    def inflect(self, word, case):
+        self.inflected.append((word, case))
+        return "{}+{}".format(word, case)
+
+
+class TestCachedMorphologicalRealizer(TestCase):
+    def test_slot_without_case_is_left_as_is(self):
+        realizer = CountingMorphologicalRealizer()
+        self.assertEqual(realizer.realize(LiteralSlot("sana")), "sana")
+        self.assertEqual(realizer.inflected, [])
+
+    def test_batch_inflects_each_form_once(self):
+        realizer = CountingMorphologicalRealizer()
+        slots = [
+            LiteralSlot("sana", {"case": "gen"}),
+            LiteralSlot("sana"),
+            LiteralSlot("sana", {"case": "Gen"}),
+            LiteralSlot("tyvi", {"case": "gen"}),
+        ]
+        self.assertEqual(realizer.realize_batch(slots), ["sana+GEN", "sana", "sana+GEN", "tyvi+GEN"])
+        self.assertEqual(realizer.inflected, [("sana", "GEN"), ("tyvi", "GEN")])
+
+        self.assertEqual(realizer.realize(LiteralSlot("tyvi", {"case": "gen"})), "tyvi+GEN")
+        self.assertEqual(len(realizer.inflected), 2)
+
+    def test_cache_is_keyed_by_language(self):
+        cache = MorphologyCache()
+        cache.update({("yy", "sana", "GEN"): "other"})
+        realizer = CountingMorphologicalRealizer(cache)
+        self.assertEqual(realizer.realize(LiteralSlot("sana", {"case": "gen"})), "sana+GEN")
+
+    def test_stored_forms_survive_restarts(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "morphology.cache")
+            realizer = CountingMorphologicalRealizer(MorphologyCache(path=path))
+            realizer.realize(LiteralSlot("sana", {"case": "gen"}))
+            self.assertTrue(os.path.exists(path))
+
+            restarted = CountingMorphologicalRealizer(MorphologyCache(path=path))
+            self.assertEqual(restarted.realize(LiteralSlot("sana", {"case": "gen"})), "sana+GEN")
+            self.assertEqual(restarted.inflected, [])
+
+    def test_caches_sharing_a_store_keep_each_others_forms(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "morphology.cache")
+            first, second = MorphologyCache(path=path), MorphologyCache(path=path)
+            first.update({("fi", "sana", "gen"): "sanan"})
+            second.update({("fi", "tyvi", "gen"): "tyven"})
+            self.assertEqual(len(first), 2)
+
+            restarted = MorphologyCache(path=path)
+            self.assertEqual(restarted.get(("fi", "sana", "gen")), "sanan")
+            self.assertEqual(restarted.get(("fi", "tyvi", "gen")), "tyven")
+
+    def test_unreadable_store_is_ignored(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "morphology.cache")
+            with open(path, "wb") as f:
+                f.write(b"not a cache")
+            self.assertEqual(len(MorphologyCache(path=path)), 0)
+
+    def test_worker_inflects_missing_forms(self):
+        worker = MorphologyWorker()
+        try:
+            realizer = CountingMorphologicalRealizer(worker=worker)
+            slots = [LiteralSlot("sana", {"case": "gen"}), LiteralSlot("tyvi", {"case": "gen"})]
+            self.assertEqual(realizer.realize_batch(slots), ["sana+GEN", "tyvi+GEN"])
+            # The forms were inflected, and cached, by the worker's own realizer
+            self.assertEqual(realizer.inflected, [])
+            self.assertEqual(len(realizer.cache), 2)
+        finally:
+            worker.shutdown()
+
+    def test_worker_is_restarted_after_dying(self):
+        worker = MorphologyWorker()
+        try:
+            realizer = CountingMorphologicalRealizer(worker=worker)
+            realizer.realize(LiteralSlot("sana", {"case": "gen"}))
+            for pid in list(worker._executor._processes):
+                os.kill(pid, signal.SIGKILL)
+
+            # The batch sent to the dead worker is inflected in process instead
+            self.assertEqual(realizer.realize(LiteralSlot("tyvi", {"case": "gen"})), "tyvi+GEN")
+            self.assertEqual(realizer.inflected, [("tyvi", "GEN")])
+
+            # and the next batch goes to a new worker
+            self.assertEqual(realizer.realize(LiteralSlot("kuusi", {"case": "gen"})), "kuusi+GEN")
+            self.assertEqual(realizer.inflected, [("tyvi", "GEN")])
+        finally:
+            worker.shutdown()
+
+
+if __name__ == "__main__":
+    main()
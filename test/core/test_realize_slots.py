@@ -0,0 +1,159 @@
+from unittest import TestCase, main
+
+import numpy as np
+
+from reporter.core.models import DocumentPlanNode, Fact, LiteralSource, Message, Slot, Template
+from reporter.core.realize_slots import (
+    NumberRealizer,
+    RegexRealizer,
+    SlotRealizer,
+    SlotRealizerIndex,
+    _parse_number,
+    _required_literals,
+)
+from reporter.core.registry import Registry
+
+
+class TestRequiredLiterals(TestCase):
+    def test_literal_prefix(self):
+        self.assertEqual(_required_literals(r"\[TOKEN:([^\]]+)\]"), ("[TOKEN:", ""))
+
+    def test_literal_infix(self):
+        self.assertEqual(_required_literals(r"(.*)\[Tooltip:JSD\](.*)"), ("", "[Tooltip:JSD]"))
+
+    def test_quantified_literal_is_not_required(self):
+        self.assertEqual(_required_literals(r"ab*c"), ("a", ""))
+
+    def test_alternation_has_no_required_literals(self):
+        self.assertEqual(_required_literals(r"\[A:x\]|\[B:x\]"), ("", ""))
+
+    def test_ignorecase_has_no_required_literals(self):
+        self.assertEqual(_required_literals(r"(?i)\[A:x\]"), ("", ""))
+
+    def test_quantifier_bounds_are_not_literal(self):
+        self.assertEqual(_required_literals(r"a{0,1}b{2}?:x"), ("", ":x"))
+
+    def test_escaped_classes_and_groups_are_not_literal(self):
+        self.assertEqual(_required_literals(r"\d\[(a|b)\]x[)(]yzw"), ("", "yzw"))
+
+
+class TestSlotRealizerIndex(TestCase):
+    def setUp(self):
+        self.number = NumberRealizer()
+        self.token = RegexRealizer(None, "en", r"\[TOKEN:([^\]]+)\]", 1, "{}")
+        self.tooltip = RegexRealizer(None, "en", r"(.*)\[Tooltip:X\](.*)", [1, 2], "{}x{}")
+        self.topic = RegexRealizer(None, "en", r"\[TopicModel:Named:([^\]]+)\]", 1, "{}")
+        self.topic_any = RegexRealizer(None, "en", r"\[TopicModel:([^\]]+)\]", 1, "{}")
+        self.index = SlotRealizerIndex([self.topic, self.number, self.token, self.tooltip, self.topic_any])
+
+    def test_only_matching_prefixes_are_candidates(self):
+        self.assertListEqual(self.index.candidates("[TOKEN:word]"), [self.number, self.token])
+
+    def test_candidates_keep_original_order(self):
+        self.assertListEqual(
+            self.index.candidates("[TopicModel:Named:x]"),
+            [self.topic, self.number, self.topic_any],
+        )
+
+    def test_infix_candidates(self):
+        self.assertListEqual(self.index.candidates("a [Tooltip:X] b"), [self.number, self.tooltip])
+
+    def test_non_string_values_only_get_generic_candidates(self):
+        self.assertListEqual(self.index.candidates(12), [self.number])
+
+
+class TestSlotRealizer(TestCase):
+    def realize(self, realizers, value, language="en", indices=None, links=True):
+        registry = Registry()
+        registry.register("slot-realizers", realizers)
+        if indices is not None:
+            registry.register("slot-realizer-indices", indices)
+        message = Message(Fact(*[None] * 10))
+        message.template = Template([Slot(LiteralSource(value))])
+        SlotRealizer(links).run(registry, np.random.default_rng(0), language, DocumentPlanNode([message]))
+        return [str(component.value) for component in message.children]
+
+    def test_produced_slots_are_realized(self):
+        realizers = [
+            RegexRealizer(None, "en", r"\[A:([^\]]+)\]", 1, "a [B:{}]"),
+            RegexRealizer(None, "en", r"\[B:([^\]]+)\]", 1, "b {}"),
+        ]
+        self.assertListEqual(self.realize(realizers, "[A:x]"), ["a", "b", "x"])
+
+    def test_numbers_are_formatted_once(self):
+        self.assertListEqual(self.realize([], "114385", "de"), ["114.385"])
+
+    def test_realizers_are_picked_by_language(self):
+        realizers = [
+            RegexRealizer(None, "fi", r"\[A:([^\]]+)\]", 1, "fi {}"),
+            RegexRealizer(None, "ANY", r"\[A:([^\]]+)\]", 1, "any {}"),
+        ]
+        indices = SlotRealizer.build_indices(realizers, ["en", "fi"])
+        for registered in [None, indices]:
+            self.assertListEqual(self.realize(realizers, "[A:x]", "fi", registered), ["fi", "x"])
+            self.assertListEqual(self.realize(realizers, "[A:x]", "en-head", registered), ["any", "x"])
+            self.assertListEqual(self.realize(realizers, "[A:x]", "de", registered), ["any", "x"])
+
+    def test_cycles_are_not_followed(self):
+        realizers = [
+            RegexRealizer(None, "en", r"\[A:([^\]]+)\]", 1, "[B:{}]"),
+            RegexRealizer(None, "en", r"\[B:([^\]]+)\]", 1, "[A:{}]"),
+        ]
+        self.assertListEqual(self.realize(realizers, "[A:x]"), ["[A:x]"])
+
+    def test_links_are_left_out_without_links(self):
+        realizers = [RegexRealizer(None, "ANY", r"\[LinkedArticle:([^\]]+)\]", (1, 1), "{} [LINK:ARTICLE:{}]")]
+        self.assertListEqual(self.realize(realizers, "[LinkedArticle:x]"), ["x", "[LINK:ARTICLE:x]"])
+        self.assertListEqual(self.realize(realizers, "[LinkedArticle:x]", links=False), ["x"])
+
+    def test_empty_slots_are_not_visited(self):
+        self.assertListEqual(self.realize([RegexRealizer(None, "en", r"", [], "a")], ""), [""])
+
+
+class TestRegexRealizer(TestCase):
+    def setUp(self):
+        self.realizer = RegexRealizer(None, "en", r"\[A:([^\]]+)\]", 1, ["one {}", "two [B:{}]", "three {}"])
+
+    def realize(self, seed):
+        random = np.random.default_rng(seed)
+        success, components = self.realizer.realize(Slot(LiteralSource("[A:x]")), random, "en")
+        self.assertTrue(success)
+        return [component.value for component in components], random.random()
+
+    def test_cached_realization_is_identical(self):
+        realizations = [self.realize(seed) for seed in range(10)]
+        self.assertGreater(self.realizer._tokens.hits, 0)
+        self.assertListEqual([self.realize(seed) for seed in range(10)], realizations)
+
+    def test_no_match_is_cached(self):
+        self.assertIsNone(self.realizer.match("[B:x]"))
+        self.assertIsNone(self.realizer.match("[B:x]"))
+        self.assertEqual(self.realizer._matches.hits, 1)
+
+    def test_match_without_groups(self):
+        realizer = RegexRealizer(None, "en", r"\[A\]", [], "a")
+        self.assertEqual(realizer.match("[A]"), ())
+        self.assertEqual(realizer.match("[A]"), ())
+
+
+class TestNumberRealizer(TestCase):
+    def test_parse_number(self):
+        self.assertEqual(_parse_number(" -1.5 "), -1.5)
+        self.assertEqual(_parse_number(".5"), 0.5)
+        self.assertEqual(_parse_number(3), 3.0)
+        self.assertIsNone(_parse_number("in"))
+        self.assertIsNone(_parse_number("[A:1]"))
+        self.assertIsNone(_parse_number(""))
+
+    def test_realize_batch(self):
+        slots = [Slot(LiteralSource(value)) for value in ["1234", "0.01234", "word", "1234"]]
+        slots.append(Slot(LiteralSource("-0.5"), {"abs": True}))
+        self.assertEqual(NumberRealizer().realize_batch(slots, "fi-head"), 4)
+        self.assertListEqual(
+            [slot.value for slot in slots],
+            ["1\xa0234", "0,012", "word", "1\xa0234", "0,5"],
+        )
+
+
+if __name__ == "__main__":
+    main()
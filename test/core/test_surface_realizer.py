@@ -0,0 +1,58 @@
+from unittest import TestCase, main
+
+import numpy as np
+
+from reporter.core.models import DocumentPlanNode, Fact, Literal, Message, Template
+from reporter.core.registry import Registry
+from reporter.core.surface_realizer import (
+    BodyHTMLListSurfaceRealizer,
+    BodyHTMLSurfaceRealizer,
+    HeadlineHTMLSurfaceRealizer,
+    normalize_sentence,
+)
+
+
+def message(*values: str) -> Message:
+    msg = Message(Fact(*[None] * 10))
+    msg.template = Template([Literal(value) for value in values])
+    return msg
+
+
+class TestNormalizeSentence(TestCase):
+    def test_collapses_spaces(self):
+        self.assertEqual(normalize_sentence("a   b  c"), "a b c")
+
+    def test_removes_whitespace_inside_parentheses(self):
+        self.assertEqual(normalize_sentence("a (  b )"), "a (b)")
+
+    def test_removes_whitespace_before_punctuation(self):
+        self.assertEqual(normalize_sentence("a , b . c  : d"), "a, b. c: d")
+
+    def test_removes_only_a_single_whitespace_character(self):
+        self.assertEqual(normalize_sentence("a \t, (\t\tb"), "a , (\tb")
+
+
+class TestSurfaceRealizer(TestCase):
+    def realize(self, realizer, *paragraphs):
+        document_plan = DocumentPlanNode([DocumentPlanNode(list(messages)) for messages in paragraphs])
+        return realizer.run(Registry(), np.random.default_rng(0), "en", document_plan)[0]
+
+    def test_body(self):
+        self.assertEqual(
+            self.realize(BodyHTMLSurfaceRealizer(), [message("in", "( 1900 )", "", "x"), message("b", ",", "c ")]),
+            "<p>In (1900) x. B, c. </p>",
+        )
+
+    def test_list(self):
+        self.assertEqual(
+            self.realize(BodyHTMLListSurfaceRealizer(), [message("a")], [message("b"), message("")]),
+            "<ul><li>A.</li></ul><ul><li>B.</li></ul>",
+        )
+
+    def test_empty_headline_fails(self):
+        with self.assertRaises(Exception):
+            self.realize(HeadlineHTMLSurfaceRealizer(), [message(" ")])
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,44 @@
+import pickle
+from unittest import TestCase, main
+
+from reporter.core.tags import EntityTag, Tag, TimeTag, parse_tag
+
+
+class TestTags(TestCase):
+    def test_tags_are_their_string_form(self):
+        tag = TimeTag("year", 1900, 1900)
+        self.assertEqual(tag, "[TIME:year:1900:1900]")
+        self.assertEqual(hash(tag), hash("[TIME:year:1900:1900]"))
+        self.assertEqual("{}".format(EntityTag("NAME", "x")), "[ENTITY:NAME:x]")
+
+    def test_parse_typed_tags(self):
+        time = parse_tag("[TIME:month:1910M02:1910M03]")
+        self.assertIsInstance(time, TimeTag)
+        self.assertEqual((time.timestamp_type, time.timestamp_from, time.timestamp_to), ("month", "1910M02", "1910M03"))
+
+        entity = parse_tag("[ENTITY:NAME:a:b]")
+        self.assertIsInstance(entity, EntityTag)
+        self.assertEqual((entity.entity_type, entity.entity), ("NAME", "a:b"))
+
+    def test_parse_other_tags(self):
+        for string in ["[TOKEN:x]", "[TIME:year:1900]", "[ENTITY:NAME]", "[]"]:
+            tag = parse_tag(string)
+            self.assertIs(type(tag), Tag)
+            self.assertEqual(tag, string)
+
+    def test_parse_non_tags(self):
+        for value in ["word", "[word", "", "[", 12, None]:
+            self.assertIsNone(parse_tag(value))
+
+    def test_parse_returns_tags_as_is(self):
+        tag = EntityTag("NEWSPAPER", "x")
+        self.assertIs(parse_tag(tag), tag)
+
+    def test_pickle(self):
+        tag = pickle.loads(pickle.dumps(TimeTag("year", "1900", "1900")))
+        self.assertIsInstance(tag, TimeTag)
+        self.assertEqual(tag.timestamp_from, "1900")
+
+
+if __name__ == "__main__":
+    main()
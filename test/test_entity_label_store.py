@@ -0,0 +1,46 @@
+import json
+import os
+import tempfile
+from unittest import TestCase, main
+
+from reporter.entity_label_store import EntityLabelStore
+
+
+class TestEntityLabelStore(TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, "labels.sqlite")
+        self.store = EntityLabelStore(self.path)
+
+    def tearDown(self):
+        self.store.close()
+        self.directory.cleanup()
+
+    def test_labels_are_stored_per_language(self):
+        self.store.put_many(
+            [("fi", "entity_1", "Helsingfors"), ("fi", "entity_1", "Helsinki"), ("sv", "entity_1", "X")]
+        )
+        self.assertEqual(self.store.get_many(["entity_1", "entity_2"], "fi"), {"entity_1": "Helsinki"})
+        self.assertEqual(self.store.get_many(["entity_1"], "en"), {})
+
+    def test_labels_survive_restarts(self):
+        self.store.put_many([("fi", "entity_1", "Helsinki")])
+        reopened = EntityLabelStore(self.path)
+        self.assertEqual(reopened.get_many(["entity_1"], "fi"), {"entity_1": "Helsinki"})
+        reopened.close()
+
+    def test_import_dump(self):
+        lines = [
+            json.dumps({"id": "entity_1", "label_fi_ssi": "Helsinki", "label_en_ssi": "Helsinki", "type_ssi": "LOC"}),
+            "",
+            json.dumps({"id": "entity_2", "label_fi_ssi": "Suomi", "label_de_ssi": ""}),
+        ]
+        self.assertEqual(self.store.import_dump(lines), 3)
+        self.assertEqual(
+            self.store.get_many(["entity_1", "entity_2"], "fi"), {"entity_1": "Helsinki", "entity_2": "Suomi"}
+        )
+        self.assertEqual(len(self.store), 3)
+
+
+if __name__ == "__main__":
+    main()
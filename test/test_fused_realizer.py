@@ -0,0 +1,67 @@
+from unittest import TestCase, main
+
+import numpy as np
+
+from reporter.core.models import DocumentPlanNode, Fact, Literal, LiteralSlot, Message, Template
+from reporter.core.morphological_realizer import LanguageSpecificMorphologicalRealizer, MorphologicalRealizer
+from reporter.core.surface_realizer import BodyHTMLSurfaceRealizer
+from reporter.fused_realizer import FusedRealizer
+from reporter.newspaper_date_resolver import DateRealizer
+from reporter.newspaper_named_entity_resolver import NewspaperEntityNameResolver
+
+
+class UppercasingMorphologicalRealizer(LanguageSpecificMorphologicalRealizer):
+    def __init__(self):
+        super().__init__("en")
+
+    def realize(self, slot):
+        return str(slot.value).upper() if slot.attributes.get("case") else slot.value
+
+
+def _message(*values) -> Message:
+    message = Message(Fact(*[None] * 10), score=1.0)
+    message.template = Template(
+        [LiteralSlot(value, {"case": "genitive"}) if value.startswith("[") else Literal(value) for value in values]
+    )
+    return message
+
+
+def _document_plan() -> DocumentPlanNode:
+    return DocumentPlanNode(
+        [
+            DocumentPlanNode(
+                [
+                    _message("in", "[TIME:year:1900:1900]", "[ENTITY:NEWSPAPER:suometar]", "published"),
+                    _message("in", "[TIME:year:1900:1900]", "[ENTITY:NEWSPAPER:suometar]", "published"),
+                ]
+            ),
+            DocumentPlanNode(
+                [
+                    _message("between", "[TIME:between_years:1900:1910]", "[ENTITY:NEWSPAPER:l_oeuvre]", "wrote"),
+                    _message("in", "[TIME:month:1910M02:1910M02]", "[ENTITY:NEWSPAPER:suometar]", "wrote"),
+                ]
+            ),
+        ]
+    )
+
+
+class TestFusedRealizer(TestCase):
+    def setUp(self):
+        self.morphological_realizer = MorphologicalRealizer({"en": UppercasingMorphologicalRealizer()})
+
+    def test_output_matches_separate_components(self):
+        for language in ["en", "fi", "en-head"]:
+            random = np.random.default_rng(1)
+            (document_plan,) = NewspaperEntityNameResolver().run(None, random, language, _document_plan())
+            (document_plan,) = DateRealizer().run(None, random, language, document_plan)
+            (document_plan,) = self.morphological_realizer.run(None, random, language, document_plan)
+            expected = BodyHTMLSurfaceRealizer().run(None, random, language, document_plan)
+
+            fused = FusedRealizer(
+                NewspaperEntityNameResolver(), DateRealizer(), self.morphological_realizer, BodyHTMLSurfaceRealizer()
+            )
+            self.assertEqual(fused.run(None, np.random.default_rng(1), language, _document_plan()), expected)
+
+
+if __name__ == "__main__":
+    main()
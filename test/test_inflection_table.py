@@ -0,0 +1,52 @@
+from unittest import TestCase, main
+
+from reporter.core.models import LiteralSlot, Template
+from reporter.core.morphological_realizer import CachedMorphologicalRealizer, MorphologyCache
+from reporter.core.realize_slots import RegexRealizer
+from reporter.inflection_table import build_inflection_table, realizer_vocabulary, template_cases
+
+
+class SuffixingMorphologicalRealizer(CachedMorphologicalRealizer):
+    def __init__(self, cache=None):
+        super().__init__("fi", cache)
+        self.inflected = []
+
+    def normalize_case(self, case):
+        return case[:3].capitalize()
+
+    def inflect(self, word, case):
+        self.inflected.append(word)
+        return word + "n"
+
+
+class TestInflectionTable(TestCase):
+    def test_realizer_vocabulary(self):
+        realizers = [
+            RegexRealizer(None, "fi", r"\[STEM:([^\]]+)\]", 1, 'tyvi "{}"', attach_attributes_to=[0]),
+            RegexRealizer(None, "fi", r"\[TM:([^\]]+)\]", 1, "{}-aihemallin", attach_attributes_to=[0]),
+            RegexRealizer(None, "fi", r"\[TOKEN:([^\]]+)\]", 1, 'sane "{}"'),
+            RegexRealizer(None, "ANY", r"\[LANG:([^\]]+)\]", 1, "[ENTITY:LANGUAGE:{}] kieli", attach_attributes_to=[0]),
+            RegexRealizer(None, "en", r"\[STEM:([^\]]+)\]", 1, 'stem "{}"', attach_attributes_to=[0]),
+        ]
+        self.assertEqual(realizer_vocabulary(realizers, "fi"), {"tyvi"})
+
+    def test_template_cases(self):
+        templates = {
+            "fi": [Template([LiteralSlot("x", {"case": "genitive"}), LiteralSlot("y")])],
+            "fi-head": [Template([LiteralSlot("x", {"case": "inessive"})])],
+            "en": [Template([LiteralSlot("x")])],
+        }
+        self.assertEqual(dict(template_cases(templates)), {"fi": {"genitive", "inessive"}})
+
+    def test_table_is_used_before_inflecting(self):
+        table = build_inflection_table({"fi": SuffixingMorphologicalRealizer()}, {"fi": {"tyvi"}}, {"fi": {"genitive"}})
+        self.assertEqual(table, {("fi", "tyvi", "Gen"): "tyvin"})
+
+        realizer = SuffixingMorphologicalRealizer(MorphologyCache(table=table))
+        slots = [LiteralSlot("tyvi", {"case": "genitive"}), LiteralSlot("sane", {"case": "genitive"})]
+        self.assertEqual(realizer.realize_batch(slots), ["tyvin", "sanen"])
+        self.assertEqual(realizer.inflected, ["sane"])
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,142 @@
+from typing import List, Optional
+from unittest import TestCase, main
+
+from reporter.core.models import Fact, Message
+from reporter.newspaper_document_planner import (
+    MAX_SATELLITES_PER_NUCLEUS,
+    NewspaperBodyDocumentPlanner,
+    NewspaperMessagePool,
+    _select_next_nucleus,
+    _select_satellites_for_nucleus,
+)
+
+
+def _message(name: str, analysis_type: str, score: float, corpus: str = "corpus", result_key: str = "key") -> Message:
+    fact = Fact(corpus, "query", None, None, "all_time", analysis_type, result_key, 1, 1, name)
+    return Message(fact, score=score)
+
+
+def _names(messages: List[Optional[Message]]) -> List[Optional[str]]:
+    return [message.main_fact.analysis_id if message is not None else None for message in messages]
+
+
+def _plan(messages: List[Message]) -> List[List[str]]:
+    document_plan, _ = NewspaperBodyDocumentPlanner().run(None, None, "en", messages)
+    return [_names(paragraph.children) for paragraph in document_plan.children]
+
+
+class TestNewspaperMessagePool(TestCase):
+    def setUp(self):
+        self.messages = [_message("a1", "A", 2), _message("b1", "B:x", 2), _message("a2", "A:y", 3)]
+        self.pool = NewspaperMessagePool(self.messages)
+
+    def test_best_available_is_highest_scoring(self):
+        self.assertEqual(self.pool.best_available(set()), 2)
+
+    def test_best_available_breaks_ties_by_position(self):
+        self.pool.remove([self.messages[2]])
+        self.assertEqual(self.pool.best_available(set()), 0)
+
+    def test_best_available_skips_excluded_families(self):
+        self.assertEqual(self.pool.best_available({self.pool.family_code("A")}), 1)
+
+    def test_best_available_is_none_when_pool_is_exhausted(self):
+        self.pool.remove(self.messages)
+        self.assertIsNone(self.pool.best_available(set()))
+        self.assertListEqual(self.pool.available_messages(), [])
+
+
+class TestNewspaperBodyDocumentPlanner(TestCase):
+    # The expected document plans are those of the planner before the messages were pooled, which re-sorted and
+    # re-filtered lists of messages for every nucleus and satellite.
+
+    def test_nucleus_ties_are_broken_by_position(self):
+        messages = [_message("a1", "A", 2), _message("b1", "B", 2), _message("a2", "A", 2)]
+        pool = NewspaperMessagePool(messages)
+        self.assertListEqual(_names([_select_next_nucleus(pool, [])[0]]), ["a1"])
+        pool.remove(messages[:1])
+        self.assertListEqual(_names([_select_next_nucleus(pool, messages[:1])[0]]), ["b1"])
+        self.assertListEqual(_plan(messages), [["a1", "a2", "b1"]])
+
+    def test_non_positive_scores(self):
+        messages = [_message("a", "A", -1), _message("b", "B", 0), _message("c", "A", 0)]
+        # The first nucleus is selected no matter its score, but non-positive messages are never satellites
+        self.assertListEqual(_plan(messages), [["b"]])
+
+    def test_planning_stops_when_pool_is_exhausted(self):
+        messages = [_message("a3", "A", 1), _message("a1", "A", 3), _message("a2", "A", 2)]
+        self.assertListEqual(_plan(messages), [["a1", "a2", "a3"]])
+
+    def test_nuclei_of_new_analyses_are_preferred(self):
+        messages = [
+            _message("b1", "B", 1.0),
+            _message("a1", "A:x", 4.0),
+            _message("c1", "C", 0.9),
+            _message("a2", "A:y", 2.0),
+            _message("b2", "B:x", 3.0),
+            _message("a3", "A:x", 0.1),
+            _message("c2", "C:z", 0.6),
+        ]
+        self.assertListEqual(_plan(messages), [["a1", "a2", "a3", "b1", "c1"], ["b2", "c2"]])
+
+    def test_relaxed_nucleus_selection_orders_remaining_messages_by_score(self):
+        # Once the criteria for nuclei are relaxed, ties between satellites are broken by score order. Here X and Y
+        # have equal contextual scores, and Y comes first by score even though X comes first in the input.
+        messages = [
+            _message("X", "A", 1.0, "c9", "k3"),
+            _message("N1", "A", 3.0),
+            *[_message("F{}".format(idx), "A", 1.0) for idx in range(10)],
+            _message("Y", "A", 1.5, "c8", "k3"),
+            _message("N2", "A", 2.0, "c9", "k2"),
+        ]
+        fillers = ["F{}".format(idx) for idx in range(10)]
+        self.assertListEqual(_plan(messages), [["N1"] + fillers, ["N2", "Y", "X"]])
+
+
+class TestSatelliteSelection(TestCase):
+    # As above, the expected satellites are those of the planner that rescored every available message for each
+    # satellite, in a linear scan over a list of the messages.
+
+    def satellites(self, nucleus: Message, messages: List[Message], used: List[Message] = ()) -> List[str]:
+        pool = NewspaperMessagePool(messages)
+        pool.remove(used)
+        return _names(_select_satellites_for_nucleus(nucleus, pool))
+
+    def test_satellites_are_looked_up_from_the_nucleus_family(self):
+        messages = [
+            _message("b", "B", 5.0),
+            _message("a1", "A:y", 0.6, "other", "other"),
+            _message("a2", "A:x", 0.6, "other", "other"),
+            _message("a3", "A:x:z", 0.6),
+        ]
+        # The message of another family scores zero in context, despite having the highest score
+        self.assertListEqual(self.satellites(_message("n", "A:x", 1.0), messages), ["a3", "a2", "a1", "b"])
+
+    def test_criteria_are_relaxed_until_min_satellites(self):
+        messages = [
+            _message("a{}".format(idx), "A", 0.01 * (idx + 1), "c{}".format(idx), "k{}".format(idx)) for idx in range(6)
+        ]
+        self.assertListEqual(self.satellites(_message("n", "A", 10.0), messages), ["a5", "a4", "a3", "a2"])
+
+    def test_zero_scored_ties_are_broken_by_position(self):
+        messages = [_message("b1", "B", 0.01), _message("a1", "A", 0.01, "c1", "k1"), _message("b2", "B", 0.5)]
+        self.assertListEqual(self.satellites(_message("n", "A", 10.0), messages), ["a1", "b1", "b2"])
+
+    def test_used_messages_are_not_selected(self):
+        messages = [
+            _message("a1", "A:x", 1.0),
+            _message("a2", "A:x", 2.0),
+            _message("a3", "A:x", 0.5),
+            _message("b", "B", 0),
+        ]
+        self.assertListEqual(self.satellites(_message("n", "A:x", 1.0), messages, messages[1:2]), ["a1", "a3"])
+
+    def test_at_most_max_satellites_are_selected(self):
+        messages = [_message("a{}".format(idx), "A:x", 1.0) for idx in range(MAX_SATELLITES_PER_NUCLEUS + 5)]
+        self.assertListEqual(
+            self.satellites(_message("n", "A:x", 1.0), messages), _names(messages[:MAX_SATELLITES_PER_NUCLEUS])
+        )
+
+
+if __name__ == "__main__":
+    main()
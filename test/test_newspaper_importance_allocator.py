@@ -0,0 +1,69 @@
+from unittest import TestCase, main
+
+import numpy as np
+
+from reporter.core.models import Fact, Message
+from reporter.newspaper_importance_allocator import (
+    NewspaperImportanceSelector,
+    exponential_decay,
+    per_analysis_coefficients,
+    rank,
+)
+
+
+def _message(analysis_type: str, outlierness: float) -> Message:
+    return Message(Fact("corpus", "query", None, None, "all_time", analysis_type, "key", 1, outlierness, "[LINK:x]"))
+
+
+class TestRank(TestCase):
+    def test_full_ranking_matches_stable_sort(self):
+        scores = np.array([0.5, 2.0, 0.5, 1.0, 2.0, 0.0])
+        expected = sorted(range(len(scores)), key=lambda idx: scores[idx], reverse=True)
+        self.assertListEqual(rank(scores).tolist(), expected)
+
+    def test_top_n_matches_head_of_full_ranking(self):
+        scores = np.random.default_rng(0).integers(0, 5, size=200).astype(float)
+        full = rank(scores).tolist()
+        for top_n in (0, 1, 7, 50, 199, 200, 500):
+            self.assertListEqual(rank(scores, top_n).tolist(), full[:top_n])
+
+
+class TestNewspaperImportanceSelector(TestCase):
+    def setUp(self):
+        self.messages = [
+            _message("ExtractWords:Count", 0.2),
+            _message("ExtractFacets:Count", 0.9),
+            _message("ExtractWords:Count", 0.4),
+        ]
+
+    def test_messages_are_sorted_by_outlierness(self):
+        (ranked,) = NewspaperImportanceSelector().run(None, None, "en", self.messages)
+        self.assertListEqual([m.score for m in ranked], [0.9, 0.4, 0.2])
+
+    def test_top_n_limits_output(self):
+        (ranked,) = NewspaperImportanceSelector(top_n=2).run(None, None, "en", self.messages)
+        self.assertListEqual([m.score for m in ranked], [0.9, 0.4])
+
+    def test_per_analysis_coefficients(self):
+        selector = NewspaperImportanceSelector([per_analysis_coefficients({"ExtractWords": 10.0})])
+        (ranked,) = selector.run(None, None, "en", self.messages)
+        self.assertListEqual([m.main_fact.outlierness for m in ranked], [0.4, 0.2, 0.9])
+        self.assertAlmostEqual(ranked[0].score, 4.0)
+
+    def test_exponential_decay(self):
+        selector = NewspaperImportanceSelector([exponential_decay("age", 1.0)])
+        scores = selector.score_importance_batch(np.array([1.0, 1.0]), {"age": np.array([0.0, 1.0])})
+        np.testing.assert_allclose(scores, [1.0, np.exp(-1.0)])
+
+    def test_exponential_decay_through_run(self):
+        ages = {id(message): 2 * idx for (idx, message) in enumerate(self.messages)}
+        selector = NewspaperImportanceSelector(
+            [exponential_decay("age", 1.0)], feature_extractors={"age": lambda message: ages[id(message)]}
+        )
+        (ranked,) = selector.run(None, None, "en", self.messages)
+        self.assertListEqual([m.main_fact.outlierness for m in ranked], [0.2, 0.9, 0.4])
+        np.testing.assert_allclose([m.score for m in ranked], [0.2, 0.9 * np.exp(-2.0), 0.4 * np.exp(-4.0)])
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,34 @@
+from typing import Any
+from unittest import TestCase, main
+
+from reporter.newspaper_message_generator import TaskResult
+from reporter.resources.processor_resource import ProcessorResource
+
+
+def _task_result(processor: str, task_result: Any) -> TaskResult:
+    return TaskResult("uuid", None, None, None, None, processor, {}, "finished", "", "", task_result)
+
+
+class TestUnnamedEntities(TestCase):
+    def test_entities_without_names_are_collected_from_every_task_result(self):
+        task_results = [
+            _task_result("ExtractNames", {"result": {"entity_1": {}, "entity_2": {"names": {"en": "Two"}}}}),
+            _task_result("ExtractNames", {"result": {"entity_3": {"names": {}}}}),
+            _task_result("TrackNameSentiment", {"result": {"entity_4": {}}}),
+        ]
+        self.assertListEqual(
+            ProcessorResource._unnamed_entities(task_results, "ExtractNames"), ["entity_1", "entity_3"]
+        )
+
+    def test_empty_sibling_task_results_are_skipped(self):
+        task_results = [
+            _task_result("ExtractNames", {"result": {"entity_1": {}}}),
+            _task_result("ExtractNames", None),
+            _task_result("ExtractNames", {}),
+            _task_result("ExtractNames", {"result": None}),
+        ]
+        self.assertListEqual(ProcessorResource._unnamed_entities(task_results, "ExtractNames"), ["entity_1"])
+
+
+if __name__ == "__main__":
+    main()
@@ -1,10 +1,14 @@
+import json
 import logging
+import tempfile
 from pathlib import Path
 from typing import List, Union
 from unittest import TestCase, main
+from unittest.mock import patch
 
 from reporter.constants import ERRORS
-from reporter.newspaper_nlg_service import NewspaperNlgService
+from reporter import newspaper_message_generator, newspaper_nlg_service
+from reporter.newspaper_nlg_service import WARM_UP_TASK_RESULT, NewspaperNlgService
 
 logging.disable(logging.CRITICAL)
 
@@ -83,6 +87,49 @@ class TestReporter(TestCase):
             ["_generate_time_series-1581332803610.json", "_extract_facets-1581332756287.json"], "fi", "ul"
         )
 
+    def test_formats_are_identical_to_separate_runs(self):
+        data = self._load_input_data("_extract_bigrams-1581332867317.json")
+        reports = self.service.run_pipeline_formats("de", ["p", "ul"], data, [False, True])
+        self.assertSetEqual(set(reports), {("p", False), ("ul", False), ("p", True), ("ul", True)})
+        for (format, links), report in reports.items():
+            self.assertEqual(report, self.service.run_pipeline("de", format, data, links))
+            self.assertEqual(any("[LINK:" in body for body in report[1]), links)
+
+    def test_languages_are_identical_to_separate_runs(self):
+        data = self._load_input_data("_extract_bigrams-1581332867317.json")
+        for service in [self.service, NewspaperNlgService(parallel_languages=True)]:
+            reports = service.run_pipeline(["de", "fr", "en"], "p", data, False)
+            self.assertSetEqual(set(reports), {"de", "fr", "en"})
+            for language, report in reports.items():
+                self.assertEqual(report, self.service.run_pipeline(language, "p", data, False))
+
+
+class TestWarmUp(TestCase):
+    def test_service_is_ready_without_warm_up(self):
+        self.assertTrue(NewspaperNlgService().ready.is_set())
+
+    def test_service_is_ready_after_warm_up(self):
+        service = NewspaperNlgService(warm_up=True)
+        self.assertTrue(service.ready.wait(timeout=60))
+
+    def test_warm_up_does_not_log_payloads(self):
+        with tempfile.TemporaryDirectory() as directory:
+            logged = Path(directory) / "payloads"
+            errored = Path(directory) / "errored_payloads"
+            full = Path(directory) / "full_payloads"
+            with patch.multiple(
+                newspaper_message_generator, PAYLOAD_ALL_LOGGING_PATH=logged, PAYLOAD_ERROR_LOGGING_PATH=errored
+            ), patch.object(newspaper_nlg_service, "FULL_PAYLOAD_LOGGING_PATH", full):
+                service = NewspaperNlgService(warm_up=True)
+                self.assertTrue(service.ready.wait(timeout=60))
+                self.assertListEqual(list(Path(directory).iterdir()), [])
+
+                # The payloads of requests are still logged, to the same paths
+                request = dict(WARM_UP_TASK_RESULT, uuid="request")
+                service.run_pipeline_languages(["en"], ["p"], json.dumps([request]))
+                self.assertListEqual([path.name for path in logged.iterdir()], ["request.txt"])
+                self.assertEqual(len(list(full.glob("*.txt"))), 1)
+
 
 if __name__ == "__main__":
     main()
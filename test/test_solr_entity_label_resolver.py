@@ -0,0 +1,83 @@
+import json
+import re
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from threading import Thread
+from unittest import TestCase, main
+from urllib.parse import parse_qs, urlparse
+
+from reporter.entity_label_store import EntityLabelStore
+from reporter.solr_entity_label_resolver import SolrEntityLabelResolver
+
+LABELS = {"entity_1": "Helsinki", "entity_2": "Suomi", "entity_3": "Turku"}
+
+
+class StandInSolrHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        self.server.queries.append(self.path)
+        if self.server.failing:
+            self.send_response(500)
+            self.end_headers()
+            return
+        params = parse_qs(urlparse(self.path).query)
+        field = params["fl"][0].split(",")[1]
+        ids = re.findall(r'"([^"]+)"', params["fq"][0])
+        docs = [{"id": entity, field: LABELS[entity]} for entity in ids if entity in LABELS]
+        body = json.dumps({"response": {"numFound": len(docs), "docs": docs}}).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+class TestSolrEntityLabelResolver(TestCase):
+    def setUp(self):
+        self.server = HTTPServer(("127.0.0.1", 0), StandInSolrHandler)
+        self.server.queries = []
+        self.server.failing = False
+        Thread(target=self.server.serve_forever, daemon=True).start()
+        self.url = "http://127.0.0.1:{}/solr/select".format(self.server.server_port)
+        self.resolver = SolrEntityLabelResolver(self.url, batch_size=2, timeout=2)
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def test_entities_are_fetched_in_batches(self):
+        labels = self.resolver.resolve_many(["entity_1", "entity_2", "entity_1", "entity_4", "Helsinki"], "fi")
+        self.assertEqual(labels, {"entity_1": "Helsinki", "entity_2": "Suomi"})
+        self.assertEqual(len(self.server.queries), 2)
+
+    def test_labels_and_missing_labels_are_cached(self):
+        self.resolver.resolve_many(["entity_1", "entity_4"], "fi")
+        self.assertEqual(self.resolver.resolve_many(["entity_1", "entity_4"], "fi"), {"entity_1": "Helsinki"})
+        self.assertEqual(len(self.server.queries), 1)
+
+        self.assertEqual(self.resolver.resolve("entity_1", "en"), "Helsinki")
+        self.assertEqual(len(self.server.queries), 2)
+
+    def test_failed_queries_are_retried(self):
+        self.server.failing = True
+        self.assertIsNone(self.resolver.resolve("entity_3", "fi"))
+        self.server.failing = False
+        self.assertEqual(self.resolver.resolve("entity_3", "fi"), "Turku")
+        self.assertEqual(len(self.server.queries), 2)
+
+    def test_store_is_used_before_solr(self):
+        store = EntityLabelStore(":memory:")
+        store.put_many([("fi", "entity_1", "Helsingfors")])
+        resolver = SolrEntityLabelResolver(self.url, timeout=2, store=store)
+        resolver.add_labels({"entity_2": {"fi": "Suomi", "en": "Finland"}, "Turku": {"fi": "Turku"}})
+
+        labels = resolver.resolve_many(["entity_1", "entity_2", "entity_3"], "fi")
+        self.assertEqual(labels, {"entity_1": "Helsingfors", "entity_2": "Suomi", "entity_3": "Turku"})
+        self.assertEqual(len(self.server.queries), 1)
+        self.assertEqual(store.get_many(["entity_2", "entity_3"], "fi"), {"entity_2": "Suomi", "entity_3": "Turku"})
+        self.assertEqual(store.get_many(["entity_2"], "en"), {"entity_2": "Finland"})
+
+
+if __name__ == "__main__":
+    main()